@@ -0,0 +1,81 @@
+# server/benchmarks/bench_champion_encoding.py
+
+"""
+Compara as codificações do championName (champion_encoding.py): one-hot
+denso (padrão) e hashed esparso. Para cada uma, reporta o número de
+colunas, a memória da matriz de treino, o tempo de codificação e, para
+cada modelo, o tempo de fit e a acurácia média num CV estratificado.
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_champion_encoding.py [--dataset data/input/dataset.csv] [--buckets 256] [--folds 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+from scipy import sparse
+from sklearn.model_selection import StratifiedKFold
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from champion_encoding import ENCODINGS, densify_for, encode_training_frame  # noqa: E402
+from cv_engine import run_cv  # noqa: E402
+from dataset_cache import load_dataset  # noqa: E402
+from lol_classifier_model import DEFAULT_MODEL_SPECS, build_model  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+
+def matrix_bytes(X):
+    if sparse.issparse(X):
+        return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+    return X.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark das codificações do championName.")
+    parser.add_argument('--dataset', default='data/input/dataset.csv')
+    parser.add_argument('--buckets', type=int, default=256, help='Colunas do espaço hashed.')
+    parser.add_argument('--folds', type=int, default=5)
+    args = parser.parse_args()
+
+    df = load_dataset(args.dataset)
+    final_df = df.drop('gameMode', axis=1) if 'gameMode' in df.columns else df
+    cv = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42)
+
+    rows = []
+    for encoding in ENCODINGS:
+        start = time.perf_counter()
+        X, y, columns, _, _ = encode_training_frame(final_df, encoding, args.buckets)
+        encode_seconds = time.perf_counter() - start
+        models = {}
+        for spec in DEFAULT_MODEL_SPECS:
+            model = build_model(spec)
+            result = run_cv(model, densify_for(model, X), y, cv)
+            models[spec['name']] = {
+                "fit_seconds": float(sum(result["fit_seconds"])),
+                "accuracy": float(np.mean(result["fold_scores"])),
+            }
+        rows.append({
+            "encoding": encoding,
+            "n_columns": len(columns),
+            "matrix_bytes": int(matrix_bytes(X)),
+            "dense_bytes": int(X.shape[0] * X.shape[1] * 8),
+            "encode_seconds": encode_seconds,
+            "models": models,
+        })
+
+    for r in rows:
+        print(f"{r['encoding']:>7}: {r['n_columns']} colunas, matriz {r['matrix_bytes'] / 1e6:7.2f} MB, "
+              f"codificação {r['encode_seconds'] * 1000:7.1f} ms", file=sys.stderr)
+        for name, m in r["models"].items():
+            print(f"         {name:<16} fit {m['fit_seconds']:7.2f}s  acc {m['accuracy']:.4f}", file=sys.stderr)
+    print(json.dumps({"dataset": args.dataset, "rows": len(final_df), "folds": args.folds, "encodings": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# server/benchmarks/bench_cv_engine.py
+
+"""
+Compara a avaliação antiga (cross_val_score + cross_val_predict, 2 fits por
+fold) com o cv_engine.run_cv (1 fit por fold) nos modelos do
+lol_classifier_model: confere que scores por fold e predições out-of-fold
+são idênticos e reporta o tempo de cada um.
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_cv_engine.py [--dataset data/input/dataset.csv]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold, cross_val_predict, cross_val_score
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neural_network import MLPClassifier
+from sklearn.preprocessing import StandardScaler
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from cv_engine import run_cv  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+
+def load_dataset(csv_path):
+    """Mesmo pré-processamento do run_experiment_on_dataset (modo ALL)."""
+    df = pd.read_csv(csv_path)
+    df = df.drop('gameMode', axis=1) if 'gameMode' in df.columns else df
+    df_encoded = pd.get_dummies(df, columns=['championName'], drop_first=True)
+    X = StandardScaler().fit_transform(df_encoded.drop('win', axis=1))
+    return X, df_encoded['win']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do CV em uma passada.")
+    parser.add_argument('--dataset', default='data/input/dataset.csv')
+    parser.add_argument('--folds', type=int, default=10)
+    args = parser.parse_args()
+
+    X, y = load_dataset(args.dataset)
+    cv = StratifiedKFold(n_splits=args.folds, shuffle=True, random_state=42)
+    models = {
+        'Random Forest': RandomForestClassifier(random_state=42),
+        'MLP Classifier': MLPClassifier(max_iter=1000, random_state=42),
+        'Naive Bayes': GaussianNB(),
+    }
+
+    rows = []
+    for name, model in models.items():
+        start = time.perf_counter()
+        old_scores = cross_val_score(model, X, y, cv=cv, scoring='accuracy')
+        old_pred = cross_val_predict(model, X, y, cv=cv)
+        old_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = run_cv(model, X, y, cv)
+        new_seconds = time.perf_counter() - start
+
+        identical = (np.array_equal(old_scores, result["fold_scores"])
+                     and np.array_equal(np.asarray(old_pred), result["oof_pred"]))
+        rows.append({
+            "model": name,
+            "two_pass_seconds": old_seconds,
+            "single_pass_seconds": new_seconds,
+            "speedup": old_seconds / new_seconds,
+            "identical": identical,
+        })
+        print(f"{name:16s} 2 passadas {old_seconds:7.2f}s  1 passada {new_seconds:7.2f}s  "
+              f"({old_seconds / new_seconds:.2f}x)  {'✅' if identical else '❌ resultados diferentes'}", file=sys.stderr)
+
+    total_old = sum(r["two_pass_seconds"] for r in rows)
+    total_new = sum(r["single_pass_seconds"] for r in rows)
+    print(f"Total: {total_old:.2f}s -> {total_new:.2f}s ({total_old / total_new:.2f}x)", file=sys.stderr)
+    print(json.dumps({"dataset": args.dataset, "n_samples": len(y), "models": rows}, indent=2))
+    if not all(r["identical"] for r in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
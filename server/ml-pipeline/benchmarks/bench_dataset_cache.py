@@ -0,0 +1,76 @@
+# server/benchmarks/bench_dataset_cache.py
+
+"""
+Compara pd.read_csv com o dataset_cache (primeira leitura, que monta o
+cache, e leituras seguintes, com memory mapping) e confere que os
+DataFrames são iguais.
+
+Usa um diretório de cache temporário. Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_dataset_cache.py [--dataset data/input/dataset.csv] [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from dataset_cache import DatasetCache  # noqa: E402
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do cache colunar de CSVs.")
+    parser.add_argument('--dataset', default='data/input/dataset.csv')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='bench_dataset_cache_')
+    try:
+        cache = DatasetCache(cache_dir)
+        csv_seconds, reference = best_of(lambda: pd.read_csv(args.dataset), args.repeat)
+
+        start = time.perf_counter()
+        cache.load(args.dataset)
+        build_seconds = time.perf_counter() - start
+
+        warm_seconds, (cached, source) = best_of(lambda: cache.load(args.dataset), args.repeat)
+        identical = source["cached"] and cached.equals(reference) and (cached.dtypes == reference.dtypes).all()
+        cache_bytes = sum(os.path.getsize(os.path.join(root, name))
+                          for root, _, names in os.walk(cache_dir) for name in names)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"pd.read_csv {csv_seconds * 1000:8.1f} ms | montar cache {build_seconds * 1000:8.1f} ms | "
+          f"cache (mmap) {warm_seconds * 1000:8.1f} ms ({csv_seconds / warm_seconds:.1f}x)  "
+          f"{'✅' if identical else '❌ DataFrames diferentes'}", file=sys.stderr)
+    print(json.dumps({
+        "dataset": args.dataset,
+        "rows": len(reference),
+        "csv_bytes": os.path.getsize(args.dataset),
+        "cache_bytes": cache_bytes,
+        "read_csv_seconds": csv_seconds,
+        "build_seconds": build_seconds,
+        "cached_seconds": warm_seconds,
+        "identical": bool(identical),
+    }, indent=2))
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# server/benchmarks/bench_float32.py
+
+"""
+Compara o pipeline em float64 (padrão) e em float32 (feature_precision.py)
+num dataset sintético grande (cópula gaussiana, benchmarks/synthetic_data.py):
+
+  - memória: DataFrame carregado, matriz escalada e pico de alocações
+    (tracemalloc) da carga + codificação + escala;
+  - tempo: carga pelo dataset_cache, codificação + escala, fit de cada
+    modelo e predição (PreprocessPlan + modelo) no holdout;
+  - acurácia no holdout de cada modelo nas duas precisões, a diferença e a
+    fração de predições iguais.
+
+Roda num diretório temporário (CSV e cache). Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_float32.py [--source data/input/dataset.csv] [--rows 200000]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neural_network import MLPClassifier
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from champion_encoding import encode_training_frame  # noqa: E402
+from dataset_cache import load_dataset  # noqa: E402
+from feature_precision import PRECISIONS  # noqa: E402
+from preprocess_plan import PreprocessPlan  # noqa: E402
+from synthetic_data import DEFAULT_SOURCE, copula_sample  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+
+def build_models(n_trees, mlp_iter):
+    # max_iter baixo no MLP: o benchmark mede o custo por época, não a convergência
+    return {
+        'Random Forest': RandomForestClassifier(n_estimators=n_trees, random_state=42),
+        'MLP Classifier': MLPClassifier(max_iter=mlp_iter, random_state=42),
+        'Naive Bayes': GaussianNB(),
+    }
+
+
+def run_precision(csv_path, precision, holdout_fraction, n_trees, mlp_iter):
+    dtype = np.dtype(precision)
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = load_dataset(csv_path, float_dtype=dtype)
+    load_seconds = time.perf_counter() - start
+
+    df = df.drop(columns=['gameMode'])
+    n_train = int(len(df) * (1 - holdout_fraction))
+    train, holdout = df.iloc[:n_train], df.iloc[n_train:]
+    start = time.perf_counter()
+    X, y, columns, scaler, _ = encode_training_frame(train, 'onehot', dtype=dtype)
+    encode_seconds = time.perf_counter() - start
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    plan = PreprocessPlan(columns, scaler, dtype=dtype)
+    features = holdout.drop(columns=['win'])
+    start = time.perf_counter()
+    X_holdout = plan.transform_columns({c: features[c].to_numpy() for c in features.columns})
+    transform_seconds = time.perf_counter() - start
+
+    models = {}
+    for name, model in build_models(n_trees, mlp_iter).items():
+        start = time.perf_counter()
+        model.fit(X, y)
+        fit_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        predictions = model.predict(X_holdout)
+        predict_seconds = time.perf_counter() - start
+        models[name] = {
+            "fit_seconds": fit_seconds,
+            "predict_seconds": predict_seconds,
+            "accuracy": float(np.mean(predictions == holdout['win'].to_numpy())),
+            "predictions": predictions,
+        }
+
+    return {
+        "precision": precision,
+        "dataframe_bytes": int(df.memory_usage(deep=True).sum()),
+        "matrix_bytes": int(X.nbytes),
+        "peak_alloc_bytes": int(peak_bytes),
+        "load_seconds": load_seconds,
+        "encode_scale_seconds": encode_seconds,
+        "holdout_transform_seconds": transform_seconds,
+        "models": models,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark float64 x float32 no pipeline de LoL.")
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='CSV usado como base da cópula.')
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--holdout_fraction', type=float, default=0.2)
+    parser.add_argument('--trees', type=int, default=50)
+    parser.add_argument('--mlp_iter', type=int, default=20)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bench_float32_')
+    previous_cache_dir = os.environ.get('DATASET_CACHE_DIR')
+    try:
+        csv_path = os.path.join(workdir, 'synthetic.csv')
+        copula_sample(pd.read_csv(args.source), args.rows).to_csv(csv_path, index=False)
+        os.environ['DATASET_CACHE_DIR'] = os.path.join(workdir, 'cache')
+        # Monta o cache (as duas precisões leem dele) e aquece o get_dummies/scaler
+        warm_up = load_dataset(csv_path).head(1000).drop(columns=['gameMode'])
+        encode_training_frame(warm_up, 'onehot')
+        runs = {precision: run_precision(csv_path, precision, args.holdout_fraction, args.trees, args.mlp_iter)
+                for precision in PRECISIONS}
+    finally:
+        if previous_cache_dir is None:
+            os.environ.pop('DATASET_CACHE_DIR', None)
+        else:
+            os.environ['DATASET_CACHE_DIR'] = previous_cache_dir
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    base, low = runs['float64'], runs['float32']
+    for name, model in low["models"].items():
+        reference = base["models"][name]
+        model["accuracy_diff"] = model["accuracy"] - reference["accuracy"]
+        model["same_predictions"] = float(np.mean(model["predictions"] == reference["predictions"]))
+    for run in runs.values():
+        for model in run["models"].values():
+            model.pop("predictions")
+
+    for key, label in (("dataframe_bytes", "DataFrame"), ("matrix_bytes", "matriz escalada"),
+                       ("peak_alloc_bytes", "pico de alocação")):
+        print(f"{label:<18} float64 {base[key] / 1e6:9.1f} MB | float32 {low[key] / 1e6:9.1f} MB "
+              f"({low[key] / base[key]:.0%})", file=sys.stderr)
+    for key, label in (("load_seconds", "carga"), ("encode_scale_seconds", "codificação+escala"),
+                       ("holdout_transform_seconds", "plano (holdout)")):
+        print(f"{label:<18} float64 {base[key]:8.3f}s | float32 {low[key]:8.3f}s", file=sys.stderr)
+    for name, model in low["models"].items():
+        reference = base["models"][name]
+        print(f"{name:<18} fit {reference['fit_seconds']:7.2f}s -> {model['fit_seconds']:7.2f}s | "
+              f"predição {reference['predict_seconds']:6.3f}s -> {model['predict_seconds']:6.3f}s | "
+              f"acc {reference['accuracy']:.4f} -> {model['accuracy']:.4f} ({model['accuracy_diff']:+.4f}, "
+              f"{model['same_predictions']:.2%} iguais)", file=sys.stderr)
+    print(json.dumps({"source": args.source, "rows": args.rows, "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# server/benchmarks/bench_forest_engine.py
+
+"""
+Benchmark + verificação de equivalência do FlatForest (forest_engine.py)
+contra o RandomForest do sklearn.
+
+Para cada tamanho de lote (padrão: 1, 1.000 e 1.000.000 linhas) compara:
+  - sklearn: predict() + predict_proba() (como o predict_model fazia);
+  - sklearn: só predict_proba() (uma passada);
+  - FlatForest: predict_with_confidence() (uma passada).
+Antes de medir, confere que as probabilidades são idênticas às do sklearn.
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_forest_engine.py [modelo.joblib] [--rows 1 1000 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from forest_engine import FlatForest  # noqa: E402
+
+
+def best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check_equivalence(model, forest, n_features, rng):
+    X = rng.normal(scale=2.0, size=(10_000, n_features))
+    X[::11, rng.integers(n_features)] = np.nan
+    proba_sklearn = model.predict_proba(X)
+    labels, confidences = forest.predict_with_confidence(X)
+    if not np.array_equal(proba_sklearn, forest.predict_proba(X)):
+        raise AssertionError("predict_proba do FlatForest difere do sklearn.")
+    if not np.array_equal(model.predict(X), labels):
+        raise AssertionError("predict do FlatForest difere do sklearn.")
+    if not np.array_equal(proba_sklearn.max(axis=1), confidences):
+        raise AssertionError("Confiança do FlatForest difere do sklearn.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do FlatForest vs sklearn.")
+    parser.add_argument('model_path', nargs='?', default='models_saved/lol_model.joblib')
+    parser.add_argument('--rows', type=int, nargs='+', default=[1, 1_000, 1_000_000])
+    args = parser.parse_args()
+
+    model = joblib.load(args.model_path)
+    model.set_params(n_jobs=None)
+    forest = FlatForest.from_sklearn(model)
+    n_features = model.n_features_in_
+    rng = np.random.default_rng(42)
+
+    check_equivalence(model, forest, n_features, rng)
+    print("✅ Equivalência com o sklearn verificada (probabilidades idênticas).", file=sys.stderr)
+
+    report = []
+    for n_rows in args.rows:
+        X = rng.normal(size=(n_rows, n_features))
+        repeats = 20 if n_rows <= 1_000 else 1
+        t_two_pass = best_time(lambda: (model.predict(X), model.predict_proba(X)), repeats)
+        t_one_pass = best_time(lambda: model.predict_proba(X), repeats)
+        t_flat = best_time(lambda: forest.predict_with_confidence(X), repeats)
+        row = {
+            "rows": n_rows,
+            "sklearn_predict_and_proba_s": t_two_pass,
+            "sklearn_proba_only_s": t_one_pass,
+            "flat_forest_s": t_flat,
+            "speedup_vs_two_pass": t_two_pass / t_flat,
+            "speedup_vs_proba_only": t_one_pass / t_flat,
+        }
+        report.append(row)
+        print(f"{n_rows:>9} linhas | sklearn 2 passadas {t_two_pass * 1000:10.2f} ms | "
+              f"sklearn proba {t_one_pass * 1000:10.2f} ms | FlatForest {t_flat * 1000:10.2f} ms | "
+              f"speedup {row['speedup_vs_two_pass']:.1f}x", file=sys.stderr)
+
+    print(json.dumps({
+        "model": args.model_path,
+        "n_estimators": forest.n_estimators,
+        "n_nodes": int(len(forest.feature)),
+        "results": report,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
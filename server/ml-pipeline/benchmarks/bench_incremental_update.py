@@ -0,0 +1,113 @@
+# server/benchmarks/bench_incremental_update.py
+
+"""
+Compara a atualização incremental (incremental_update.py) com o treino
+completo a cada lote de partidas novas: o dataset é dividido em uma base
+(treino completo inicial), lotes anexados um a um e um holdout final.
+Reporta o tempo de cada atualização e a acurácia no holdout dos dois
+caminhos depois de cada lote.
+
+Roda num diretório temporário (não mexe em models_saved/). Rode a partir
+de server/ml-pipeline:
+    python benchmarks/bench_incremental_update.py [--dataset data/input/dataset.csv] [--batches 5]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import warnings
+
+import joblib
+import pandas as pd
+from sklearn.metrics import accuracy_score
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from incremental_update import DEFAULT_UPDATE_POLICY, update_production_model  # noqa: E402
+from lol_classifier_model import train_and_save_production_model  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+
+def holdout_accuracy(model_dir, holdout):
+    model = joblib.load(os.path.join(model_dir, 'lol_model.joblib'))
+    scaler = joblib.load(os.path.join(model_dir, 'lol_scaler.joblib'))
+    with open(os.path.join(model_dir, 'lol_model_columns.json'), 'r') as f:
+        columns = json.load(f)
+    X = holdout.drop(columns=['win', 'gameMode'], errors='ignore')
+    X = pd.get_dummies(X, columns=['championName']).reindex(columns=columns, fill_value=0)
+    return accuracy_score(holdout['win'], model.predict(scaler.transform(X)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da atualização incremental do modelo de produção.")
+    parser.add_argument('--dataset', default='data/input/dataset.csv')
+    parser.add_argument('--base_fraction', type=float, default=0.6, help='Fração do dataset no treino inicial.')
+    parser.add_argument('--holdout_fraction', type=float, default=0.2)
+    parser.add_argument('--batches', type=int, default=5, help='Lotes anexados entre a base e o holdout.')
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.dataset).sample(frac=1.0, random_state=42).reset_index(drop=True)
+    n_base = int(len(df) * args.base_fraction)
+    n_holdout = int(len(df) * args.holdout_fraction)
+    holdout = df.iloc[len(df) - n_holdout:]
+    stream = df.iloc[n_base:len(df) - n_holdout]
+    batch_size = max(1, len(stream) // args.batches)
+    # Lotes pequenos não devem cair no "espera juntar mais" nem no "lote grande demais"
+    policy = {**DEFAULT_UPDATE_POLICY, "min_new_rows": 1, "max_new_rows_fraction": 1.0,
+              "max_updates_between_rebuilds": args.batches + 1, "max_trees": 10 ** 6}
+
+    cwd = os.getcwd()
+    workdir = tempfile.mkdtemp(prefix='bench_incremental_')
+    rows = []
+    try:
+        os.chdir(workdir)
+        csv_path = 'dataset.csv'
+        df.iloc[:n_base].to_csv(csv_path, index=False)
+        train_and_save_production_model(csv_path)
+        full_dir = os.path.join(workdir, 'full')
+
+        for batch in range(args.batches):
+            chunk = stream.iloc[batch * batch_size:(batch + 1) * batch_size]
+            with open(csv_path, 'a') as f:
+                chunk.to_csv(f, header=False, index=False)
+
+            start = time.perf_counter()
+            summary = update_production_model(csv_path, policy=policy)
+            incremental_seconds = time.perf_counter() - start
+
+            # Mesmo estado do CSV, treino completo num diretório à parte
+            shutil.copy(csv_path, os.path.join(workdir, 'full.csv'))
+            os.makedirs(full_dir, exist_ok=True)
+            os.chdir(full_dir)
+            start = time.perf_counter()
+            train_and_save_production_model(os.path.join(workdir, 'full.csv'))
+            full_seconds = time.perf_counter() - start
+            os.chdir(workdir)
+
+            rows.append({
+                "batch": batch + 1,
+                "new_rows": len(chunk),
+                "action": summary["action"],
+                "n_estimators": summary.get("n_estimators"),
+                "incremental_seconds": incremental_seconds,
+                "full_seconds": full_seconds,
+                "incremental_accuracy": holdout_accuracy('models_saved', holdout),
+                "full_accuracy": holdout_accuracy(os.path.join(full_dir, 'models_saved'), holdout),
+            })
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for r in rows:
+        print(f"lote {r['batch']}: +{r['new_rows']} linhas ({r['action']}, {r['n_estimators']} árvores)  "
+              f"incremental {r['incremental_seconds']:6.2f}s acc {r['incremental_accuracy']:.4f}  |  "
+              f"completo {r['full_seconds']:6.2f}s acc {r['full_accuracy']:.4f}", file=sys.stderr)
+    print(json.dumps({"dataset": args.dataset, "n_base": n_base, "n_holdout": n_holdout, "batches": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+# server/benchmarks/bench_parallel_batch.py
+
+"""
+Escalabilidade da predição em batch paralela (predict_model.py --workers N).
+
+  1. Monta um CSV grande repetindo as linhas de um CSV de partidas (--rows).
+  2. Roda o modo batch em streaming (um processo) como referência.
+  3. Roda o modo paralelo com 1, 2, 4, ... até os núcleos da máquina,
+     confere que a saída é idêntica à de referência e reporta linhas/s,
+     speedup em relação a 1 worker e eficiência (speedup / workers).
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_parallel_batch.py --input <partidas.csv> [--rows 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from parallel_batch import predict_batch_parallel  # noqa: E402
+from predict_model import predict_batch_streaming  # noqa: E402
+
+
+def build_input(source_csv, n_rows, path):
+    import pandas as pd
+
+    df = pd.read_csv(source_csv)
+    repeats = -(-n_rows // len(df))
+    pd.concat([df] * repeats, ignore_index=True).head(n_rows).to_csv(path, index=False)
+
+
+def worker_counts(max_workers):
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    return counts + [max_workers]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da predição em batch paralela.")
+    parser.add_argument('--input', required=True, help='CSV de partidas usado como base.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--max_workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_csv = os.path.join(tmp, 'input.csv')
+        build_input(args.input, args.rows, input_csv)
+
+        reference = os.path.join(tmp, 'reference.jsonl')
+        start = time.perf_counter()
+        predict_batch_streaming(input_csv, reference)
+        serial_seconds = time.perf_counter() - start
+        with open(reference, 'rb') as f:
+            expected = f.read()
+
+        runs = []
+        for n_workers in worker_counts(args.max_workers):
+            output = os.path.join(tmp, f'parallel_{n_workers}.jsonl')
+            stats = predict_batch_parallel(input_csv, output, n_workers)
+            with open(output, 'rb') as f:
+                identical = f.read() == expected
+            baseline_seconds = runs[0]["seconds"] if runs else stats["seconds"]
+            speedup = baseline_seconds / stats["seconds"]
+            runs.append({
+                "workers": n_workers,
+                "seconds": stats["seconds"],
+                "rows_per_second": stats["rows_per_second"],
+                "speedup": speedup,
+                "efficiency": speedup / n_workers,
+                "identical_to_serial": identical,
+                "per_worker_rows_per_second": [w["rows_per_second"] for w in stats["per_worker"]],
+            })
+
+    print(f"Serial (streaming): {serial_seconds:.2f}s, {args.rows / serial_seconds:.0f} linhas/s", file=sys.stderr)
+    for run in runs:
+        status = "✅" if run["identical_to_serial"] else "❌ saída diferente"
+        print(f"  {run['workers']:3d} workers: {run['seconds']:7.2f}s  {run['rows_per_second']:9.0f} linhas/s  "
+              f"speedup {run['speedup']:.2f}x  eficiência {run['efficiency']:.0%}  {status}", file=sys.stderr)
+
+    print(json.dumps({"rows": args.rows, "serial_seconds": serial_seconds, "parallel": runs}, indent=2))
+    if not all(run["identical_to_serial"] for run in runs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
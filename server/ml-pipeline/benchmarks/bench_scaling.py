@@ -0,0 +1,337 @@
+# server/benchmarks/bench_scaling.py
+
+"""
+Benchmark de escala das pipelines de treino/avaliação: como o tempo e a
+memória crescem com o número de linhas, a cardinalidade do championName e
+o número de folds. Estágios:
+
+    evaluation      lol_classifier_model: prepare_dataset + evaluate_model
+                    (o mesmo caminho do run_experiment_on_dataset), UM
+                    modelo por processo: fit (soma dos folds), score
+                    (predição + métricas) e acurácia do CV
+    production      lol_classifier_model.train_and_save_production_model
+                    (carga + codificação + fit do RF + gravação da versão)
+    classification  classifier_model.run_classification (4 modelos, 10x10
+                    folds). Ele lê as partidas do MongoDB: aqui o
+                    load_features devolve as features numéricas do dataset
+                    sintético, então mede o protocolo de avaliação, não a
+                    leitura do banco. Precisa do pymongo/dotenv instalados
+                    (sem eles, a célula sai com status 'error').
+
+Os datasets (1k a 1M linhas) saem da cópula gaussiana do
+generate_synthetic.py (benchmarks/synthetic_data.py). --champions N troca
+o championName por N campeões sintéticos sorteados (0 = os do CSV base).
+
+Cada célula (estágio x modelo x linhas x campeões x folds) roda num
+processo novo, num diretório temporário próprio e com o cache de folds
+desligado: o pico de RSS (ru_maxrss) é o da célula, e nada vaza de uma
+célula para a outra. Uma célula que passa de --max-cell-seconds é morta
+(status 'timeout'); a partir daí o mesmo estágio/modelo não roda nos
+tamanhos maiores (status 'skipped'): é onde o modelo deixa de ser viável.
+
+O relatório (JSON) é regravado a cada célula. Com --baseline, as células
+comparáveis de um relatório anterior que ficaram mais lentas ou maiores
+que a tolerância entram em "regressions" (e o script sai com código 1).
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_scaling.py [--rows 1000 10000 100000 1000000] [--champions 0 500]
+        [--folds 5 10] [--stages evaluation production] [--output results/bench_scaling.json]
+        [--baseline results/bench_scaling_anterior.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, PIPELINE_DIR)
+from synthetic_data import DEFAULT_SOURCE, copula_sample  # noqa: E402
+
+warnings.filterwarnings('ignore')
+
+STAGES = ('evaluation', 'production', 'classification')
+DEFAULT_ROWS = (1_000, 10_000, 100_000, 1_000_000)
+DEFAULT_OUTPUT = os.path.join('results', 'bench_scaling.json')
+
+
+def with_champions(df, n_champions, seed=42):
+    """championName trocado por `n_champions` campeões sintéticos sorteados (0: o próprio df)."""
+    if not n_champions:
+        return df
+    names = np.array([f"Champion{i:04d}" for i in range(n_champions)], dtype=object)
+    return df.assign(championName=names[np.random.default_rng(seed).integers(0, n_champions, len(df))])
+
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo (ru_maxrss: KB no Linux, bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == 'darwin' else peak * 1024)
+
+
+# ---------- Células (cada uma roda num processo novo) ----------
+
+def run_evaluation_cell(csv_path, model_name, folds):
+    from sklearn.model_selection import StratifiedKFold
+
+    from lol_classifier_model import DEFAULT_MODEL_SPECS, build_model, evaluate_model, prepare_dataset
+
+    spec = next(spec for spec in DEFAULT_MODEL_SPECS if spec['name'] == model_name)
+    start = time.perf_counter()
+    prepared = prepare_dataset(csv_path)
+    if isinstance(prepared, dict):
+        raise RuntimeError(prepared["error"])
+    X_scaled, y, _ = prepared
+    prepare_seconds = time.perf_counter() - start
+
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+    start = time.perf_counter()
+    entry = evaluate_model(model_name, build_model(spec), X_scaled, y, cv)
+    evaluate_seconds = time.perf_counter() - start
+    fit_seconds = sum(fit["fit_seconds"] for fit in entry["cv_fold_fits"])
+    return {
+        "prepare_seconds": prepare_seconds,
+        "fit_seconds": fit_seconds,
+        "score_seconds": evaluate_seconds - fit_seconds,
+        "accuracy": entry["accuracy"],
+        "n_features": int(X_scaled.shape[1]),
+    }
+
+
+def run_production_cell(csv_path):
+    from lol_classifier_model import train_and_save_production_model
+
+    if not train_and_save_production_model(csv_path):
+        raise RuntimeError("train_and_save_production_model falhou")
+    return {}
+
+
+def run_classification_cell(csv_path):
+    import classifier_model
+
+    df = pd.read_csv(csv_path)
+    features = df.drop(columns=['gameMode', 'championName', 'win'])
+    classifier_model.load_features = lambda: (features, df['win'])
+    output = json.loads(classifier_model.run_classification())
+    if "error" in output:
+        raise RuntimeError(output["error"])
+    return {
+        "cv_folds": output["cv_folds"],
+        "models": {
+            result["model_name"]: {
+                "fit_seconds": sum(fit["fit_seconds"] for fit in result["cv_fold_fits"]),
+                "accuracy": result["accuracy"],
+            }
+            for result in output["results"]
+        },
+    }
+
+
+def run_worker(cell):
+    """Executa UMA célula e imprime o resultado (JSON) no stdout."""
+    baseline_rss = peak_rss_bytes()
+    start = time.perf_counter()
+    if cell["stage"] == 'evaluation':
+        result = run_evaluation_cell(cell["csv_path"], cell["model"], cell["folds"])
+    elif cell["stage"] == 'production':
+        result = run_production_cell(cell["csv_path"])
+    else:
+        result = run_classification_cell(cell["csv_path"])
+    result["wall_seconds"] = time.perf_counter() - start
+    result["peak_rss_bytes"] = peak_rss_bytes()
+    result["startup_rss_bytes"] = baseline_rss
+    print(json.dumps(result))
+
+
+def run_cell(cell, max_seconds, env, verbose):
+    """Roda a célula num subprocesso (diretório próprio) e devolve o registro do relatório."""
+    record = {key: cell[key] for key in ('stage', 'model', 'rows', 'champions', 'folds')}
+    workdir = tempfile.mkdtemp(prefix='cell_', dir=env['BENCH_SCALING_WORKDIR'])
+    try:
+        completed = subprocess.run(
+            [sys.executable, '-W', 'ignore', os.path.abspath(__file__), '--worker', json.dumps(cell)],
+            cwd=workdir, env=env, timeout=max_seconds, capture_output=True, text=True)
+    except subprocess.TimeoutExpired:
+        return {**record, "status": "timeout", "wall_seconds": max_seconds}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if verbose:
+        sys.stderr.write(completed.stderr)
+    if completed.returncode != 0:
+        lines = completed.stderr.strip().splitlines()
+        return {**record, "status": "error", "error": lines[-1] if lines else f"código {completed.returncode}"}
+    return {**record, "status": "ok", **json.loads(completed.stdout.strip().splitlines()[-1])}
+
+
+def plan_cells(stages, models, folds_options):
+    """(estágio, modelo, folds) de cada célula de um tamanho de dataset."""
+    for stage in stages:
+        if stage == 'evaluation':
+            for folds in folds_options:
+                for model in models:
+                    yield stage, model, folds
+        elif stage == 'production':
+            yield stage, 'Random Forest', None
+        else:
+            yield stage, 'ALL', 100
+
+
+# ---------- Relatório ----------
+
+def cell_key(record):
+    return (record["stage"], record["model"], record["rows"], record["champions"], record["folds"])
+
+
+def find_regressions(cells, baseline_cells, tolerance):
+    """Células ok nos dois relatórios com wall_seconds ou peak_rss_bytes acima de (1 + tolerância) x o anterior."""
+    previous = {cell_key(cell): cell for cell in baseline_cells if cell["status"] == "ok"}
+    regressions = []
+    for cell in cells:
+        before = previous.get(cell_key(cell))
+        if cell["status"] != "ok" or before is None:
+            continue
+        for metric in ("wall_seconds", "peak_rss_bytes"):
+            if cell[metric] > before[metric] * (1 + tolerance):
+                regressions.append({"cell": dict(zip(("stage", "model", "rows", "champions", "folds"), cell_key(cell))),
+                                    "metric": metric, "baseline": before[metric], "current": cell[metric],
+                                    "ratio": cell[metric] / before[metric]})
+    return regressions
+
+
+def environment_info():
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def write_report(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def describe(record):
+    label = f"{record['stage']:<14} {record['model']:<15} {record['rows']:>9} linhas"
+    label += f" | {record['champions'] or 'base':>5} campeões" + (f" | k={record['folds']}" if record['folds'] else "")
+    if record["status"] != "ok":
+        return f"{label} -> {record['status']}" + (f" ({record['error']})" if record.get("error") else "")
+    times = f"{record['wall_seconds']:8.2f}s"
+    if "fit_seconds" in record:
+        times += f" (fit {record['fit_seconds']:.2f}s, score {record['score_seconds']:.2f}s)"
+    return f"{label} -> {times} | pico RSS {record['peak_rss_bytes'] / 1e6:8.1f} MB"
+
+
+def main():
+    from lol_classifier_model import DEFAULT_MODEL_SPECS
+
+    parser = argparse.ArgumentParser(description="Benchmark de escala das pipelines de treino/avaliação.")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--source', default=DEFAULT_SOURCE, help='CSV usado como base da cópula.')
+    parser.add_argument('--rows', type=int, nargs='+', default=list(DEFAULT_ROWS))
+    parser.add_argument('--champions', type=int, nargs='+', default=[0],
+                        help='Cardinalidades do championName (0 = a do CSV base).')
+    parser.add_argument('--folds', type=int, nargs='+', default=[10], help='Folds do estágio evaluation.')
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--models', nargs='+', default=None, choices=[spec['name'] for spec in DEFAULT_MODEL_SPECS],
+                        help='Modelos do estágio evaluation, pelo nome (padrão: todos).')
+    parser.add_argument('--max-cell-seconds', type=float, default=900.0)
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', help='Relatório anterior para detectar regressões.')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Aumento tolerado sobre o baseline (0.25 = 25%%).')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--verbose', action='store_true', help='Mostra o log das pipelines de cada célula.')
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(json.loads(args.worker))
+        return
+
+    from dataset_cache import load_dataset
+
+    models = args.models or [spec['name'] for spec in DEFAULT_MODEL_SPECS]
+    source = pd.read_csv(args.source)
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": environment_info(),
+        "config": {key: getattr(args, key) for key in ('source', 'rows', 'champions', 'folds', 'stages', 'seed',
+                                                        'max_cell_seconds')} | {"models": models},
+        "cells": [],
+    }
+
+    workdir = tempfile.mkdtemp(prefix='bench_scaling_')
+    env = {**os.environ, 'BENCH_SCALING_WORKDIR': workdir, 'CV_CACHE_DIR': 'off',
+           'DATASET_CACHE_DIR': os.path.join(workdir, 'dataset_cache'),
+           'PYTHONPATH': os.pathsep.join(filter(None, [PIPELINE_DIR, os.environ.get('PYTHONPATH')]))}
+    previous_cache_dir = os.environ.get('DATASET_CACHE_DIR')
+    os.environ['DATASET_CACHE_DIR'] = env['DATASET_CACHE_DIR']
+    not_viable = set()
+    try:
+        for n_rows in sorted(args.rows):
+            for n_champions in args.champions:
+                start = time.perf_counter()
+                csv_path = os.path.join(workdir, f'synthetic_{n_rows}_{n_champions}.csv')
+                with_champions(copula_sample(source, n_rows, args.seed), n_champions, args.seed).to_csv(csv_path, index=False)
+                # Monta o cache colunar antes: todas as células leem dele
+                load_dataset(csv_path)
+                print(f"\n📦 {n_rows} linhas / {n_champions or 'base'} campeões gerados "
+                      f"({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+
+                for stage, model, folds in plan_cells(args.stages, models, args.folds):
+                    cell = {"stage": stage, "model": model, "rows": n_rows, "champions": n_champions,
+                            "folds": folds, "csv_path": csv_path}
+                    viability_key = (stage, model, n_champions, folds)
+                    if viability_key in not_viable:
+                        record = {key: cell[key] for key in ('stage', 'model', 'rows', 'champions', 'folds')}
+                        record["status"] = "skipped"
+                    else:
+                        record = run_cell(cell, args.max_cell_seconds, env, args.verbose)
+                        if record["status"] != "ok":
+                            not_viable.add(viability_key)
+                    report["cells"].append(record)
+                    print(describe(record), file=sys.stderr)
+                    write_report(args.output, report)
+                os.remove(csv_path)
+    finally:
+        if previous_cache_dir is None:
+            os.environ.pop('DATASET_CACHE_DIR', None)
+        else:
+            os.environ['DATASET_CACHE_DIR'] = previous_cache_dir
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            report["regressions"] = find_regressions(report["cells"], json.load(f)["cells"], args.tolerance)
+        write_report(args.output, report)
+        for regression in report["regressions"]:
+            cell = regression["cell"]
+            print(f"⚠️ Regressão: {cell['stage']}/{cell['model']} {cell['rows']} linhas -> {regression['metric']} "
+                  f"{regression['ratio']:.2f}x o baseline", file=sys.stderr)
+    print(f"\n✅ Relatório salvo em: {args.output}", file=sys.stderr)
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# server/benchmarks/bench_startup.py
+
+"""
+Mede o custo de inicialização da predição única (python predict_model.py '<json>'),
+que é o que a rota /api/predict do Node executa a cada requisição.
+
+  1. Roda o CLI várias vezes e reporta o tempo de parede (mediana).
+  2. Roda uma vez com `python -X importtime` e agrega o tempo cumulativo
+     de import por módulo de topo (numpy, json, forest_engine...).
+  3. Compara o total de import com o orçamento (--budget_ms) e avisa se
+     algum módulo pesado (pandas, sklearn, joblib, argparse) foi carregado.
+     Sai com código 1 se o orçamento estourar.
+
+Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_startup.py [--runs 10] [--budget_ms 150]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ML_PIPELINE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_INPUT = {"championName": "Diana", "kills": 5, "deaths": 2, "assists": 7, "goldEarned": 12000}
+
+# Módulos que NÃO deveriam ser importados no caminho de predição única
+HEAVY_MODULES = ['pandas', 'sklearn', 'joblib', 'argparse', 'scipy']
+
+
+def run_cli(extra_python_args=()):
+    cmd = [sys.executable, *extra_python_args, 'predict_model.py', json.dumps(SAMPLE_INPUT)]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ML_PIPELINE_DIR, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"predict_model.py falhou ({proc.returncode}):\n{proc.stderr}")
+    return elapsed, proc.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Agrega as linhas 'import time: self | cumulative | nome' do -X importtime.
+    Devolve {módulo de topo: microssegundos cumulativos} e o conjunto de
+    todos os módulos importados.
+    """
+    top_level = {}
+    imported = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        imported.add(module)
+        # Nível de aninhamento = indentação do nome (2 espaços por nível)
+        if len(name) - len(name.lstrip()) == 1:
+            top_level[module] = top_level.get(module, 0) + int(cumulative)
+    return top_level, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de inicialização do predict_model.py (modo single).")
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--budget_ms', type=float, default=150.0, help='Orçamento para o total de imports (ms).')
+    args = parser.parse_args()
+
+    # Primeira chamada: garante que a versão compilada do modelo já existe
+    run_cli()
+
+    wall_times = [run_cli()[0] for _ in range(args.runs)]
+    _, importtime_stderr = run_cli(['-X', 'importtime'])
+    top_level, imported = parse_importtime(importtime_stderr)
+
+    total_import_ms = sum(top_level.values()) / 1000
+    heavy_loaded = sorted(m for m in HEAVY_MODULES if m in imported)
+
+    print(f"Tempo de parede (mediana de {args.runs}): {statistics.median(wall_times) * 1000:.1f} ms", file=sys.stderr)
+    print(f"Total de imports: {total_import_ms:.1f} ms (orçamento: {args.budget_ms:.0f} ms)", file=sys.stderr)
+    for module, us in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:10]:
+        print(f"  {us / 1000:8.1f} ms  {module}", file=sys.stderr)
+    if heavy_loaded:
+        print(f"⚠️ Módulos pesados importados no modo single: {', '.join(heavy_loaded)}", file=sys.stderr)
+
+    within_budget = total_import_ms <= args.budget_ms
+    print(json.dumps({
+        "wall_time_ms_median": statistics.median(wall_times) * 1000,
+        "wall_time_ms_all": [t * 1000 for t in wall_times],
+        "import_time_ms_total": total_import_ms,
+        "import_time_ms_by_module": {m: us / 1000 for m, us in top_level.items()},
+        "import_budget_ms": args.budget_ms,
+        "within_budget": within_budget,
+        "heavy_modules_imported": heavy_loaded,
+    }, indent=2))
+
+    if not within_budget:
+        print("❌ Orçamento de import estourado.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+# server/benchmarks/bench_valorant_reads.py
+
+"""
+Compara a leitura antiga das partidas de Valorant (list(find({})) com os
+documentos inteiros + DataFrame dos playerStats) com a do
+valorant_matches.py (projeção + cursor em lotes + colunas NumPy):
+tempo, pico de alocações (tracemalloc) e se as features/alvo são iguais.
+
+Popula uma coleção de teste com partidas sintéticas completas (mapa, data,
+ids, agente, estatísticas extras), como as do banco real, e a apaga no fim
+(--keep mantém; numa segunda execução com --keep, a coleção é reaproveitada
+se já tiver o número pedido de partidas). Precisa de um mongod local
+(--uri, padrão MONGODB_URI ou mongodb://localhost:27017) ou do mongomock
+(--mongomock, tudo em memória). O mongomock confere as features e mostra a
+diferença de memória, mas os tempos dele são dominados pelo próprio
+mongomock (cópia e projeção em Python, ~1 min por 100k partidas nas duas
+leituras): para o tempo, use um mongod. Rode a partir de server/ml-pipeline:
+    python benchmarks/bench_valorant_reads.py [--matches 1000000] [--batch_size 10000]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from valorant_matches import DEFAULT_BATCH_SIZE, FEATURE_COLUMNS, read_match_features  # noqa: E402
+
+BENCH_DATABASE = 'bench-valorant-reads'
+INSERT_CHUNK = 10_000
+MAPS = ['Ascent', 'Bind', 'Haven', 'Split', 'Icebox', 'Breeze', 'Fracture', 'Pearl', 'Lotus', 'Sunset']
+AGENTS = ['Jett', 'Reyna', 'Sage', 'Sova', 'Omen', 'Killjoy', 'Raze', 'Phoenix', 'Skye', 'Viper']
+
+
+def open_collection(args):
+    if args.mongomock:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit("❌ --mongomock precisa do pacote mongomock (pip install mongomock).")
+        client = mongomock.MongoClient()
+    else:
+        try:
+            from pymongo import MongoClient
+        except ImportError:
+            sys.exit("❌ Precisa do pymongo (pip install pymongo) e de um mongod em --uri.")
+        client = MongoClient(args.uri, serverSelectionTimeoutMS=5000)
+    return client, client[BENCH_DATABASE]['matches']
+
+
+def synthetic_matches(start, count, rng):
+    """Partidas com o formato das do banco real: as 6 estatísticas usadas + o resto do documento."""
+    kills = rng.poisson(15, count)
+    deaths = rng.poisson(14, count)
+    assists = rng.poisson(5, count)
+    score = kills * 200 + assists * 50 + rng.integers(0, 2000, count)
+    headshots = rng.uniform(5, 45, count).round(1)
+    first_kills = rng.poisson(2, count)
+    wins = rng.random(count) < 1 / (1 + np.exp(-(kills - deaths) / 4))
+    base_date = datetime.datetime(2024, 1, 1)
+    matches = []
+    for i in range(count):
+        matches.append({
+            'matchId': f'match-{start + i:08d}',
+            'userId': f'user-{(start + i) % 5000:05d}',
+            'map': MAPS[i % len(MAPS)],
+            'mode': 'competitive',
+            'date': base_date + datetime.timedelta(minutes=start + i),
+            'agent': AGENTS[(start + i) % len(AGENTS)],
+            'result': 'Vitória' if wins[i] else 'Derrota',
+            'roundsWon': int(13 if wins[i] else rng.integers(0, 12)),
+            'roundsLost': int(rng.integers(0, 12) if wins[i] else 13),
+            'playerStats': {
+                'score': int(score[i]),
+                'kills': int(kills[i]),
+                'deaths': int(deaths[i]),
+                'assists': int(assists[i]),
+                'headshotPercentage': float(headshots[i]),
+                'firstKills': int(first_kills[i]),
+                'damagePerRound': float(kills[i] * 9.5),
+                'econRating': int(score[i] // 30),
+                'plants': int(i % 3),
+                'defuses': int(i % 2),
+            },
+        })
+    return matches
+
+
+def populate(collection, n_matches, keep):
+    if keep and collection.estimated_document_count() == n_matches:
+        print(f"♻️ Reaproveitando {n_matches} partidas já inseridas.", file=sys.stderr)
+        return 0.0
+    collection.drop()
+    rng = np.random.default_rng(42)
+    start = time.perf_counter()
+    for offset in range(0, n_matches, INSERT_CHUNK):
+        collection.insert_many(synthetic_matches(offset, min(INSERT_CHUNK, n_matches - offset), rng), ordered=False)
+    seconds = time.perf_counter() - start
+    print(f"📥 {n_matches} partidas inseridas em {seconds:.1f}s", file=sys.stderr)
+    return seconds
+
+
+def legacy_read(collection):
+    """O classifier_model.load_features() antes do valorant_matches.py."""
+    matches_data = list(collection.find({}))
+    player_stats_list = []
+    for match in matches_data:
+        stats = match['playerStats']
+        kills = stats.get('kills', 0)
+        deaths = stats.get('deaths', 1)
+        assists = stats.get('assists', 0)
+        effective_deaths = deaths if deaths > 0 else 1
+        stats['kda_ratio'] = (kills + assists) / effective_deaths
+        player_stats_list.append(stats)
+
+    df = pd.DataFrame(player_stats_list)
+    df['result'] = [m['result'] for m in matches_data]
+
+    features = df[FEATURE_COLUMNS].fillna(0)
+    target = df['result'].apply(lambda x: 1 if x == 'Vitória' else 0)
+    return features, target
+
+
+def measure(read):
+    """(segundos, pico de alocações em bytes, resultado): uma leitura cronometrada e outra sob o tracemalloc."""
+    start = time.perf_counter()
+    result = read()
+    seconds = time.perf_counter() - start
+    del result
+    tracemalloc.start()
+    result = read()
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak_bytes, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark da leitura das partidas de Valorant no MongoDB.")
+    parser.add_argument('--uri', default=os.getenv('MONGODB_URI') or 'mongodb://localhost:27017')
+    parser.add_argument('--mongomock', action='store_true', help='Usa o mongomock (em memória) em vez de um mongod.')
+    parser.add_argument('--matches', type=int, default=1_000_000)
+    parser.add_argument('--batch_size', type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument('--keep', action='store_true', help='Não apaga a coleção de teste (e a reaproveita).')
+    args = parser.parse_args()
+
+    client, collection = open_collection(args)
+    try:
+        insert_seconds = populate(collection, args.matches, args.keep)
+        streamed_seconds, streamed_peak, (features, target) = measure(
+            lambda: read_match_features(collection, args.batch_size, min_matches=0))
+        legacy_seconds, legacy_peak, (legacy_features, legacy_target) = measure(lambda: legacy_read(collection))
+    finally:
+        if not args.keep:
+            collection.drop()
+        client.close()
+
+    identical = (list(features.columns) == list(legacy_features.columns)
+                 and np.array_equal(features.to_numpy(), legacy_features.to_numpy(dtype=np.float64))
+                 and np.array_equal(target.to_numpy(), legacy_target.to_numpy()))
+    mib = 1024 * 1024
+    print(f"list(find)  {legacy_seconds:8.2f} s | pico {legacy_peak / mib:8.1f} MiB", file=sys.stderr)
+    print(f"projeção    {streamed_seconds:8.2f} s | pico {streamed_peak / mib:8.1f} MiB "
+          f"({legacy_seconds / streamed_seconds:.1f}x mais rápido, {legacy_peak / streamed_peak:.1f}x menos memória)  "
+          f"{'✅' if identical else '❌ features diferentes'}", file=sys.stderr)
+    print(json.dumps({
+        "backend": "mongomock" if args.mongomock else "mongod",
+        "matches": args.matches,
+        "batch_size": args.batch_size,
+        "insert_seconds": insert_seconds,
+        "legacy": {"seconds": legacy_seconds, "peak_bytes": legacy_peak},
+        "streamed": {"seconds": streamed_seconds, "peak_bytes": streamed_peak},
+        "identical": bool(identical),
+    }, indent=2))
+    if not identical:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+# server/benchmarks/synthetic_data.py
+
+"""
+Datasets sintéticos grandes para os benchmarks, pela mesma cópula
+gaussiana do generate_synthetic.py: postos -> normal -> amostra com a
+covariância observada -> quantis inversos de cada coluna numérica. As
+colunas categóricas (gameMode, championName) e o win vêm do vizinho mais
+próximo (no espaço normal) entre as linhas originais.
+
+Uso (a partir de server/ml-pipeline):
+    python benchmarks/synthetic_data.py --rows 100000 --output /tmp/synthetic.csv
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from sklearn.neighbors import NearestNeighbors
+
+CATEGORICAL_COLUMNS = ('gameMode', 'championName', 'win')
+DEFAULT_SOURCE = 'data/input/dataset.csv'
+
+
+def copula_sample(source, n_rows, seed=42, block_rows=100_000):
+    """DataFrame com `n_rows` linhas sintéticas no formato de `source` (gerado em blocos)."""
+    rng = np.random.default_rng(seed)
+    numeric_cols = [c for c in source.select_dtypes(include=[np.number]).columns if c not in CATEGORICAL_COLUMNS]
+    categorical_cols = [c for c in source.columns if c not in numeric_cols]
+    X = source[numeric_cols].astype(float)
+
+    ranks = X.rank(method='average', pct=True).to_numpy()
+    z = stats.norm.ppf(np.clip(ranks, 1e-6, 1 - 1e-6))
+    cov = np.cov(z, rowvar=False)
+    sorted_values = np.sort(X.to_numpy(), axis=0)
+    grid = np.linspace(0, 1, len(X))
+    neighbors = NearestNeighbors(n_neighbors=1).fit(z)
+
+    blocks = []
+    for start in range(0, n_rows, block_rows):
+        size = min(block_rows, n_rows - start)
+        z_samp = rng.multivariate_normal(np.zeros(len(numeric_cols)), cov, size=size, method='eigh')
+        u = stats.norm.cdf(z_samp)
+        numeric = pd.DataFrame({col: np.interp(u[:, i], grid, sorted_values[:, i]) for i, col in enumerate(numeric_cols)})
+        _, idx = neighbors.kneighbors(z_samp)
+        categorical = source[categorical_cols].iloc[idx[:, 0]].reset_index(drop=True)
+        blocks.append(pd.concat([categorical, numeric], axis=1)[list(source.columns)])
+    return pd.concat(blocks, ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético grande (cópula gaussiana).")
+    parser.add_argument('--source', default=DEFAULT_SOURCE)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', required=True)
+    args = parser.parse_args()
+
+    df = copula_sample(pd.read_csv(args.source), args.rows, args.seed)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    df.to_csv(args.output, index=False)
+    print(f"✅ {len(df)} linhas sintéticas salvas em: {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# server/budgeted_mlp.py
+
+"""
+MLPClassifier com orçamento de treino: iterações (max_iter, como no
+sklearn) e TEMPO (max_fit_seconds) por fit, com early stopping pela
+validação (early_stopping=True: validation_fraction do treino de cada
+fold fica de fora e os pesos da melhor época são restaurados no fim).
+
+Com max_fit_seconds, o treino é um laço de épocas feito aqui, só com a
+API pública do sklearn: uma época = um partial_fit de um MLPClassifier
+interno (solvers 'adam' e 'sgd'), e o early stopping é o mesmo critério
+do sklearn (acurácia na validação sem melhorar mais que tol por
+n_iter_no_change épocas; sem early_stopping, a perda de treino). O
+orçamento é conferido ao fim de cada época: estourado, o treino para como
+num early stopping. Cada fit passa do orçamento no máximo por uma época,
+então uma avaliação com k folds tem o fit do MLP limitado a
+k x (max_fit_seconds + uma época). O RandomState é criado uma vez por fit,
+então cada época embaralha as linhas de um jeito, como no fit do sklearn
+(mas a sequência de sorteios é outra: o resultado não é idêntico ao do
+MLPClassifier com os mesmos parâmetros).
+
+Com max_fit_seconds=None, ou com o solver 'lbfgs' (que não treina por
+épocas), o fit é o do MLPClassifier, sem mudança nenhuma.
+
+Depois do fit, além de n_iter_ (épocas usadas):
+    stop_reason_  'early_stopping', 'time_budget', 'max_iter' ou
+                  'converged' (perda de treino parou de cair, sem early stopping)
+"""
+
+import time
+import warnings
+
+import numpy as np
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.model_selection import train_test_split
+from sklearn.neural_network import MLPClassifier
+from sklearn.utils import check_random_state
+
+
+class BudgetedMLPClassifier(MLPClassifier):
+    """MLPClassifier + max_fit_seconds (orçamento de tempo por fit) + stop_reason_."""
+
+    # Os parâmetros do MLPClassifier, um a um (get_params/clone leem a
+    # assinatura): se o sklearn mudar algum, o erro aparece aqui, não num
+    # parâmetro trocado em silêncio
+    def __init__(self, hidden_layer_sizes=(100,), activation='relu', *, solver='adam', alpha=0.0001,
+                 batch_size='auto', learning_rate='constant', learning_rate_init=0.001, power_t=0.5, max_iter=200,
+                 shuffle=True, random_state=None, tol=1e-4, verbose=False, warm_start=False, momentum=0.9,
+                 nesterovs_momentum=True, early_stopping=False, validation_fraction=0.1, beta_1=0.9, beta_2=0.999,
+                 epsilon=1e-8, n_iter_no_change=10, max_fun=15000, max_fit_seconds=None):
+        super().__init__(
+            hidden_layer_sizes=hidden_layer_sizes, activation=activation, solver=solver, alpha=alpha,
+            batch_size=batch_size, learning_rate=learning_rate, learning_rate_init=learning_rate_init,
+            power_t=power_t, max_iter=max_iter, shuffle=shuffle, random_state=random_state, tol=tol,
+            verbose=verbose, warm_start=warm_start, momentum=momentum, nesterovs_momentum=nesterovs_momentum,
+            early_stopping=early_stopping, validation_fraction=validation_fraction, beta_1=beta_1, beta_2=beta_2,
+            epsilon=epsilon, n_iter_no_change=n_iter_no_change, max_fun=max_fun,
+        )
+        self.max_fit_seconds = max_fit_seconds
+
+    def fit(self, X, y, sample_weight=None):
+        if self.max_fit_seconds is None or self.solver == 'lbfgs':
+            super().fit(X, y, sample_weight=sample_weight)
+            if self.solver != 'lbfgs' and self.n_iter_ >= self.max_iter:
+                self.stop_reason_ = 'max_iter'
+            elif self.early_stopping and self.solver != 'lbfgs':
+                self.stop_reason_ = 'early_stopping'
+            else:
+                self.stop_reason_ = 'converged'
+            return self
+        return self._fit_epochs(X, y, sample_weight)
+
+    def _fit_epochs(self, X, y, sample_weight):
+        """Laço de épocas (partial_fit) com early stopping pela validação e orçamento de tempo."""
+        deadline = time.perf_counter() + self.max_fit_seconds
+        # Um RandomState por fit: o partial_fit o reaproveita (e avança) a cada época
+        random_state = check_random_state(self.random_state)
+        params = self.get_params()
+        params.pop('max_fit_seconds')
+        mlp = MLPClassifier(**{**params, 'early_stopping': False, 'warm_start': False, 'random_state': random_state})
+
+        classes = np.unique(y)
+        X_val = y_val = sample_weight_val = None
+        X_train, y_train, sample_weight_train = X, y, sample_weight
+        if self.early_stopping:
+            arrays = (X, y) if sample_weight is None else (X, y, sample_weight)
+            split = train_test_split(*arrays, random_state=random_state, test_size=self.validation_fraction, stratify=y)
+            X_train, X_val, y_train, y_val = split[:4]
+            if sample_weight is not None:
+                sample_weight_train, sample_weight_val = split[4:]
+            if X_val.shape[0] < 2:
+                raise ValueError("O conjunto de validação é pequeno demais: aumente validation_fraction ou o dataset.")
+
+        best_score, best_loss, best_params = -np.inf, np.inf, None
+        validation_scores = []
+        no_improvement = 0
+        stop_reason = 'max_iter'
+        n_epochs = 0
+        while n_epochs < self.max_iter:
+            mlp.partial_fit(X_train, y_train, sample_weight=sample_weight_train, classes=classes)
+            n_epochs += 1
+            if self.early_stopping:
+                score = mlp.score(X_val, y_val, sample_weight=sample_weight_val)
+                validation_scores.append(score)
+                no_improvement = no_improvement + 1 if score < best_score + self.tol else 0
+                if score > best_score:
+                    best_score = score
+                    best_params = ([c.copy() for c in mlp.coefs_], [i.copy() for i in mlp.intercepts_])
+            else:
+                no_improvement = no_improvement + 1 if mlp.loss_ > best_loss - self.tol else 0
+                best_loss = min(best_loss, mlp.loss_)
+            if no_improvement > self.n_iter_no_change:
+                stop_reason = 'early_stopping' if self.early_stopping else 'converged'
+                break
+            if time.perf_counter() >= deadline:
+                stop_reason = 'time_budget'
+                break
+
+        if stop_reason == 'max_iter':
+            warnings.warn(f"Máximo de épocas ({self.max_iter}) atingido sem convergir.", ConvergenceWarning)
+        if best_params is not None:
+            # Como o early stopping do sklearn: os pesos da melhor época na validação
+            mlp.coefs_, mlp.intercepts_ = best_params
+
+        # O estado treinado do MLP interno passa para este estimador (os parâmetros continuam os deste)
+        self.__dict__.update({name: value for name, value in vars(mlp).items() if name not in params})
+        self.n_iter_ = n_epochs
+        self.validation_scores_ = validation_scores if self.early_stopping else None
+        self.best_validation_score_ = best_score if self.early_stopping else None
+        self.best_loss_ = None if self.early_stopping else best_loss
+        self.stop_reason_ = stop_reason
+        return self
+
+
+def fit_info(model):
+    """Épocas usadas e motivo da parada do modelo treinado (ou do último passo de um Pipeline)."""
+    model = getattr(model, '_final_estimator', model)
+    info = {}
+    if hasattr(model, 'n_iter_'):
+        info["n_iter"] = int(model.n_iter_)
+    if hasattr(model, 'stop_reason_'):
+        info["stop_reason"] = model.stop_reason_
+    return info
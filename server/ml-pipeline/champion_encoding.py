@@ -0,0 +1,212 @@
+# server/champion_encoding.py
+
+"""
+Codificação da coluna championName no treino/avaliação (LoL).
+
+    onehot (padrão)  pd.get_dummies(drop_first=True) + StandardScaler em
+                     tudo: uma coluna densa por campeão (160+), quase toda
+                     zero, e a lista de colunas muda a cada campeão novo.
+    hashed           largura fixa: o campeão liga a coluna
+                     championName#(crc32(nome) % N). As features numéricas
+                     passam pelo StandardScaler (denso, poucas colunas); o
+                     bloco de campeões fica ESPARSO (scipy.sparse CSR, 0/1)
+                     e não é centralizado (centralizar destruiria a
+                     esparsidade). A matriz final é CSR, aceita direto pelo
+                     RandomForest e pelo MLP; o GaussianNB não aceita
+                     esparso e recebe a versão densa (densify_for).
+
+No hashed, o scaler salvo continua um StandardScaler com TODAS as colunas:
+as colunas championName#i têm média 0 e escala 1 (identidade), então o
+predict_model (PreprocessPlan, bundle, preprocess_data) gera a mesma
+matriz do treino, só que densa. Campeões novos caem num dos N baldes e
+não mudam lol_model_columns.json. Colisões (dois campeões no mesmo balde)
+são o custo: com N bem maior que o número de campeões elas são raras.
+O ganho é de memória (a matriz de treino fica ~16x menor com 170
+campeões) e de largura fixa; o fit do RandomForest/MLP do sklearn com
+entrada esparsa é MAIS LENTO que com a densa (benchmarks/
+bench_champion_encoding.py), por isso o one-hot continua o padrão.
+
+Escolha: CHAMPION_ENCODING=hashed (e CHAMPION_HASH_BUCKETS=N, padrão 256)
+ou o parâmetro `encoding` das funções de treino.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.preprocessing import StandardScaler
+
+from preprocess_plan import CATEGORICAL_COLUMN, category_buckets, dropped_category, hashed_column_names
+
+ENCODINGS = ('onehot', 'hashed')
+DEFAULT_ENCODING = 'onehot'
+DEFAULT_HASH_BUCKETS = 256
+ENCODING_ENV_VAR = 'CHAMPION_ENCODING'
+HASH_BUCKETS_ENV_VAR = 'CHAMPION_HASH_BUCKETS'
+
+
+def resolve_encoding(encoding=None, n_buckets=None):
+    """(codificação, número de baldes) a partir dos parâmetros ou das variáveis de ambiente."""
+    encoding = encoding or os.environ.get(ENCODING_ENV_VAR) or DEFAULT_ENCODING
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Codificação desconhecida: '{encoding}' (opções: {', '.join(ENCODINGS)}).")
+    if encoding != 'hashed':
+        return encoding, None
+    n_buckets = int(n_buckets or os.environ.get(HASH_BUCKETS_ENV_VAR) or DEFAULT_HASH_BUCKETS)
+    if n_buckets < 1:
+        raise ValueError(f"Número de baldes inválido: {n_buckets}.")
+    return encoding, n_buckets
+
+
+def hashed_indicators(values, n_buckets, dtype=np.float64):
+    """Matriz CSR (n x n_buckets) com um 1 na coluna hashed de cada campeão."""
+    buckets = category_buckets(values, n_buckets)
+    rows = np.flatnonzero(buckets >= 0)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=dtype), (rows, buckets[rows])), shape=(len(buckets), n_buckets))
+
+
+def pin_identity_columns(scaler, columns):
+    """Média 0 / variância 1 / escala 1 nas colunas dadas (elas passam pelo scaler sem mudar)."""
+    scaler.mean_[columns] = 0.0
+    scaler.var_[columns] = 1.0
+    scaler.scale_[columns] = 1.0
+
+
+def _extend_scaler(scaler, numeric_columns, hashed_columns):
+    """StandardScaler do bloco numérico -> StandardScaler de todas as colunas (hashed = identidade)."""
+    n_hashed = len(hashed_columns)
+    scaler.mean_ = np.concatenate([scaler.mean_, np.zeros(n_hashed)])
+    scaler.var_ = np.concatenate([scaler.var_, np.ones(n_hashed)])
+    scaler.scale_ = np.concatenate([scaler.scale_, np.ones(n_hashed)])
+    if np.ndim(scaler.n_samples_seen_):
+        scaler.n_samples_seen_ = np.concatenate([scaler.n_samples_seen_, np.full(n_hashed, scaler.n_samples_seen_.max())])
+    scaler.n_features_in_ = len(numeric_columns) + n_hashed
+    scaler.feature_names_in_ = np.asarray(list(numeric_columns) + hashed_columns, dtype=object)
+    return scaler
+
+
+def encode_training_frame(final_df, encoding=DEFAULT_ENCODING, n_buckets=DEFAULT_HASH_BUCKETS, target='win',
+                          dtype=np.float64):
+    """
+    Codifica o DataFrame de treino (já sem gameMode). Devolve
+    (X_scaled, y, colunas do modelo, scaler ajustado, campeão de referência):
+      - onehot: X_scaled denso, exatamente como antes; referência = o
+        campeão descartado pelo drop_first;
+      - hashed: X_scaled CSR; referência = None (nada é descartado).
+    `dtype` (np.float32, ver feature_precision.py) é o tipo de X_scaled.
+    """
+    dtype = np.dtype(dtype)
+    if encoding == 'onehot':
+        df_encoded = pd.get_dummies(final_df, columns=[CATEGORICAL_COLUMN], drop_first=True)
+        X = df_encoded.drop(target, axis=1)
+        y = df_encoded[target]
+        if dtype != np.float64:
+            X = X.astype(dtype)
+        scaler = StandardScaler()
+        X_scaled = scaler.fit_transform(X)
+        return X_scaled, y, X.columns.tolist(), scaler, dropped_category(final_df[CATEGORICAL_COLUMN].tolist())
+
+    numeric = final_df.drop(columns=[CATEGORICAL_COLUMN, target])
+    if dtype != np.float64:
+        numeric = numeric.astype(dtype)
+    y = final_df[target]
+    scaler = StandardScaler()
+    numeric_scaled = scaler.fit_transform(numeric)
+    hashed_columns = hashed_column_names(n_buckets)
+    X_scaled = sparse.hstack([sparse.csr_matrix(numeric_scaled),
+                              hashed_indicators(final_df[CATEGORICAL_COLUMN].to_numpy(), n_buckets, dtype)],
+                             format='csr')
+    model_columns = numeric.columns.tolist() + hashed_columns
+    return X_scaled, y, model_columns, _extend_scaler(scaler, numeric.columns, hashed_columns), None
+
+
+def encode_shared_frame(final_df, encoding=DEFAULT_ENCODING, n_buckets=DEFAULT_HASH_BUCKETS, target='win',
+                        dtype=np.float64):
+    """
+    Codificação ÚNICA do DataFrame inteiro (já sem gameMode) para vários
+    subconjuntos de linhas (ex: um por modo de jogo, ver subset_encoding):
+    features numéricas numa matriz (não escalada), o campeão de cada linha
+    como código na ordem do get_dummies (onehot) ou o bloco CSR de baldes
+    (hashed), e o alvo. Só arrays NumPy/CSR: os workers do joblib recebem
+    a matriz por memmap, sem cópia por processo.
+    """
+    dtype = np.dtype(dtype)
+    numeric = final_df.drop(columns=[CATEGORICAL_COLUMN, target])
+    shared = {
+        "encoding": encoding,
+        "n_buckets": n_buckets,
+        "numeric": numeric.to_numpy(dtype=dtype),
+        "numeric_columns": numeric.columns.tolist(),
+        "y": final_df[target].to_numpy(),
+    }
+    if encoding == 'onehot':
+        # Mesma ordem das colunas do get_dummies (categorias ordenadas)
+        codes, categories = pd.factorize(final_df[CATEGORICAL_COLUMN], sort=True)
+        shared.update(codes=codes, categories=np.asarray(categories, dtype=object))
+    else:
+        shared["hashed"] = hashed_indicators(final_df[CATEGORICAL_COLUMN].to_numpy(), n_buckets, dtype)
+    return shared
+
+
+def subset_encoding(shared, rows):
+    """
+    encode_training_frame() das linhas `rows` a partir do encode_shared_frame:
+    (X_scaled, y, colunas do modelo, scaler ajustado, campeão de referência),
+    com os mesmos valores de encode_training_frame(final_df.iloc[rows]) — o
+    one-hot só tem os campeões presentes nessas linhas (menos o primeiro,
+    como o drop_first) e o scaler é ajustado só nelas.
+    """
+    rows = np.asarray(rows)
+    numeric_columns = shared["numeric_columns"]
+    numeric = shared["numeric"][rows]
+    y = shared["y"][rows]
+    scaler = StandardScaler()
+
+    if shared["encoding"] == 'onehot':
+        codes = shared["codes"][rows]
+        present = np.unique(codes[codes >= 0])
+        kept = present[1:]
+        # Código do campeão -> coluna do bloco de dummies (-1: descartado/ausente)
+        positions = np.full(len(shared["categories"]), -1)
+        positions[kept] = np.arange(len(kept))
+        dummy_rows = np.flatnonzero(codes >= 0)
+        dummy_rows = dummy_rows[positions[codes[dummy_rows]] >= 0]
+        # Ordem Fortran, como a matriz que o scaler recebe de um DataFrame (mesmas somas, mesma média/escala)
+        X = np.zeros((len(rows), len(numeric_columns) + len(kept)), dtype=numeric.dtype, order='F')
+        X[:, :len(numeric_columns)] = numeric
+        X[dummy_rows, len(numeric_columns) + positions[codes[dummy_rows]]] = 1
+        model_columns = numeric_columns + [f"{CATEGORICAL_COLUMN}_{category}" for category in shared["categories"][kept]]
+        X_scaled = scaler.fit_transform(X)
+        scaler.feature_names_in_ = np.asarray(model_columns, dtype=object)
+        reference = shared["categories"][present[0]] if len(present) else None
+        return X_scaled, y, model_columns, scaler, reference
+
+    # Ordem Fortran, como a matriz que o scaler recebe de um DataFrame (mesmas somas, mesma média/escala)
+    numeric_scaled = scaler.fit_transform(np.asfortranarray(numeric))
+    scaler.feature_names_in_ = np.asarray(numeric_columns, dtype=object)
+    hashed_columns = hashed_column_names(shared["n_buckets"])
+    X_scaled = sparse.hstack([sparse.csr_matrix(numeric_scaled), shared["hashed"][rows]], format='csr')
+    return (X_scaled, y, numeric_columns + hashed_columns,
+            _extend_scaler(scaler, numeric_columns, hashed_columns), None)
+
+
+def encode_hashed_rows(df, model_columns, n_buckets, target='win'):
+    """Linhas novas (incremental_update) no espaço hashed, como DataFrame denso nas colunas do modelo."""
+    numeric = df.drop(columns=[CATEGORICAL_COLUMN], errors='ignore')
+    y = numeric.pop(target)
+    known = set(model_columns)
+    unknown_columns = sorted(c for c in numeric.columns if c not in known)
+    indicators = pd.DataFrame(hashed_indicators(df[CATEGORICAL_COLUMN].to_numpy(), n_buckets).toarray(),
+                              columns=hashed_column_names(n_buckets), index=df.index)
+    X = pd.concat([numeric, indicators], axis=1).reindex(columns=list(model_columns), fill_value=0)
+    return X, y, unknown_columns
+
+
+def densify_for(model, X):
+    """X denso para modelos que não aceitam scipy.sparse (ex: GaussianNB)."""
+    if not sparse.issparse(X):
+        return X
+    # Tags do sklearn >= 1.6; sem elas, densifica por segurança
+    tags = getattr(model, '__sklearn_tags__', None)
+    return X if tags is not None and tags().input_tags.sparse else X.toarray()
@@ -1,67 +1,104 @@
 # server/classifier_model.py
 
 import os
+import sys
 import json
-import pandas as pd
-from pymongo import MongoClient
+import math
+import argparse
 from dotenv import load_dotenv
 from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import RepeatedStratifiedKFold, cross_val_score
+from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_score
+from sklearn.model_selection import RepeatedStratifiedKFold, StratifiedKFold
 from sklearn.pipeline import make_pipeline
-from sklearn.neural_network import MLPClassifier
 from sklearn.naive_bayes import GaussianNB
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.ensemble import RandomForestClassifier
 
+from budgeted_mlp import BudgetedMLPClassifier
+from cv_engine import describe_fold_fits, run_adaptive_cv, run_cv
+from fold_cache import FoldCache
+from hyperparam_search import DEFAULT_BUDGET_SECONDS, load_tuned_params, save_tuned_params, tune_models
+from valorant_matches import matches_collection, read_match_features
+
 # Carrega variáveis de ambiente (.env)
 load_dotenv()
 
-def run_classification():
-    """Executa classificação e retorna resultados em formato JSON."""
-    uri = os.getenv("MONGODB_URI")
-    client = MongoClient(uri)
-    db = client["valorant-stats"]
-    matches_collection = db["matches"]
-    matches_data = list(matches_collection.find({}))
-
-    if len(matches_data) < 50:
+# Métricas por fold, calculadas sobre as predições de UM fit por fold
+# (antes: 4 cross_val_score, um por métrica, cada um treinando os 100 folds)
+FOLD_METRICS = {
+    "accuracy": accuracy_score,
+    "precision": lambda y_true, y_pred: precision_score(y_true, y_pred, zero_division=0),
+    "recall": lambda y_true, y_pred: recall_score(y_true, y_pred, zero_division=0),
+    "f1": lambda y_true, y_pred: f1_score(y_true, y_pred, zero_division=0),
+}
+
+RANDOM_STATE = 42
+
+# Orçamento de cada fit do MLP (por fold): até 500 épocas, early stopping pela
+# validação (paciência de MLP_PATIENCE_EPOCHS épocas) e no máximo esse tempo.
+# Com os 100 folds, o MLP fica limitado a ~100 x MLP_FIT_BUDGET_SECONDS de
+# treino (budgeted_mlp.py)
+MLP_FIT_BUDGET_SECONDS = 10.0
+MLP_PATIENCE_EPOCHS = 50
+
+# Validação: 10 folds x 10 repetições. No modo adaptativo (--adaptive), as
+# repetições param quando o intervalo de 95% da acurácia média fica mais
+# estreito que ADAPTIVE_CI_WIDTH (mínimo de ADAPTIVE_MIN_REPEATS, máximo de N_REPEATS)
+N_SPLITS = 10
+N_REPEATS = 10
+ADAPTIVE_MIN_REPEATS = 3
+ADAPTIVE_CI_WIDTH = 0.02
+
+# Parâmetros escolhidos por `python classifier_model.py --tune` (aplicados em run_classification)
+TUNED_PARAMS_PATH = os.path.join('results', 'classifier_tuned_params.json')
+
+def load_features():
+    """Lê as partidas do MongoDB e devolve (features, target), ou None se houver poucas partidas."""
+    # Projeção + cursor em lotes direto para colunas NumPy (valorant_matches.py)
+    return read_match_features(matches_collection())
+
+def build_models():
+    """Modelos avaliados, com os hiperparâmetros ajustados (se houver) por cima dos padrões."""
+    models = {
+        "Multilayer Perceptron (MLP)": BudgetedMLPClassifier(hidden_layer_sizes=(50, 25), max_iter=500, early_stopping=True,
+                                                             n_iter_no_change=MLP_PATIENCE_EPOCHS,
+                                                             max_fit_seconds=MLP_FIT_BUDGET_SECONDS, random_state=RANDOM_STATE),
+        "Naive Bayes Gaussiano": GaussianNB(),
+        "Árvore de Decisão": DecisionTreeClassifier(random_state=RANDOM_STATE),
+        "Random Forest": RandomForestClassifier(random_state=RANDOM_STATE, n_estimators=100)
+    }
+    for model in models.values():
+        model.set_params(**load_tuned_params(type(model).__name__, TUNED_PARAMS_PATH))
+    return models
+
+def run_classification(adaptive=False, target_ci_width=ADAPTIVE_CI_WIDTH, max_repeats=N_REPEATS):
+    """
+    Executa classificação e retorna resultados em formato JSON.
+
+    Com `adaptive`, cada modelo roda repetições do 10-fold até o intervalo
+    de confiança (95%) da acurácia ficar mais estreito que `target_ci_width`
+    ou chegar a `max_repeats` (cv_engine.run_adaptive_cv); cada resultado
+    informa as repetições usadas (cv_repeats) e o intervalo final. No topo,
+    cv_folds continua um número (o maior número de folds rodados por um
+    modelo), cv_folds_by_model traz os folds de cada modelo e cv_folds_max
+    o máximo permitido.
+    """
+    loaded = load_features()
+    if loaded is None:
         return json.dumps({"error": "Dados insuficientes para validação cruzada."})
-
-    # =============================
-    # Pré-processamento dos dados
-    # =============================
-    player_stats_list = []
-    for match in matches_data:
-        stats = match['playerStats']
-        kills = stats.get('kills', 0)
-        deaths = stats.get('deaths', 1)
-        assists = stats.get('assists', 0)
-        effective_deaths = deaths if deaths > 0 else 1
-        stats['kda_ratio'] = (kills + assists) / effective_deaths
-        player_stats_list.append(stats)
-
-    df = pd.DataFrame(player_stats_list)
-    df['result'] = [m['result'] for m in matches_data]
-
-    features = df[['score', 'kills', 'deaths', 'assists', 'headshotPercentage', 'firstKills', 'kda_ratio']].fillna(0)
-    target = df['result'].apply(lambda x: 1 if x == 'Vitória' else 0)
+    features, target = loaded
 
     # =============================
     # Configuração de Validação
     # =============================
-    RANDOM_STATE = 42
-    n_splits = 10
-    n_repeats = 10
+    n_splits = N_SPLITS
+    n_repeats = max_repeats if adaptive else N_REPEATS
     rskf = RepeatedStratifiedKFold(n_splits=n_splits, n_repeats=n_repeats, random_state=RANDOM_STATE)
 
-    models_to_run = {
-        "Multilayer Perceptron (MLP)": MLPClassifier(hidden_layer_sizes=(50, 25), max_iter=500, random_state=RANDOM_STATE),
-        "Naive Bayes Gaussiano": GaussianNB(),
-        "Árvore de Decisão": DecisionTreeClassifier(random_state=RANDOM_STATE),
-        "Random Forest": RandomForestClassifier(random_state=RANDOM_STATE, n_estimators=100)
-    }
+    models_to_run = build_models()
 
     all_results = []
+    cache = FoldCache.from_env()
 
     # =============================
     # Loop principal de avaliação
@@ -69,10 +106,17 @@ def run_classification():
     for name, model in models_to_run.items():
         pipeline = make_pipeline(StandardScaler(), model)
 
-        acc_scores = cross_val_score(pipeline, features, target, cv=rskf, scoring='accuracy', n_jobs=-1)
-        prec_scores = cross_val_score(pipeline, features, target, cv=rskf, scoring='precision', n_jobs=-1)
-        rec_scores = cross_val_score(pipeline, features, target, cv=rskf, scoring='recall', n_jobs=-1)
-        f1_scores = cross_val_score(pipeline, features, target, cv=rskf, scoring='f1', n_jobs=-1)
+        if adaptive:
+            # Mesmos folds do rskf, uma repetição por vez, até o intervalo ficar estreito
+            cv_result = run_adaptive_cv(pipeline, features, target, n_splits, max_repeats, ADAPTIVE_MIN_REPEATS,
+                                        target_ci_width, random_state=RANDOM_STATE, n_jobs=-1,
+                                        fold_metrics=FOLD_METRICS, cache=cache)
+        else:
+            cv_result = run_cv(pipeline, features, target, rskf, n_jobs=-1, fold_metrics=FOLD_METRICS, cache=cache)
+        acc_scores = cv_result["fold_metrics"]["accuracy"]
+        prec_scores = cv_result["fold_metrics"]["precision"]
+        rec_scores = cv_result["fold_metrics"]["recall"]
+        f1_scores = cv_result["fold_metrics"]["f1"]
 
         model_scores = {
             "model_name": name,
@@ -84,8 +128,22 @@ def run_classification():
             "std_accuracy": float(acc_scores.std()),
             "std_precision": float(prec_scores.std()),
             "std_recall": float(rec_scores.std()),
-            "std_f1_score": float(f1_scores.std())
+            "std_f1_score": float(f1_scores.std()),
+            "cv_fold_fits": cv_result["fold_fits"],
         }
+        if adaptive:
+            model_scores.update({
+                "cv_repeats": cv_result["repeats_used"],
+                "cv_folds": len(acc_scores),
+                "accuracy_ci": [x if math.isfinite(x) else None for x in cv_result["ci"]],
+                "accuracy_ci_width": cv_result["ci_width"] if math.isfinite(cv_result["ci_width"]) else None,
+                "cv_stop_reason": cv_result["stop_reason"],
+            })
+            print(f"-> {name}: {cv_result['repeats_used']}/{max_repeats} repetições "
+                  f"(IC 95% da acurácia com largura {cv_result['ci_width']:.4f}; parada: {cv_result['stop_reason']})",
+                  file=sys.stderr)
+        print(f"-> {name}: {sum(cv_result['fit_seconds']):.1f}s de treino{describe_fold_fits(cv_result['fold_fits'])}",
+              file=sys.stderr)
 
         all_results.append(model_scores)
 
@@ -97,11 +155,50 @@ def run_classification():
         "dataset_size": int(len(features)),
         "cv_folds": n_splits * n_repeats  # 100 folds (10x10)
     }
+    if adaptive:
+        # Folds realmente rodados: cv_folds segue inteiro (o front mostra "k=..."),
+        # o detalhe por modelo vai em cv_folds_by_model e o máximo permitido em cv_folds_max
+        folds_run = {result["model_name"]: result["cv_folds"] for result in all_results}
+        final_output["cv_folds"] = max(folds_run.values(), default=0)
+        final_output["cv_folds_by_model"] = folds_run
+        final_output["cv_folds_max"] = n_splits * n_repeats
+        final_output["cv_mode"] = {"adaptive": True, "target_ci_width": target_ci_width,
+                                   "min_repeats": ADAPTIVE_MIN_REPEATS, "max_repeats": max_repeats}
 
     return json.dumps(final_output)
 
+def tune_classification(budget_seconds=DEFAULT_BUDGET_SECONDS):
+    """
+    Ajusta os hiperparâmetros dos 4 modelos por successive halving
+    (hyperparam_search) e grava em TUNED_PARAMS_PATH. A busca usa 10 folds
+    (não 10×10): a ordem dos candidatos é o que importa.
+    """
+    loaded = load_features()
+    if loaded is None:
+        return json.dumps({"error": "Dados insuficientes para validação cruzada."})
+    features, target = loaded
+
+    cv = StratifiedKFold(n_splits=10, shuffle=True, random_state=RANDOM_STATE)
+    # Os parâmetros vão para o passo do modelo dentro do pipeline (scaler + modelo)
+    models = {type(model).__name__: make_pipeline(StandardScaler(), model) for model in build_models().values()}
+    prefixes = {name: f"{pipeline.steps[-1][0]}__" for name, pipeline in models.items()}
+    reports = tune_models(models, features, target, cv, budget_seconds=budget_seconds, n_jobs=-1, param_prefixes=prefixes)
+    save_tuned_params(TUNED_PARAMS_PATH, reports, {"dataset_size": int(len(features))})
+    print(f"✅ Parâmetros salvos em: {TUNED_PARAMS_PATH}", file=sys.stderr)
+    return json.dumps(reports)
+
 # =============================
 # Execução direta
 # =============================
 if __name__ == "__main__":
-    print(run_classification())
+    parser = argparse.ArgumentParser(description="Avaliação dos classificadores (Valorant).")
+    parser.add_argument('--tune', action='store_true', help='Ajusta os hiperparâmetros (successive halving) em vez de avaliar.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_SECONDS, help='Orçamento da busca, em segundos.')
+    parser.add_argument('--adaptive', action='store_true', help='Repetições do 10-fold só até o intervalo de confiança da acurácia ficar estreito.')
+    parser.add_argument('--ci_width', type=float, default=ADAPTIVE_CI_WIDTH, help='Modo adaptativo: largura alvo do IC 95%% da acurácia.')
+    parser.add_argument('--max_repeats', type=int, default=N_REPEATS, help='Modo adaptativo: máximo de repetições.')
+    args = parser.parse_args()
+    if args.tune:
+        print(tune_classification(args.budget))
+    else:
+        print(run_classification(args.adaptive, args.ci_width, args.max_repeats))
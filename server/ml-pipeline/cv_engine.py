@@ -0,0 +1,242 @@
+# server/cv_engine.py
+
+"""
+Validação cruzada em UMA passada: cada fold é treinado uma única vez e,
+desse mesmo fit, saem a acurácia do fold, as predições e probabilidades
+out-of-fold (usadas para a matriz de confusão e o classification_report).
+
+Substitui o par cross_val_score + cross_val_predict, que treinava cada
+modelo duas vezes por fold. Os resultados são os mesmos: os folds vêm do
+mesmo objeto `cv` (com random_state fixo), cada fold usa um clone do
+modelo e a acurácia é accuracy_score(y_teste, predict(X_teste)), igual ao
+scoring='accuracy' do sklearn.
+
+Com um FoldCache (fold_cache.py), folds já calculados para o mesmo
+dataset/modelo/hiperparâmetros/índices são lidos do disco em vez de treinados
+(e marcados com "cached" em fold_fits). Folds que pararam pelo orçamento
+de tempo do MLP ('time_budget') não são gravados: dependem do relógio.
+
+X pode ser uma matriz scipy.sparse (codificação 'hashed' do campeão, ver
+champion_encoding.py): ela é fatiada por linhas sem virar densa.
+
+run_adaptive_cv repete o k-fold estratificado (os mesmos folds do
+RepeatedStratifiedKFold com o mesmo random_state) só até o intervalo de
+confiança da métrica principal ficar mais estreito que o alvo.
+"""
+
+import time
+
+import numpy as np
+from joblib import Parallel, delayed
+from scipy import sparse
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.model_selection import StratifiedKFold
+
+from budgeted_mlp import fit_info
+from fold_cache import dataset_fingerprint, model_identity
+
+
+def as_feature_matrix(X):
+    """np.asarray(X), mantendo matrizes esparsas como CSR (fatiamento por linhas barato)."""
+    return X.tocsr() if sparse.issparse(X) else np.asarray(X)
+
+
+def _fit_and_predict(model, X, y, train_idx, test_idx):
+    """
+    Treina o clone no fold e devolve (predições, probabilidades, segundos de
+    fit, info do fit: épocas usadas / motivo da parada, para o MLP).
+    """
+    started = time.perf_counter()
+    model.fit(X[train_idx], y[train_idx])
+    fit_seconds = time.perf_counter() - started
+    X_test = X[test_idx]
+    y_pred = model.predict(X_test)
+    y_proba = model.predict_proba(X_test) if hasattr(model, 'predict_proba') else None
+    return y_pred, y_proba, fit_seconds, fit_info(model)
+
+
+def run_cv(model, X, y, cv, n_jobs=None, fold_metrics=None, cache=None):
+    """
+    Roda a validação cruzada treinando cada fold UMA vez.
+
+    `fold_metrics` mapeia nome -> função (y_true, y_pred) calculada em cada
+    fold (além da acurácia, sempre em fold_scores). Com `cache`, só os folds que não estão no
+    cache são treinados.
+
+    Devolve um dicionário com:
+        fold_scores     acurácia de cada fold (mesma ordem do cv.split)
+        fold_metrics    {nome: array com a métrica de cada fold}
+        oof_pred        predição out-of-fold de cada amostra (com folds
+                        repetidos, vale a do último fold que a testou)
+        oof_proba       probabilidades out-of-fold (n_amostras x n_classes) ou None
+        classes         ordem das colunas de oof_proba
+        fit_seconds     tempo de fit de cada fold (o original, se veio do cache)
+        fold_fits       por fold: {fit_seconds, n_iter, stop_reason} (os dois
+                        últimos só para modelos iterativos, ex: MLP), com
+                        "cached": True nos folds lidos do cache
+        cached_folds    quantos folds vieram do cache
+        folds           lista de (índices de treino, índices de teste)
+    """
+    X = as_feature_matrix(X)
+    y = np.asarray(y)
+    folds = list(cv.split(X, y))
+    fold_metrics = fold_metrics or {}
+
+    keys = [None] * len(folds)
+    fold_outputs = [None] * len(folds)
+    identity = model_identity(model) if cache is not None else None
+    if identity is not None:
+        fingerprint = dataset_fingerprint(X, y)
+        for i, (train_idx, test_idx) in enumerate(folds):
+            keys[i] = cache.key_for(fingerprint, identity, train_idx, test_idx)
+            fold_outputs[i] = cache.get(keys[i])
+
+    missing = [i for i, output in enumerate(fold_outputs) if output is None]
+    computed = Parallel(n_jobs=n_jobs)(
+        delayed(_fit_and_predict)(clone(model), X, y, *folds[i])
+        for i in missing
+    )
+    computed_folds = set(missing)
+    for i, output in zip(missing, computed):
+        fold_outputs[i] = output
+        if keys[i] is not None and output[3].get("stop_reason") != 'time_budget':
+            cache.put(keys[i], *output)
+
+    classes = np.unique(y)
+    oof_pred = np.empty_like(y)
+    oof_proba = np.full((len(y), len(classes)), np.nan) if all(output[1] is not None for output in fold_outputs) else None
+    fold_scores = []
+    metric_values = {name: [] for name in fold_metrics}
+    for (_, test_idx), (y_pred, y_proba, _, _) in zip(folds, fold_outputs):
+        oof_pred[test_idx] = y_pred
+        if oof_proba is not None:
+            oof_proba[test_idx] = y_proba
+        fold_scores.append(accuracy_score(y[test_idx], y_pred))
+        for name, metric in fold_metrics.items():
+            metric_values[name].append(metric(y[test_idx], y_pred))
+
+    return {
+        "fold_scores": np.asarray(fold_scores),
+        "fold_metrics": {name: np.asarray(values) for name, values in metric_values.items()},
+        "oof_pred": oof_pred,
+        "oof_proba": oof_proba,
+        "classes": classes,
+        "fit_seconds": [seconds for _, _, seconds, _ in fold_outputs],
+        "fold_fits": [{"fit_seconds": seconds, **info, **({"cached": True} if i not in computed_folds else {})}
+                      for i, (_, _, seconds, info) in enumerate(fold_outputs)],
+        "cached_folds": len(folds) - len(missing),
+        "folds": folds,
+    }
+
+
+def repeat_confidence_interval(repeat_means, confidence=0.95):
+    """
+    Intervalo t de Student da média das repetições: (início, fim). Usa a
+    média de cada repetição (não cada fold): os folds de uma mesma
+    repetição dividem os dados e não são independentes entre si.
+    """
+    from scipy import stats
+
+    repeat_means = np.asarray(repeat_means, dtype=float)
+    mean = repeat_means.mean()
+    if len(repeat_means) < 2:
+        return mean - np.inf, mean + np.inf
+    half = stats.t.ppf((1 + confidence) / 2, len(repeat_means) - 1) * repeat_means.std(ddof=1) / np.sqrt(len(repeat_means))
+    return mean - half, mean + half
+
+
+def run_adaptive_cv(model, X, y, n_splits=10, max_repeats=10, min_repeats=3, target_ci_width=0.02,
+                    primary_metric='accuracy', confidence=0.95, random_state=None, n_jobs=None, fold_metrics=None,
+                    cache=None):
+    """
+    Validação cruzada repetida adaptativa: roda uma repetição do k-fold por
+    vez (cada fold treinado UMA vez, com todas as métricas, via run_cv) e
+    para quando o intervalo de confiança da `primary_metric` ('accuracy' ou
+    um nome de `fold_metrics`) fica mais estreito que `target_ci_width`
+    (depois de pelo menos `min_repeats`) ou ao chegar em `max_repeats`.
+
+    As repetições sorteiam os folds do mesmo gerador que o
+    RepeatedStratifiedKFold(n_splits, n_repeats, random_state) usa: sem
+    parada antecipada, os folds (e os scores) são os dele.
+
+    Devolve o mesmo dicionário do run_cv (fold_scores, fold_metrics,
+    fit_seconds, fold_fits, cached_folds e folds de todas as repetições;
+    oof_pred/oof_proba da última) mais:
+        repeats_used    repetições rodadas
+        ci              (início, fim) do intervalo da métrica principal
+        ci_width        largura do intervalo
+        stop_reason     'ci_width' (intervalo no alvo) ou 'max_repeats'
+    """
+    from sklearn.utils import check_random_state
+
+    rng = check_random_state(random_state)
+    min_repeats = max(1, min(min_repeats, max_repeats))
+    results = []
+    repeat_means = []
+    ci = (-np.inf, np.inf)
+    stop_reason = 'max_repeats'
+    for _ in range(max_repeats):
+        cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=rng)
+        result = run_cv(model, X, y, cv, n_jobs=n_jobs, fold_metrics=fold_metrics, cache=cache)
+        results.append(result)
+        scores = result["fold_scores"] if primary_metric == 'accuracy' else result["fold_metrics"][primary_metric]
+        repeat_means.append(scores.mean())
+        ci = repeat_confidence_interval(repeat_means, confidence)
+        if len(results) >= min_repeats and ci[1] - ci[0] <= target_ci_width:
+            stop_reason = 'ci_width'
+            break
+
+    last = results[-1]
+    return {
+        "fold_scores": np.concatenate([result["fold_scores"] for result in results]),
+        "fold_metrics": {name: np.concatenate([result["fold_metrics"][name] for result in results])
+                         for name in last["fold_metrics"]},
+        "oof_pred": last["oof_pred"],
+        "oof_proba": last["oof_proba"],
+        "classes": last["classes"],
+        "fit_seconds": [seconds for result in results for seconds in result["fit_seconds"]],
+        "fold_fits": [fit for result in results for fit in result["fold_fits"]],
+        "cached_folds": sum(result["cached_folds"] for result in results),
+        "folds": [fold for result in results for fold in result["folds"]],
+        "repeats_used": len(results),
+        "ci": (float(ci[0]), float(ci[1])),
+        "ci_width": float(ci[1] - ci[0]),
+        "stop_reason": stop_reason,
+    }
+
+
+def summarize_cv(cv_result, y, target_names=('Derrota', 'Vitória')):
+    """
+    Monta o bloco de métricas do ml_results.json (sem o model_name) a partir
+    do resultado do run_cv: acurácia/precision/recall/F1 out-of-fold, scores
+    por fold, matriz de confusão, classification_report por classe e, por
+    fold, o tempo de fit e as épocas usadas (cv_fold_fits).
+    """
+    y = np.asarray(y)
+    y_pred = cv_result["oof_pred"]
+    cm = confusion_matrix(y, y_pred)
+    report = classification_report(y, y_pred, target_names=list(target_names), output_dict=True, zero_division=0)
+    return {
+        'accuracy': report['accuracy'],
+        'cv_scores': cv_result["fold_scores"].tolist(),
+        'precision': report['macro avg']['precision'],
+        'recall': report['macro avg']['recall'],
+        'f1_score': report['macro avg']['f1-score'],
+        'confusion_matrix': cm.tolist(),
+        'classification_report': {'loss': report[target_names[0]], 'win': report[target_names[1]]},
+        'cv_fold_fits': cv_result["fold_fits"],
+    }
+
+
+def describe_fold_fits(fold_fits):
+    """Resumo das épocas/paradas dos folds para o log (vazio para modelos sem épocas)."""
+    iterations = [fit["n_iter"] for fit in fold_fits if "n_iter" in fit]
+    if not iterations:
+        return ""
+    reasons = {}
+    for fit in fold_fits:
+        if "stop_reason" in fit:
+            reasons[fit["stop_reason"]] = reasons.get(fit["stop_reason"], 0) + 1
+    stops = ", ".join(f"{reason}: {count}" for reason, count in sorted(reasons.items()))
+    return f"; épocas {min(iterations)}-{max(iterations)} (média {np.mean(iterations):.0f})" + (f"; paradas {stops}" if stops else "")
@@ -0,0 +1,262 @@
+# server/dataset_cache.py
+
+"""
+Cache colunar binário dos CSVs de treino/análise (LoL).
+
+Na primeira leitura, o CSV é lido pelo pandas (como antes) e cada coluna é
+gravada num .npy próprio em .dataset_cache/<hash do caminho>/:
+    - texto (championName, gameMode, ...): códigos int16/int32 + a lista
+      de categorias (.categories.npy);
+    - float64: float32 quando TODOS os valores cabem exatamente em float32,
+      senão float64 (nunca perde precisão);
+    - inteiros: o menor inteiro que comporta os valores; bool como bool.
+Nas leituras seguintes, os .npy são abertos com memory mapping (np.load
+com mmap_mode='r'): colunas guardadas no tipo original entram no
+DataFrame sem cópia; as demais são convertidas de volta para o tipo que o
+pd.read_csv daria. O DataFrame devolvido é igual ao do pd.read_csv
+(mesmas colunas, tipos e valores), então os resultados não mudam.
+
+Invalidação: meta.json guarda tamanho, mtime e hash (blake2b) do CSV.
+    - tamanho diferente: o cache é refeito;
+    - mesmo tamanho e mtime (e o cache foi escrito depois de o arquivo ter
+      "assentado"): o cache vale, sem ler o CSV;
+    - mesmo tamanho, mtime diferente (ou mtime recente demais para confiar):
+      o hash decide; se o conteúdo for o mesmo, só o mtime é atualizado.
+O cache é escrito num diretório temporário e trocado com os.rename:
+processos que já mapearam a versão anterior continuam lendo a antiga.
+
+Com float_dtype=np.float32 (FEATURE_PRECISION=float32, ver
+feature_precision.py), as colunas float saem em float32: as guardadas em
+float32 entram no DataFrame direto do mapeamento, sem a volta a float64.
+
+DATASET_CACHE_DIR=off desliga o cache (load_dataset vira um pd.read_csv).
+"""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from feature_precision import downcast_floats
+
+DEFAULT_CACHE_DIR = '.dataset_cache'
+CACHE_DIR_ENV_VAR = 'DATASET_CACHE_DIR'
+CACHE_FORMAT_VERSION = 1
+META_FILENAME = 'meta.json'
+
+# mtime a menos disso do momento da leitura: o arquivo pode ainda mudar no
+# mesmo "tique" do relógio do sistema de arquivos, então o hash é conferido
+RACY_WINDOW_SECONDS = 2.0
+
+_HASH_BLOCK_BYTES = 1 << 20
+
+
+def file_hash(path):
+    """blake2b do conteúdo do arquivo."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _narrow_float(values):
+    as32 = values.astype(np.float32)
+    if np.array_equal(as32.astype(np.float64), values, equal_nan=True):
+        return as32
+    return values
+
+
+def _narrow_int(values):
+    if not len(values):
+        return values
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return values.astype(dtype)
+    return values
+
+
+def _encode_column(series):
+    """Arrays a gravar + descrição da coluna, ou None se o tipo não for suportado."""
+    dtype = series.dtype
+    column = {"name": series.name, "dtype": str(dtype)}
+    if pd.api.types.is_bool_dtype(dtype) and dtype == np.bool_:
+        return {"values": series.to_numpy()}, {**column, "kind": "bool"}
+    if pd.api.types.is_float_dtype(dtype) and dtype == np.float64:
+        return {"values": _narrow_float(series.to_numpy())}, {**column, "kind": "float"}
+    if pd.api.types.is_integer_dtype(dtype) and dtype == np.int64:
+        return {"values": _narrow_int(series.to_numpy())}, {**column, "kind": "int"}
+    if pd.api.types.is_string_dtype(dtype):
+        non_null = series.dropna()
+        if not all(isinstance(v, str) for v in non_null.unique()):
+            return None  # texto misturado com outros tipos: fica sem cache
+        codes, categories = pd.factorize(series, use_na_sentinel=True)
+        code_dtype = np.int16 if len(categories) < np.iinfo(np.int16).max else np.int32
+        return ({"values": codes.astype(code_dtype), "categories": np.asarray(categories, dtype=str)},
+                {**column, "kind": "category"})
+    return None
+
+
+def _decode_column(column, arrays, float_dtype=None):
+    values = arrays["values"]
+    if column["kind"] == "category":
+        categories = pd.Index(arrays["categories"], dtype=column["dtype"])
+        return pd.Series(categories.take(values, allow_fill=True, fill_value=np.nan), name=column["name"])
+    dtype = np.dtype(float_dtype if float_dtype is not None and column["kind"] == "float" else column["dtype"])
+    if values.dtype != dtype:
+        values = values.astype(dtype)
+    return values
+
+
+class DatasetCache:
+    """Um diretório por CSV (chave: hash do caminho absoluto) com um .npy por coluna."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Cache padrão (None se DATASET_CACHE_DIR=off)."""
+        directory = os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR)
+        if directory.lower() in ('', '0', 'off', 'none'):
+            return None
+        try:
+            return cls(directory)
+        except OSError as e:
+            print(f"⚠️ Aviso: cache de datasets desligado ({e}).", file=sys.stderr)
+            return None
+
+    def entry_dir(self, csv_path):
+        key = hashlib.blake2b(os.path.abspath(csv_path).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def _read_meta(self, entry):
+        try:
+            with open(os.path.join(entry, META_FILENAME), 'r') as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return meta if meta.get("format_version") == CACHE_FORMAT_VERSION else None
+
+    def _write_meta(self, entry, meta):
+        path = os.path.join(entry, META_FILENAME)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(meta, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def _is_valid(self, meta, csv_path, stat):
+        source = meta["source"]
+        if stat.st_size != source["size"]:
+            return False
+        settled = source["read_at"] - stat.st_mtime_ns / 1e9 > RACY_WINDOW_SECONDS
+        if stat.st_mtime_ns == source["mtime_ns"] and settled:
+            return True
+        return file_hash(csv_path) == source["hash"]
+
+    def _load_entry(self, entry, meta, float_dtype=None):
+        data = {}
+        for i, column in enumerate(meta["columns"]):
+            # np.asarray: view ndarray comum sobre o mapeamento (sem a subclasse memmap)
+            arrays = {"values": np.asarray(np.load(os.path.join(entry, f"{i}.npy"), mmap_mode='r', allow_pickle=False))}
+            if column["kind"] == "category":
+                arrays["categories"] = np.load(os.path.join(entry, f"{i}.categories.npy"), allow_pickle=False)
+            data[i] = _decode_column(column, arrays, float_dtype)
+        df = pd.DataFrame(data, copy=False)
+        df.columns = pd.Index([column["name"] for column in meta["columns"]], dtype=meta["columns_dtype"])
+        return df
+
+    def _build(self, csv_path, entry):
+        """Lê o CSV com o pandas e grava o cache. Devolve (df, meta da origem)."""
+        before = os.stat(csv_path)
+        read_at = time.time()
+        with open(csv_path, 'rb') as f:
+            raw = f.read()
+        after = os.stat(csv_path)
+        df = pd.read_csv(io.BytesIO(raw))
+        source = {
+            "path": os.path.abspath(csv_path),
+            "size": len(raw),
+            "mtime_ns": after.st_mtime_ns,
+            "hash": hashlib.blake2b(raw, digest_size=16).hexdigest(),
+            "read_at": read_at,
+            "ends_with_newline": raw.endswith(b'\n'),
+        }
+        if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns) or after.st_size != len(raw):
+            return df, source  # o arquivo mudou durante a leitura: não cacheia
+
+        encoded = [_encode_column(df[name]) for name in df.columns]
+        if any(e is None for e in encoded) or not df.columns.is_unique:
+            print(f"⚠️ Aviso: '{csv_path}' tem colunas sem suporte no cache; lido sem cache.", file=sys.stderr)
+            return df, source
+
+        tmp_entry = f"{entry}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_entry, ignore_errors=True)
+        os.makedirs(tmp_entry)
+        try:
+            for i, (arrays, _) in enumerate(encoded):
+                np.save(os.path.join(tmp_entry, f"{i}.npy"), arrays["values"], allow_pickle=False)
+                if "categories" in arrays:
+                    np.save(os.path.join(tmp_entry, f"{i}.categories.npy"), arrays["categories"], allow_pickle=False)
+            self._write_meta(tmp_entry, {
+                "format_version": CACHE_FORMAT_VERSION,
+                "source": source,
+                "n_rows": len(df),
+                "columns_dtype": str(df.columns.dtype),
+                "columns": [column for _, column in encoded],
+            })
+            old_entry = f"{entry}.old{os.getpid()}"
+            if os.path.isdir(entry):
+                os.rename(entry, old_entry)
+            os.rename(tmp_entry, entry)
+            shutil.rmtree(old_entry, ignore_errors=True)
+        except OSError as e:
+            shutil.rmtree(tmp_entry, ignore_errors=True)
+            print(f"⚠️ Aviso: não foi possível gravar o cache de '{csv_path}': {e}", file=sys.stderr)
+        return df, source
+
+    def load(self, csv_path, float_dtype=None):
+        """
+        DataFrame do CSV (do cache, se válido) + informações da origem:
+        tamanho, mtime, hash, se termina em '\\n' e se veio do cache.
+        `float_dtype` muda o tipo das colunas float (padrão: o do pd.read_csv).
+        """
+        stat = os.stat(csv_path)  # FileNotFoundError, como o pd.read_csv
+        entry = self.entry_dir(csv_path)
+        meta = self._read_meta(entry)
+        if meta is not None and self._is_valid(meta, csv_path, stat):
+            source = meta["source"]
+            if stat.st_mtime_ns != source["mtime_ns"]:
+                # Mesmo conteúdo, mtime novo (ex: arquivo copiado por cima)
+                source = {**source, "mtime_ns": stat.st_mtime_ns, "read_at": time.time()}
+                self._write_meta(entry, {**meta, "source": source})
+            return self._load_entry(entry, meta, float_dtype), {**source, "cached": True}
+        df, source = self._build(csv_path, entry)
+        if float_dtype is not None:
+            df = downcast_floats(df, float_dtype)
+        return df, {**source, "cached": False}
+
+
+def load_dataset_with_info(csv_path, float_dtype=None):
+    """Como load_dataset, devolvendo também (tamanho, hash, ...) do CSV lido, ou None sem cache."""
+    cache = DatasetCache.from_env()
+    if cache is None:
+        df = pd.read_csv(csv_path)
+        return (downcast_floats(df, float_dtype) if float_dtype is not None else df), None
+    return cache.load(csv_path, float_dtype)
+
+
+def load_dataset(csv_path, float_dtype=None):
+    """
+    Substituto do pd.read_csv(csv_path) para os CSVs de treino/análise, com
+    o cache colunar. `float_dtype=np.float32` devolve as colunas float em float32.
+    """
+    return load_dataset_with_info(csv_path, float_dtype)[0]
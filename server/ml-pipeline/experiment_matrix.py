@@ -0,0 +1,275 @@
+# server/experiment_matrix.py
+
+"""
+Matriz de experimentos da avaliação (LoL): datasets × modos de jogo × modelos.
+
+Cada célula (um dataset, um modo, um modelo) é independente: carrega e
+pré-processa o dataset para o modo, roda o CV em uma passada (cv_engine)
+e devolve a entrada no formato do ml_results.json. Um pool de processos
+roda as células em paralelo.
+
+  - Sem oversubscription: cada worker limita o BLAS/OpenMP (threadpoolctl)
+    a núcleos / workers threads, e o CV de cada célula roda em série.
+  - Retomada: cada célula concluída é anexada (com fsync) a um checkpoint
+    JSON Lines, identificada pelo hash de (conteúdo do dataset, modo, spec
+    do modelo, codificação do campeão, precisão). Rodando de novo, as
+    células já feitas são puladas; uma célula muda de hash se o CSV, os
+    hiperparâmetros, a codificação (--encoding / CHAMPION_ENCODING e
+    CHAMPION_HASH_BUCKETS) ou a precisão (--precision / FEATURE_PRECISION)
+    mudarem.
+  - Cache de folds (fold_cache.py, compartilhado entre os workers): mesmo
+    sem checkpoint, folds já treinados com o mesmo dataset pré-processado e
+    o mesmo modelo são lidos do disco.
+  - No fim, tudo é juntado num único arquivo de resultados, na ordem da
+    matriz (não na ordem de conclusão).
+
+Matriz em JSON (--matrix), todas as chaves opcionais:
+    {
+      "datasets":   [{"name": "Cypher's Edge", "path": "data/input/dataset.csv"}],
+      "game_modes": ["ALL", "CLASSIC", "ARAM"],
+      "models":     [{"name": "Random Forest", "class": "RandomForestClassifier",
+                      "params": {"random_state": 42}}]
+    }
+
+Rode a partir de server/ml-pipeline:
+    python experiment_matrix.py [--matrix m.json] [--workers N] [--output results/ml_results_matrix.json]
+                                [--encoding onehot|hashed] [--precision float64|float32]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+from champion_encoding import ENCODINGS, resolve_encoding
+from feature_precision import PRECISIONS, resolve_precision
+from fold_cache import FoldCache
+from lol_classifier_model import DEFAULT_MODEL_SPECS, EXPERIMENT_DATASETS, build_model, evaluate_model, prepare_dataset
+
+DEFAULT_GAME_MODES = ['ALL', 'CLASSIC', 'ARAM']
+DEFAULT_OUTPUT_PATH = 'results/ml_results_matrix.json'
+
+# Limite de threads do worker (mantido vivo enquanto o processo existir)
+_thread_limits = None
+
+
+def default_matrix():
+    return {
+        "datasets": [{"name": name, "path": path} for name, path in EXPERIMENT_DATASETS],
+        "game_modes": list(DEFAULT_GAME_MODES),
+        "models": [dict(spec) for spec in DEFAULT_MODEL_SPECS],
+    }
+
+
+def load_matrix(path=None):
+    """Matriz padrão, com as chaves do arquivo JSON (se dado) por cima."""
+    matrix = default_matrix()
+    if path:
+        with open(path, 'r') as f:
+            matrix.update(json.load(f))
+    return matrix
+
+
+def file_fingerprint(path):
+    """Hash do conteúdo do arquivo (None se não existir)."""
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def expand_cells(matrix, encoding=None, n_buckets=None, precision=None):
+    """
+    Lista de células (na ordem da matriz), cada uma com a sua chave de
+    checkpoint. A codificação do campeão e a precisão são resolvidas aqui
+    (parâmetros ou variáveis de ambiente) e vão na chave e na célula: os
+    workers não as leem do ambiente.
+    """
+    encoding, n_buckets = resolve_encoding(encoding, n_buckets)
+    precision = resolve_precision(precision)
+    fingerprints = {dataset["path"]: file_fingerprint(dataset["path"]) for dataset in matrix["datasets"]}
+    cells = []
+    for dataset in matrix["datasets"]:
+        for game_mode in matrix["game_modes"]:
+            for spec in matrix["models"]:
+                identity = {
+                    "dataset": fingerprints[dataset["path"]],
+                    "game_mode": game_mode,
+                    "model": {"class": spec["class"], "params": spec.get("params", {})},
+                    "encoding": encoding,
+                    "hash_buckets": n_buckets,
+                    "precision": precision,
+                }
+                key = hashlib.blake2b(json.dumps(identity, sort_keys=True).encode('utf-8'), digest_size=16).hexdigest()
+                cells.append({"key": key, "dataset": dataset, "game_mode": game_mode, "model": spec,
+                              "encoding": encoding, "hash_buckets": n_buckets, "precision": precision})
+    return cells
+
+
+def _init_worker(threads_per_worker):
+    # Um worker por núcleo: BLAS/OpenMP de cada um fica com a sua fatia
+    from threadpoolctl import threadpool_limits
+    global _thread_limits
+    _thread_limits = threadpool_limits(limits=threads_per_worker)
+
+
+@lru_cache(maxsize=8)
+def _prepared(csv_path, game_mode, encoding, n_buckets, precision):
+    """Pré-processamento de (dataset, modo, codificação, precisão), reaproveitado pelas células do mesmo worker."""
+    return prepare_dataset(csv_path, game_mode, encoding, precision, n_buckets=n_buckets)
+
+
+def run_cell(cell):
+    """Roda UMA célula e devolve o registro do checkpoint."""
+    started = time.perf_counter()
+    dataset, game_mode, spec = cell["dataset"], cell["game_mode"], cell["model"]
+    record = {"key": cell["key"], "dataset": dataset["name"], "dataset_path": dataset["path"],
+              "game_mode": game_mode, "model": spec["name"]}
+
+    prepared = _prepared(dataset["path"], game_mode, cell["encoding"], cell["hash_buckets"],
+                         cell["precision"])
+    if isinstance(prepared, dict):
+        record["error"] = prepared["error"]
+    else:
+        X_scaled, y, cv = prepared
+        result = evaluate_model(spec["name"], build_model(spec), X_scaled, y, cv, cache=FoldCache.from_env())
+        result["model_name"] = f"{dataset['name']} - {spec['name']}"
+        record.update({"result": result, "dataset_size": len(y), "cv_folds": cv.get_n_splits()})
+    record["seconds"] = time.perf_counter() - started
+    return record
+
+
+def read_checkpoint(path):
+    """Registros já concluídos, por chave. Linhas incompletas (interrupção no meio da escrita) são ignoradas."""
+    done = {}
+    try:
+        with open(path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                done[record["key"]] = record
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _append_checkpoint(f, record):
+    f.write(json.dumps(record) + "\n")
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def merge_results(cells, records):
+    """Junta os registros na ordem da matriz, no formato do ml_results.json (+ modo/dataset por entrada)."""
+    results = []
+    errors = []
+    for cell in cells:
+        record = records[cell["key"]]
+        if "error" in record:
+            errors.append({k: record[k] for k in ("dataset", "game_mode", "model", "error")})
+            continue
+        results.append({
+            **record["result"],
+            "dataset": record["dataset"],
+            "game_mode": record["game_mode"],
+            "dataset_size": record["dataset_size"],
+            "cv_folds": record["cv_folds"],
+        })
+    first = next((r for r in results), None)
+    return {
+        "results": results,
+        "dataset_size": first["dataset_size"] if first else 0,
+        "cv_folds": first["cv_folds"] if first else 0,
+        "errors": errors,
+    }
+
+
+def run_matrix(matrix, output_path=DEFAULT_OUTPUT_PATH, n_workers=None, resume=True, encoding=None, precision=None):
+    """
+    Roda as células que faltam em paralelo e grava o arquivo de resultados
+    único. `encoding`: codificação do campeão (padrão: CHAMPION_ENCODING ou
+    'onehot'); `precision`: float64/float32 (padrão: FEATURE_PRECISION ou 'float64').
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    encoding, n_buckets = resolve_encoding(encoding)
+    precision = resolve_precision(precision)
+    cells = expand_cells(matrix, encoding, n_buckets, precision)
+    checkpoint_path = f"{output_path}.checkpoint.jsonl"
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+    if not resume and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    records = read_checkpoint(checkpoint_path)
+    pending = [cell for cell in cells if cell["key"] not in records]
+
+    print("=" * 50, file=sys.stderr)
+    print(f"MATRIZ DE EXPERIMENTOS: {len(cells)} células ({len(cells) - len(pending)} já concluídas), "
+          f"{n_workers} workers", file=sys.stderr)
+    print("=" * 50, file=sys.stderr)
+
+    started = time.perf_counter()
+    if pending:
+        threads_per_worker = max(1, (os.cpu_count() or 1) // n_workers)
+        # As células mais caras (MLP, RF) primeiro, para equilibrar o fim da fila
+        cost = {'MLPClassifier': 0, 'BudgetedMLPClassifier': 0, 'RandomForestClassifier': 1}
+        pending.sort(key=lambda cell: cost.get(cell["model"]["class"], 2))
+        with open(checkpoint_path, 'a') as checkpoint, \
+                ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                    initargs=(threads_per_worker,)) as pool:
+            futures = {pool.submit(run_cell, cell): cell for cell in pending}
+            for done, future in enumerate(as_completed(futures), start=1):
+                record = future.result()
+                _append_checkpoint(checkpoint, record)
+                records[record["key"]] = record
+                status = f"erro: {record['error']}" if "error" in record else f"{record['seconds']:.1f}s"
+                print(f"[{done}/{len(pending)}] {record['dataset']} / {record['game_mode']} / {record['model']} ({status})",
+                      file=sys.stderr)
+
+    final_output = merge_results(cells, records)
+    final_output["matrix"] = {
+        "datasets": [dataset["name"] for dataset in matrix["datasets"]],
+        "game_modes": matrix["game_modes"],
+        "models": [spec["name"] for spec in matrix["models"]],
+        "cells": len(cells),
+        "encoding": encoding,
+        "hash_buckets": n_buckets,
+        "precision": precision,
+        "wall_seconds": time.perf_counter() - started,
+    }
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(final_output, f, indent=2)
+    os.replace(tmp_path, output_path)
+    print(f"✅ Resultados da matriz salvos em: {output_path}", file=sys.stderr)
+    return final_output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Roda a matriz de experimentos (datasets × modos × modelos) em paralelo.")
+    parser.add_argument('--matrix', type=str, help='Arquivo JSON com datasets, game_modes e models (padrão: todos os datasets × ALL/CLASSIC/ARAM × RF/MLP/NB).')
+    parser.add_argument('--workers', type=int, default=0, help='Processos em paralelo (0 = todos os núcleos).')
+    parser.add_argument('--output', type=str, default=DEFAULT_OUTPUT_PATH, help='Arquivo de resultados único.')
+    parser.add_argument('--no_resume', action='store_true', help='Ignora o checkpoint e recalcula todas as células.')
+    parser.add_argument('--encoding', choices=ENCODINGS,
+                        help='Codificação do campeão (padrão: CHAMPION_ENCODING ou onehot).')
+    parser.add_argument('--precision', choices=PRECISIONS,
+                        help='Precisão das features (padrão: FEATURE_PRECISION ou float64).')
+    args = parser.parse_args()
+
+    final_output = run_matrix(load_matrix(args.matrix), args.output, args.workers or None, resume=not args.no_resume,
+                              encoding=args.encoding, precision=args.precision)
+    print(json.dumps(final_output, indent=2))
+
+
+if __name__ == "__main__":
+    main()
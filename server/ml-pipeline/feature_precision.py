@@ -0,0 +1,51 @@
+# server/feature_precision.py
+
+"""
+Precisão das matrizes de features (LoL): float64 (padrão) ou float32.
+
+Com float32, as colunas float do CSV já saem do dataset_cache em float32
+(o cache guarda float32 quando não há perda, e aí a coluna entra no
+DataFrame sem conversão), o StandardScaler recebe e devolve float32, os
+modelos treinam em float32 (o RandomForest converte tudo para float32 de
+qualquer forma; o MLP e o GaussianNB mantêm float32) e a predição
+(PreprocessPlan) monta a matriz em float32. Metade da memória e da banda
+para contadores de jogo e valores de ouro, que não precisam de 15 dígitos.
+
+A precisão usada no treino fica no estado do treino e nos metadados do
+bundle; a predição segue o que o modelo usou. Arquivos legados (sem
+metadados) continuam em float64.
+
+Escolha: FEATURE_PRECISION=float32 ou o parâmetro `precision` das funções
+de treino. benchmarks/bench_float32.py mede memória, tempo e a diferença
+de acurácia em relação ao float64.
+"""
+
+import os
+
+import numpy as np
+
+PRECISIONS = ('float64', 'float32')
+DEFAULT_PRECISION = 'float64'
+PRECISION_ENV_VAR = 'FEATURE_PRECISION'
+
+
+def resolve_precision(precision=None):
+    """Precisão a partir do parâmetro ou da variável de ambiente."""
+    precision = precision or os.environ.get(PRECISION_ENV_VAR) or DEFAULT_PRECISION
+    if precision not in PRECISIONS:
+        raise ValueError(f"Precisão desconhecida: '{precision}' (opções: {', '.join(PRECISIONS)}).")
+    return precision
+
+
+def float_dtype(precision):
+    """np.dtype da precisão ('float64' -> float64, 'float32' -> float32)."""
+    return np.dtype(resolve_precision(precision))
+
+
+def downcast_floats(df, dtype):
+    """Colunas float64 do DataFrame convertidas para `dtype` (float64: o próprio df)."""
+    dtype = np.dtype(dtype)
+    if dtype == np.float64:
+        return df
+    columns = [c for c in df.columns if df[c].dtype == np.float64]
+    return df.astype({c: dtype for c in columns}) if columns else df
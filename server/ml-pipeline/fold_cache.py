@@ -0,0 +1,188 @@
+# server/fold_cache.py
+
+"""
+Cache em disco dos resultados por fold do CV (cv_engine.run_cv).
+
+Cada entrada guarda as predições e probabilidades do fold de teste, o
+tempo de fit e a info do fit (épocas/motivo da parada do MLP), num arquivo
+.npz cujo nome é o hash de:
+    - impressão digital do dataset (bytes de X e y, shape e dtype; para
+      X esparso, os arrays data/indices/indptr do CSR)
+    - índices de treino e de teste do fold
+    - classe do modelo e todos os hiperparâmetros (get_params(deep=True)),
+      o que já inclui a semente (random_state); o orçamento de tempo do MLP
+      (max_fit_seconds, budgeted_mlp.py) também entra à parte, explícito
+
+Rodar a pipeline de novo depois de uma mudança que não afeta a avaliação
+lê os folds do disco em vez de treinar; só as células que mudaram (outro
+CSV, outros hiperparâmetros, outros folds) são recalculadas. As métricas
+são recalculadas a partir das predições guardadas, então métricas novas
+funcionam com entradas antigas.
+
+Modelos com random_state=None não são cacheados: cada treino seria
+diferente e o cache "congelaria" um deles. Pelo mesmo motivo, o run_cv não
+grava folds cujo fit parou pelo orçamento de tempo (stop_reason
+'time_budget'): o resultado depende do relógio, não só da chave.
+
+Limite de tamanho com despejo LRU: cada acerto atualiza o mtime do
+arquivo; ao passar de `max_bytes`, os arquivos com mtime mais antigo são
+apagados. Escritas são atômicas (tmp + os.replace), então vários processos
+(ex: experiment_matrix.py) podem compartilhar o diretório.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_CACHE_DIR = '.cv_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# CV_CACHE_DIR=off desliga o cache; CV_CACHE_MAX_MB muda o limite
+CACHE_DIR_ENV_VAR = 'CV_CACHE_DIR'
+CACHE_MAX_MB_ENV_VAR = 'CV_CACHE_MAX_MB'
+
+
+def dataset_fingerprint(X, y):
+    """Hash do conteúdo de X e y (calculado uma vez por run_cv)."""
+    digest = hashlib.blake2b(digest_size=16)
+    arrays = [np.ascontiguousarray(y)]
+    if sparse.issparse(X):
+        X = X.tocsr()
+        if not X.has_canonical_format:
+            X = X.copy()
+            X.sum_duplicates()
+        digest.update(f"{X.format}{X.shape}".encode('utf-8'))
+        arrays[:0] = [np.ascontiguousarray(a) for a in (X.data, X.indices, X.indptr)]
+    else:
+        arrays.insert(0, np.ascontiguousarray(X))
+    for array in arrays:
+        digest.update(f"{array.dtype.str}{array.shape}".encode('utf-8'))
+        if array.dtype.hasobject:
+            digest.update(repr(array.tolist()).encode('utf-8'))
+        else:
+            digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def model_identity(model):
+    """(classe, hiperparâmetros) em JSON canônico; None se o modelo não for determinístico."""
+    params = model.get_params(deep=True)
+    if any(name.endswith('random_state') and value is None for name, value in params.items()):
+        return None
+    model_class = f"{type(model).__module__}.{type(model).__qualname__}"
+    time_budgets = {name: value for name, value in params.items() if name.endswith('max_fit_seconds')}
+    return json.dumps({"class": model_class, "params": params, "time_budgets": time_budgets},
+                      sort_keys=True, default=repr)
+
+
+class FoldCache:
+    """Diretório de arquivos .npz (um por fold) com limite de tamanho e despejo LRU."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls):
+        """Cache padrão da pipeline (None se CV_CACHE_DIR=off)."""
+        directory = os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR)
+        if directory.lower() in ('', '0', 'off', 'none'):
+            return None
+        max_mb = os.environ.get(CACHE_MAX_MB_ENV_VAR)
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        try:
+            return cls(directory, max_bytes)
+        except OSError as e:
+            print(f"⚠️ Aviso: cache de folds desligado ({e}).", file=sys.stderr)
+            return None
+
+    @staticmethod
+    def key_for(fingerprint, identity, train_idx, test_idx):
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(fingerprint.encode('utf-8'))
+        digest.update(identity.encode('utf-8'))
+        digest.update(np.ascontiguousarray(train_idx, dtype=np.int64).tobytes())
+        digest.update(b'|')
+        digest.update(np.ascontiguousarray(test_idx, dtype=np.int64).tobytes())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def get(self, key):
+        """(y_pred, y_proba ou None, fit_seconds, fit_info) do fold, ou None se não estiver no cache."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                y_pred = data['y_pred']
+                y_proba = data['y_proba'] if 'y_proba' in data.files else None
+                fit_seconds = float(data['fit_seconds'])
+                fit_info = json.loads(str(data['fit_info'])) if 'fit_info' in data.files else {}
+            os.utime(path)  # marca como usado recentemente (LRU)
+        except (FileNotFoundError, OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return y_pred, y_proba, fit_seconds, fit_info
+
+    def put(self, key, y_pred, y_proba, fit_seconds, fit_info=None):
+        arrays = {"y_pred": np.asarray(y_pred), "fit_seconds": np.float64(fit_seconds),
+                  "fit_info": np.str_(json.dumps(fit_info or {}))}
+        if y_proba is not None:
+            arrays["y_proba"] = np.asarray(y_proba)
+        if arrays["y_pred"].dtype.hasobject:
+            return  # rótulos não numéricos/texto: não dá para guardar sem pickle
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️ Aviso: não foi possível gravar no cache de folds: {e}", file=sys.stderr)
+            return
+        self.evict()
+
+    def evict(self):
+        """Apaga os arquivos menos usados até o diretório caber em max_bytes."""
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not entry.name.endswith('.npz'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
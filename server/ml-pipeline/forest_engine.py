@@ -0,0 +1,223 @@
+# server/forest_engine.py
+
+"""
+Motor de inferência em NumPy para o RandomForest de produção.
+
+O sklearn faz predict() e predict_proba() separados (cada linha percorre
+cada árvore duas vezes) e despacha árvore por árvore em Python, o que
+domina o tempo de uma predição única. Aqui a floresta é "achatada" em
+arrays contíguos (feature, threshold, filhos, valores das folhas) e todas
+as (linha, árvore) descem os nós juntas, de forma vetorizada, devolvendo
+classe e confiança numa única passada.
+
+A semântica é a mesma do sklearn, então as probabilidades saem idênticas:
+  - X é convertido para float32 antes da comparação (x <= threshold);
+  - NaN segue missing_go_to_left de cada nó;
+  - cada árvore contribui com o valor normalizado da folha e as somas são
+    acumuladas na ordem das árvores, divididas por n_estimators no final.
+
+Uso:
+    python forest_engine.py models_saved/lol_model.joblib models_saved/lol_model_forest.npz
+"""
+
+import sys
+
+import numpy as np
+
+# Linhas por bloco na travessia (limita a matriz linhas x árvores em memória)
+DEFAULT_BLOCK_ROWS = 8192
+
+_LEAF = -1
+
+
+class FlatForest:
+    """Floresta de decisão achatada em arrays NumPy contíguos."""
+
+    def __init__(self, feature, threshold, left, right, missing_left, value, roots, classes, n_features, max_depth,
+                 children=None, is_leaf=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.intp)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.intp)
+        self.right = np.ascontiguousarray(right, dtype=np.intp)
+        self.missing_left = np.ascontiguousarray(missing_left, dtype=bool)
+        self.value = np.ascontiguousarray(value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.intp)
+        self.classes_ = np.asarray(classes)
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)  # informativo
+        self.n_estimators = len(self.roots)
+        self.model_version = None  # preenchido quando vem de um bundle
+
+        # [esquerdo, direito] intercalados: um único gather escolhe o próximo nó.
+        # (Vêm prontos de um bundle, para não gerar cópias por processo.)
+        if children is None:
+            children = np.stack([self.left, self.right], axis=1).reshape(-1)
+        if is_leaf is None:
+            is_leaf = self.left == np.arange(len(self.left))
+        self.children = np.ascontiguousarray(children, dtype=np.intp)
+        self.is_leaf = np.ascontiguousarray(is_leaf, dtype=bool)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exporta um RandomForestClassifier (ou ExtraTrees) já treinado."""
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("FlatForest só suporta modelos com uma única saída.")
+
+        features, thresholds, lefts, rights, missing, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            is_leaf = tree.children_left == _LEAF
+
+            # Folhas apontam para si mesmas (é assim que a travessia as reconhece)
+            own_index = np.arange(n_nodes) + offset
+            lefts.append(np.where(is_leaf, own_index, tree.children_left + offset))
+            rights.append(np.where(is_leaf, own_index, tree.children_right + offset))
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            if hasattr(tree, 'missing_go_to_left'):
+                missing.append(np.asarray(tree.missing_go_to_left, dtype=bool))
+            else:
+                missing.append(np.zeros(n_nodes, dtype=bool))
+
+            # Mesmo cálculo do DecisionTreeClassifier.predict_proba
+            proba = tree.value[:, 0, :model.n_classes_].astype(np.float64)
+            normalizer = proba.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            values.append(proba / normalizer)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            missing_left=np.concatenate(missing),
+            value=np.concatenate(values),
+            roots=np.asarray(roots),
+            classes=model.classes_,
+            n_features=model.n_features_in_,
+            max_depth=max_depth,
+        )
+
+    def to_arrays(self):
+        """Dicionário de arrays (para np.savez / bundles)."""
+        return {
+            'feature': self.feature,
+            'threshold': self.threshold,
+            'left': self.left,
+            'right': self.right,
+            'missing_left': self.missing_left,
+            'value': self.value,
+            'roots': self.roots,
+            'classes': self.classes_,
+            'n_features': np.asarray(self.n_features_in_),
+            'max_depth': np.asarray(self.max_depth),
+            'children': self.children,
+            'is_leaf': self.is_leaf,
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(
+            feature=arrays['feature'],
+            threshold=arrays['threshold'],
+            left=arrays['left'],
+            right=arrays['right'],
+            missing_left=arrays['missing_left'],
+            value=arrays['value'],
+            roots=arrays['roots'],
+            classes=arrays['classes'],
+            n_features=int(arrays['n_features']),
+            max_depth=int(arrays['max_depth']),
+            children=arrays.get('children'),
+            is_leaf=arrays.get('is_leaf'),
+        )
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return cls.from_arrays({k: arrays[k] for k in arrays.files})
+
+    def apply(self, X):
+        """Índice global da folha de cada (linha, árvore): matriz n_linhas x n_árvores."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat_X = X.reshape(-1)
+        has_missing = np.isnan(flat_X).any()
+
+        # Cada par (linha, árvore) desce a partir da raiz; os que chegam numa
+        # folha saem do conjunto ativo, então árvores rasas não pagam pelas fundas.
+        leaves = np.broadcast_to(self.roots, (n_rows, self.n_estimators)).reshape(-1).copy()
+        active = np.arange(leaves.size)
+        nodes = leaves.copy()
+        row_offsets = np.repeat(np.arange(n_rows, dtype=np.intp) * n_features, self.n_estimators)
+
+        while active.size:
+            x = flat_X[row_offsets + self.feature[nodes]]
+            go_right = x > self.threshold[nodes]
+            if has_missing:
+                missing = np.isnan(x)
+                go_right[missing] = ~self.missing_left[nodes[missing]]
+            nodes = self.children[2 * nodes + go_right]
+
+            still_active = ~self.is_leaf[nodes]
+            if not still_active.all():
+                finished = ~still_active
+                leaves[active[finished]] = nodes[finished]
+                active = active[still_active]
+                nodes = nodes[still_active]
+                row_offsets = row_offsets[still_active]
+        return leaves.reshape(n_rows, self.n_estimators)
+
+    def predict_proba(self, X, block_rows=DEFAULT_BLOCK_ROWS):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X tem formato {X.shape}, mas o modelo espera {self.n_features_in_} features.")
+
+        proba = np.zeros((X.shape[0], self.value.shape[1]))
+        for start in range(0, X.shape[0], block_rows):
+            leaves = self.apply(X[start:start + block_rows])
+            block = proba[start:start + block_rows]
+            for tree in range(self.n_estimators):
+                block += self.value[leaves[:, tree]]
+        proba /= self.n_estimators
+        return proba
+
+    def predict_with_confidence(self, X, block_rows=DEFAULT_BLOCK_ROWS):
+        """Classe e confiança (probabilidade máxima) numa única passada."""
+        proba = self.predict_proba(X, block_rows)
+        return self.classes_.take(proba.argmax(axis=1)), proba.max(axis=1)
+
+    def predict(self, X, block_rows=DEFAULT_BLOCK_ROWS):
+        return self.predict_with_confidence(X, block_rows)[0]
+
+
+def compile_model(model):
+    """
+    Troca um RandomForest do sklearn pelo FlatForest equivalente; outros
+    modelos (MLP, Naive Bayes...) são devolvidos sem alteração.
+    """
+    if hasattr(model, 'estimators_') and all(hasattr(e, 'tree_') for e in model.estimators_):
+        return FlatForest.from_sklearn(model)
+    return model
+
+
+if __name__ == "__main__":
+    import joblib
+
+    if len(sys.argv) != 3:
+        print("Uso: python forest_engine.py <modelo.joblib> <saida.npz>", file=sys.stderr)
+        sys.exit(1)
+
+    forest = FlatForest.from_sklearn(joblib.load(sys.argv[1]))
+    forest.save(sys.argv[2])
+    print(f"✅ Floresta exportada ({forest.n_estimators} árvores, {len(forest.feature)} nós) em: {sys.argv[2]}", file=sys.stderr)
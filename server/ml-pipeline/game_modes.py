@@ -0,0 +1,87 @@
+# server/game_modes.py
+
+"""
+Modelos de produção por modo de jogo (LoL).
+
+    models_saved/                 modelo ALL (todas as partidas), como sempre
+        versions/
+        CURRENT
+        ...
+        modes/
+            CLASSIC/              modelo só com as partidas CLASSIC
+                versions/
+                CURRENT
+                ...
+            ARAM/
+                ...
+
+Cada modes/<modo>/ tem o mesmo layout de models_saved/: lol_model.joblib,
+lol_scaler.joblib, lol_model_columns.json, versions/, CURRENT e o
+lol_training_state.json do modo.
+
+O lol_classifier_model.train_and_save_mode_models() agrupa o dataset por
+gameMode uma vez e grava um conjunto de artefatos por modo. O
+predict_model.py roteia cada requisição pelo campo gameMode: modo com
+versão publicada em modes/<modo> -> modelo do modo; sem o campo, ou com um
+modo sem modelo próprio -> o modelo ALL.
+
+(Sem pandas/sklearn aqui: o módulo também é carregado pela predição única.)
+"""
+
+import os
+import re
+
+from model_versions import read_current_version
+
+ALL_MODES = 'ALL'
+GAME_MODE_FIELD = 'gameMode'
+MODES_DIRNAME = 'modes'
+
+# O nome do modo vira nome de diretório: só letras, dígitos, '_' e '-'
+_MODE_NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+
+def is_valid_mode_name(game_mode):
+    return isinstance(game_mode, str) and game_mode != ALL_MODES and bool(_MODE_NAME.match(game_mode))
+
+
+def mode_model_dir(model_dir, game_mode):
+    """Diretório dos artefatos do modo (o próprio model_dir para ALL)."""
+    if game_mode == ALL_MODES:
+        return model_dir
+    if not is_valid_mode_name(game_mode):
+        raise ValueError(f"Modo de jogo inválido para um diretório de modelo: {game_mode!r}")
+    return os.path.join(model_dir, MODES_DIRNAME, game_mode)
+
+
+def published_modes(model_dir):
+    """Modos (fora o ALL) com uma versão publicada em models_saved/modes/<modo>/, em ordem alfabética."""
+    try:
+        names = os.listdir(os.path.join(model_dir, MODES_DIRNAME))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names
+                  if is_valid_mode_name(name) and read_current_version(mode_model_dir(model_dir, name)) is not None)
+
+
+def route_game_mode(data_dict, modes):
+    """Modo da requisição se ele tiver modelo próprio (está em `modes`), senão None (modelo ALL)."""
+    game_mode = data_dict.get(GAME_MODE_FIELD)
+    return game_mode if isinstance(game_mode, str) and game_mode in modes else None
+
+
+def group_rows_by_mode(df, game_modes=None):
+    """
+    Índices das linhas de cada modo, numa única passada pelo gameMode:
+    {'ALL': todas as linhas, 'ARAM': ..., 'CLASSIC': ...}. `game_modes`
+    restringe (e ordena) os modos; por padrão, ALL + todos os do dataset.
+    """
+    import numpy as np
+
+    groups = {}
+    if GAME_MODE_FIELD in df.columns:
+        groups = {mode: np.asarray(rows) for mode, rows in df.groupby(GAME_MODE_FIELD, sort=True).indices.items()}
+    groups = {ALL_MODES: np.arange(len(df)), **{mode: rows for mode, rows in groups.items() if mode != ALL_MODES}}
+    if game_modes is None:
+        return groups
+    return {mode: groups.get(mode, np.arange(0)) for mode in game_modes}
@@ -17,6 +17,8 @@ from sklearn.ensemble import RandomForestClassifier
 from sklearn.neighbors import NearestNeighbors
 import matplotlib.pyplot as plt
 
+from feature_precision import float_dtype, resolve_precision
+
 # ---------- 1) Dados de exemplo (substitua por arquivo CSV se preferir) ----------
 csv_text = """gameMode,win,championName,kills,deaths,assists,goldEarned,totalMinionsKilled,visionScore,wardsPlaced,totalDamageDealtToChampions,turretTakedowns,goldDiff_10min,xpDiff_10min,jungleMinionsKilledDiff_10min,streak
 gameMode,win,championName,kills,deaths,assists,goldEarned,totalMinionsKilled,visionScore,wardsPlaced,totalDamageDealtToChampions,turretTakedowns,goldDiff_10min,xpDiff_10min,jungleMinionsKilledDiff_10min,streak
@@ -548,8 +550,10 @@ n_synth = 2049  # quantidade a ser gerada
 z_samp = np.random.multivariate_normal(mean=np.zeros(z.shape[1]), cov=cov, size=n_synth)
 u = stats.norm.cdf(z_samp)
 
+# FEATURE_PRECISION=float32: features sintéticas em float32 (metade da memória)
+synth_dtype = float_dtype(resolve_precision())
 synth_numeric = pd.DataFrame({
-    col: np.interp(u[:, i], np.linspace(0, 1, len(X[col])), np.sort(X[col].values))
+    col: np.interp(u[:, i], np.linspace(0, 1, len(X[col])), np.sort(X[col].values)).astype(synth_dtype)
     for i, col in enumerate(X.columns)
 })
 
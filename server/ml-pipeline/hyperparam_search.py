@@ -0,0 +1,329 @@
+# server/hyperparam_search.py
+
+"""
+Busca de hiperparâmetros por successive halving, com orçamento de tempo.
+
+Em vez de avaliar toda a grade com o CV completo (10 folds no LoL, 10×10
+no classifier_model), cada "degrau" avalia os candidatos que sobraram com
+um recurso crescente e só o 1/factor melhor passa para o próximo:
+
+    degrau 0: todos os candidatos, recurso mínimo (ex: 11 árvores)
+    degrau 1: 1/3 deles, recurso ×3 (ex: 33 árvores)
+    ...
+    último:   1 a `factor` candidatos, recurso máximo (ex: 100 árvores)
+
+O recurso é, por modelo (SEARCH_SPACES): o número de árvores do
+RandomForest, o max_iter do MLP ou o número de amostras (subamostra
+estratificada) para os modelos baratos. Cada avaliação é um cv_engine.run_cv
+(um fit por fold) com os MESMOS folds em todos os candidatos.
+
+Os candidatos de um degrau rodam em paralelo (joblib, um processo por
+núcleo; o loky limita o BLAS de cada worker), os melhores do degrau
+anterior primeiro. Estourado o orçamento (`budget_seconds`), as avaliações
+pendentes são canceladas e vence o melhor do degrau mais alto já avaliado.
+
+O relatório compara com a grade completa (candidatos × folds no recurso
+máximo): fits feitos, "fits completos equivalentes" (cada fit pesado pelo
+recurso usado / recurso máximo) e segundos de fit × estimativa da grade
+(tempo de cada candidato no seu degrau mais alto, extrapolado linearmente
+até o recurso máximo; no MLP, que costuma convergir antes do max_iter, a
+estimativa é um teto).
+
+Os parâmetros escolhidos são gravados em models_saved/lol_tuned_params.json,
+que o train_and_save_production_model() aplica ao modelo de produção.
+
+Rode a partir de server/ml-pipeline:
+    python hyperparam_search.py [--dataset data/input/dataset.csv] [--mode ALL] [--budget 600]
+                                [--models RandomForestClassifier BudgetedMLPClassifier] [--workers N]
+"""
+
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.model_selection import ParameterGrid, train_test_split
+
+from champion_encoding import densify_for
+from cv_engine import as_feature_matrix, run_cv
+
+TUNED_PARAMS_PATH = os.path.join('models_saved', 'lol_tuned_params.json')
+DEFAULT_BUDGET_SECONDS = 600.0
+DEFAULT_FACTOR = 3
+
+# Grade e recurso de cada modelo. 'n_samples' = subamostra do dataset;
+# qualquer outro nome é um hiperparâmetro do próprio modelo.
+SEARCH_SPACES = {
+    'RandomForestClassifier': {
+        'resource': 'n_estimators', 'max_resource': 100, 'min_resource': 5,
+        'grid': {
+            'max_depth': [None, 8, 16],
+            'min_samples_leaf': [1, 2, 5],
+            'max_features': ['sqrt', 'log2', 0.5],
+        },
+    },
+    'MLPClassifier': {
+        'resource': 'max_iter', 'max_resource': 1000, 'min_resource': 20,
+        'grid': {
+            'hidden_layer_sizes': [(100,), (50, 25), (64, 32)],
+            'alpha': [1e-4, 1e-3, 1e-2],
+            'learning_rate_init': [1e-3, 1e-2],
+        },
+    },
+    'DecisionTreeClassifier': {
+        'resource': 'n_samples',
+        'grid': {
+            'max_depth': [None, 4, 8, 16],
+            'min_samples_leaf': [1, 2, 5, 10],
+            'criterion': ['gini', 'entropy'],
+        },
+    },
+    'GaussianNB': {
+        'resource': 'n_samples',
+        'grid': {'var_smoothing': [1e-9, 1e-8, 1e-7, 1e-6, 1e-5]},
+    },
+}
+# O MLP com orçamento de tempo (budgeted_mlp.py) usa o mesmo espaço do MLPClassifier
+SEARCH_SPACES['BudgetedMLPClassifier'] = SEARCH_SPACES['MLPClassifier']
+
+
+def _rung_resources(max_resource, min_resource, n_candidates, factor):
+    """Recurso de cada degrau (crescente, o último = max_resource)."""
+    # degraus até sobrar 1 candidato, limitados pelo quanto o recurso pode encolher
+    # (em inteiros: math.log(27, 3) não dá exatamente 3)
+    wanted = 1
+    while factor ** (wanted - 1) < n_candidates:
+        wanted += 1
+    possible = 1
+    while max_resource / factor ** possible >= min_resource:
+        possible += 1
+    n_rungs = min(wanted, possible)
+    return [int(round(max_resource / factor ** (n_rungs - 1 - i))) for i in range(n_rungs)]
+
+
+def _evaluate(index, model, params, X, y, cv, resource, amount, param_prefix, random_state):
+    """CV de UM candidato com `amount` de recurso: (índice, score médio, segundos de fit, fits)."""
+    candidate = clone(model).set_params(**{f"{param_prefix}{k}": v for k, v in params.items()})
+    if resource == 'n_samples':
+        if amount < len(y):
+            X, _, y, _ = train_test_split(X, y, train_size=amount, stratify=y, random_state=random_state)
+    else:
+        candidate.set_params(**{f"{param_prefix}{resource}": amount})
+    result = run_cv(candidate, X, y, cv)
+    return index, float(np.mean(result["fold_scores"])), float(sum(result["fit_seconds"])), len(result["folds"])
+
+
+def successive_halving(model, param_grid, X, y, cv, resource='n_samples', max_resource=None, min_resource=None,
+                       factor=DEFAULT_FACTOR, budget_seconds=None, n_jobs=None, param_prefix='', random_state=42):
+    """
+    Successive halving sobre ParameterGrid(param_grid). Devolve o relatório
+    (best_params, best_score, degraus, comparação com a grade completa).
+    """
+    started = time.perf_counter()
+    X = as_feature_matrix(densify_for(model, X))
+    y = np.asarray(y)
+    candidates = list(ParameterGrid(param_grid))
+    n_splits = cv.get_n_splits()
+
+    if resource == 'n_samples':
+        max_resource = max_resource or len(y)
+        # cada fold precisa de pelo menos 2 exemplos de cada classe no treino
+        min_resource = max(min_resource or 0, 2 * n_splits * len(np.unique(y)))
+    resources = _rung_resources(max_resource, min_resource or 1, len(candidates), factor)
+
+    ranking = [(None, i) for i in range(len(candidates))]  # (score, índice), melhor primeiro
+    rungs = []
+    fits = 0
+    resource_used = 0.0
+    fit_seconds = 0.0
+    last_seconds = {}  # candidato -> (recurso, segundos de fit) no degrau mais alto avaliado
+    budget_exhausted = False
+    n_survivors = len(candidates)
+
+    for rung, amount in enumerate(resources):
+        survivors = [i for _, i in ranking[:n_survivors]]
+        rung_started = time.perf_counter()
+        results = {}
+        rung_fit_seconds = 0.0
+        outputs = Parallel(n_jobs=n_jobs, return_as='generator_unordered')(
+            delayed(_evaluate)(i, model, candidates[i], X, y, cv, resource, amount, param_prefix, random_state)
+            for i in survivors
+        )
+        for i, score, seconds, n_fits in outputs:
+            results[i] = score
+            fits += n_fits
+            resource_used += n_fits * amount
+            fit_seconds += seconds
+            rung_fit_seconds += seconds
+            last_seconds[i] = (amount, seconds)
+            if budget_seconds is not None and time.perf_counter() - started > budget_seconds:
+                budget_exhausted = True
+                break  # fecha o gerador: o joblib cancela o que falta
+
+        rungs.append({
+            "resource": amount,
+            "candidates": len(survivors),
+            "evaluated": len(results),
+            "seconds": time.perf_counter() - rung_started,
+            "fit_seconds": rung_fit_seconds,
+            "best_score": max(results.values()) if results else None,
+        })
+        print(f"   degrau {rung}: {resource}={amount}, {len(results)}/{len(survivors)} candidatos "
+              f"({rungs[-1]['seconds']:.1f}s)", file=sys.stderr)
+        if results:
+            ranking = sorted(((score, i) for i, score in results.items()), key=lambda item: (-item[0], item[1]))
+        if budget_exhausted or not results:
+            break
+        n_survivors = max(1, math.ceil(len(ranking) / factor))
+
+    best_score, best_index = ranking[0]
+    best_params = dict(candidates[best_index])
+    if resource != 'n_samples':
+        best_params[resource] = max_resource
+
+    # Grade completa: todos os candidatos × todos os folds, no recurso máximo
+    evaluated_seconds = [seconds * max_resource / amount for amount, seconds in last_seconds.values()]
+    grid_seconds = float(np.mean(evaluated_seconds)) * len(candidates)
+    grid_fits = len(candidates) * n_splits
+    return {
+        "best_params": best_params,
+        "best_score": best_score,
+        "resource": resource,
+        "factor": factor,
+        "n_candidates": len(candidates),
+        "rungs": rungs,
+        "budget_seconds": budget_seconds,
+        "budget_exhausted": budget_exhausted,
+        "wall_seconds": time.perf_counter() - started,
+        "fits": fits,
+        "full_fit_equivalents": resource_used / max_resource,
+        "fit_seconds": fit_seconds,
+        "grid_fits": grid_fits,
+        "grid_fit_seconds_estimate": grid_seconds,
+        "saved_fraction": 1.0 - fit_seconds / grid_seconds if grid_seconds > 0 else None,
+    }
+
+
+def search_space_for(model_class, search_spaces=None):
+    space = (search_spaces or SEARCH_SPACES).get(model_class)
+    if space is None:
+        raise ValueError(f"Sem espaço de busca para '{model_class}' (opções: {', '.join(SEARCH_SPACES)}).")
+    return space
+
+
+def tune_models(models, X, y, cv, budget_seconds=DEFAULT_BUDGET_SECONDS, n_jobs=None, factor=DEFAULT_FACTOR,
+                param_prefixes=None, search_spaces=None):
+    """
+    Roda a busca para cada {classe: modelo base}, dividindo o orçamento
+    restante igualmente entre os modelos que faltam. Devolve {classe: relatório}.
+    """
+    started = time.perf_counter()
+    reports = {}
+    for position, (model_class, model) in enumerate(models.items()):
+        space = search_space_for(model_class, search_spaces)
+        remaining = budget_seconds - (time.perf_counter() - started) if budget_seconds is not None else None
+        share = max(0.0, remaining) / (len(models) - position) if remaining is not None else None
+        print(f"🔎 {model_class}: {len(ParameterGrid(space['grid']))} candidatos, recurso '{space['resource']}'"
+              + (f", orçamento {share:.0f}s" if share is not None else ""), file=sys.stderr)
+        report = successive_halving(
+            model, space['grid'], X, y, cv,
+            resource=space['resource'], max_resource=space.get('max_resource'), min_resource=space.get('min_resource'),
+            factor=factor, budget_seconds=share, n_jobs=n_jobs,
+            param_prefix=(param_prefixes or {}).get(model_class, ''),
+        )
+        saved = report["saved_fraction"]
+        print(f"✅ {model_class}: {report['best_params']} (acurácia {report['best_score']:.4f}); "
+              f"{report['full_fit_equivalents']:.0f} fits completos equivalentes vs {report['grid_fits']} da grade"
+              + (f", {saved:.0%} do tempo de fit economizado" if saved is not None else ""), file=sys.stderr)
+        reports[model_class] = report
+    return reports
+
+
+def _to_json(value):
+    return list(value) if isinstance(value, tuple) else value
+
+
+def _from_json(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def save_tuned_params(path, reports, context):
+    """Grava (por cima das classes já salvas) os parâmetros escolhidos + o relatório de cada busca."""
+    try:
+        with open(path, 'r') as f:
+            saved = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        saved = {}
+    for model_class, report in reports.items():
+        saved[model_class] = {
+            "params": {k: _to_json(v) for k, v in report["best_params"].items()},
+            "score": report["best_score"],
+            **context,
+            "tuned_at": datetime.now(timezone.utc).isoformat(),
+            "search": {k: v for k, v in report.items() if k not in ("best_params", "best_score")},
+        }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(saved, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def load_tuned_params(model_class, path=TUNED_PARAMS_PATH, target_game_mode=None):
+    """
+    Parâmetros escolhidos para a classe (dict vazio se não houver busca
+    salva, ou se ela foi feita para outro modo de jogo).
+    """
+    try:
+        with open(path, 'r') as f:
+            entry = json.load(f).get(model_class)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if not entry:
+        return {}
+    if target_game_mode is not None and entry.get("target_game_mode", target_game_mode) != target_game_mode:
+        print(f"⚠️ Aviso: parâmetros de '{model_class}' em {path} são do modo {entry['target_game_mode']}; "
+              f"usando os padrões para {target_game_mode}.", file=sys.stderr)
+        return {}
+    return {k: _from_json(v) for k, v in entry["params"].items()}
+
+
+def main():
+    from lol_classifier_model import DEFAULT_MODEL_SPECS, build_model, prepare_dataset
+
+    parser = argparse.ArgumentParser(description="Busca de hiperparâmetros (successive halving) para o modelo de produção do LoL.")
+    parser.add_argument('--dataset', default='data/input/dataset.csv')
+    parser.add_argument('--mode', default='ALL', help='Modo de jogo (filtro do dataset).')
+    parser.add_argument('--models', nargs='+', default=['RandomForestClassifier'],
+                        help=f"Classes a ajustar (opções: {', '.join(spec['class'] for spec in DEFAULT_MODEL_SPECS)}).")
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET_SECONDS, help='Orçamento total em segundos (relógio).')
+    parser.add_argument('--factor', type=int, default=DEFAULT_FACTOR, help='Fração mantida a cada degrau (1/factor).')
+    parser.add_argument('--workers', type=int, default=0, help='Processos em paralelo (0 = todos os núcleos).')
+    parser.add_argument('--output', default=TUNED_PARAMS_PATH)
+    args = parser.parse_args()
+
+    prepared = prepare_dataset(args.dataset, args.mode)
+    if isinstance(prepared, dict):
+        print(json.dumps(prepared))
+        sys.exit(1)
+    X_scaled, y, cv = prepared
+
+    specs = {spec['class']: spec for spec in DEFAULT_MODEL_SPECS}
+    unknown = [name for name in args.models if name not in specs]
+    if unknown:
+        parser.error(f"Modelos desconhecidos: {', '.join(unknown)}")
+    models = {name: build_model(specs[name]) for name in args.models}
+
+    reports = tune_models(models, X_scaled, y, cv, budget_seconds=args.budget, n_jobs=args.workers or -1, factor=args.factor)
+    save_tuned_params(args.output, reports, {"dataset": args.dataset, "target_game_mode": args.mode})
+    print(f"✅ Parâmetros salvos em: {args.output}", file=sys.stderr)
+    print(json.dumps(reports, indent=2))
+
+
+if __name__ == "__main__":
+    main()
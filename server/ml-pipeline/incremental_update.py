@@ -0,0 +1,377 @@
+# server/incremental_update.py
+
+"""
+Atualização incremental do modelo de produção (LoL) com as partidas novas.
+
+O train_and_save_production_model() relê o dataset inteiro e treina scaler
+e RandomForest do zero; o custo cresce com o histórico. Aqui só as linhas
+anexadas ao CSV depois do último treino (lol_training_state.json guarda até
+que byte o arquivo já foi lido) entram no modelo:
+
+  - StandardScaler: média/variância acumuladas com partial_fit (fórmula
+    incremental do sklearn), sem reler as linhas antigas;
+  - campeões novos viram colunas novas NO FIM da lista de colunas; as linhas
+    antigas tinham 0 nelas, então a média/variância antiga dessas colunas é 0
+    e as árvores antigas (que nunca as usam) só são "alargadas";
+  - árvores antigas: como o scaler mudou, os limiares de cada nó são
+    convertidos para a escala nova (limiar * escala_antiga + média_antiga
+    - média_nova) / escala_nova, então elas decidem como antes, a menos de
+    arredondamento: a árvore do sklearn compara as features em float32
+    com limiares em float64, e uma partida colada num limiar pode cair do
+    outro lado depois da conversão (poucas folhas em 10^5 num teste com
+    200 partidas novas). O resultado é uma aproximação, não uma cópia
+    exata das decisões antigas;
+  - esses limiares só são acessíveis pelo estado interno do Tree do
+    sklearn (__reduce__/__setstate__), cujo formato muda entre versões:
+    antes de mexer, o estado é conferido contra os atributos públicos
+    (tree_.feature, tree_.threshold, node_count) e, se não bater, ou se a
+    árvore reconstruída não tiver os limiares pedidos, a atualização vira
+    um treino completo em vez de gravar um modelo corrompido;
+  - árvores novas: warm_start do RandomForest treinado só com as linhas
+    novas, em quantidade proporcional a elas (cada árvore continua
+    "valendo" mais ou menos o mesmo número de partidas).
+
+Na codificação 'hashed' não há colunas novas (o campeão novo cai num dos
+baldes championName#i) e essas colunas ficam com média 0 / escala 1 no
+scaler, como no treino completo.
+
+O campeão de referência (o descartado pelo drop_first no treino completo)
+continua o mesmo nas atualizações, mesmo que chegue um campeão que viria
+antes dele na ordem alfabética.
+
+Política de reconstrução (DEFAULT_UPDATE_POLICY, sobrescrita por --policy):
+    min_new_rows                  menos linhas novas que isso: espera juntar mais
+    max_new_rows_fraction         linhas novas / linhas do modelo acima disso: treino completo
+    max_updates_between_rebuilds  atualizações seguidas antes de um treino completo
+    max_trees                     total de árvores acima disso: treino completo
+                                  (a latência da predição cresce com as árvores)
+    max_new_columns               campeões novos numa atualização acima disso: treino completo
+    min_trees_per_update          mínimo de árvores novas por atualização
+Além disso, o treino completo é sempre forçado quando não há estado, quando
+o dataset/modo, a codificação do campeão (champion_encoding.py) ou a
+precisão (feature_precision.py) mudou, quando o CSV foi reescrito (não só anexado) ou quando
+aparecem colunas numéricas novas.
+
+Rode a partir de server/ml-pipeline:
+    python incremental_update.py [--dataset data/input/dataset.csv] [--mode ALL] [--per_mode] [--policy p.json]
+                                 [--full] [--encoding onehot|hashed] [--precision float64|float32]
+
+Com --per_mode, atualiza o modelo do modo em models_saved/modes/<modo>/
+(gravado pelo treino por modo, ver game_modes.py).
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import sys
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.tree._tree import Tree
+
+from champion_encoding import ENCODINGS, encode_hashed_rows, pin_identity_columns, resolve_encoding
+from feature_precision import PRECISIONS, resolve_precision
+from game_modes import ALL_MODES, mode_model_dir
+from lol_classifier_model import (
+    PRODUCTION_OUTPUT_DIR,
+    dataset_signature,
+    load_training_state,
+    production_metadata,
+    save_production_artifacts,
+    train_and_save_production_model,
+)
+from preprocess_plan import CATEGORICAL_COLUMN, hashed_column_names
+
+DEFAULT_DATASET_PATH = 'data/input/dataset.csv'
+
+DEFAULT_UPDATE_POLICY = {
+    "min_new_rows": 50,
+    "max_new_rows_fraction": 0.5,
+    "max_updates_between_rebuilds": 20,
+    "max_trees": 300,
+    "max_new_columns": 10,
+    "min_trees_per_update": 1,
+}
+
+
+def load_policy(path=None):
+    """Política padrão, com as chaves do arquivo JSON (se dado) por cima."""
+    policy = dict(DEFAULT_UPDATE_POLICY)
+    if path:
+        with open(path, 'r') as f:
+            policy.update(json.load(f))
+    return policy
+
+
+def read_appended_rows(csv_path, consumed_bytes):
+    """
+    Linhas completas anexadas depois de `consumed_bytes`. Devolve
+    (DataFrame, bytes dessas linhas); uma linha final ainda sem '\\n' fica
+    para a próxima atualização.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(consumed_bytes)
+        data = f.read()
+    n_bytes = data.rfind(b'\n') + 1
+    if n_bytes == 0:
+        return None, 0
+    return pd.read_csv(io.BytesIO(header + data[:n_bytes])), n_bytes
+
+
+def encode_new_rows(df, model_columns, reference_category, hash_buckets=None):
+    """
+    One-hot (ou hashing, com `hash_buckets`) das linhas novas alinhado às
+    colunas do modelo. Devolve (X, y, colunas novas de campeão, colunas
+    numéricas desconhecidas).
+    """
+    final_df = df.drop('gameMode', axis=1) if 'gameMode' in df.columns else df
+    if hash_buckets:
+        X, y, unknown_columns = encode_hashed_rows(final_df, model_columns, hash_buckets)
+        return X, y, [], unknown_columns
+    encoded = pd.get_dummies(final_df, columns=[CATEGORICAL_COLUMN])
+    encoded = encoded.drop(columns=[f"{CATEGORICAL_COLUMN}_{reference_category}"], errors='ignore')
+    y = encoded.pop('win')
+
+    known = set(model_columns)
+    prefix = f"{CATEGORICAL_COLUMN}_"
+    new_columns = sorted(c for c in encoded.columns if c not in known and c.startswith(prefix))
+    unknown_columns = sorted(c for c in encoded.columns if c not in known and not c.startswith(prefix))
+    X = encoded.reindex(columns=list(model_columns) + new_columns, fill_value=0)
+    return X, y, new_columns, unknown_columns
+
+
+def plan_update(state, csv_path, target_game_mode, policy, encoding=None, precision=None):
+    """
+    Decide o que fazer. Devolve (ação, motivo, linhas novas), com ação em
+    'none' (nada a fazer agora), 'incremental' ou 'full'.
+    """
+    if state is None:
+        return 'full', "sem estado de treino anterior", None
+    if state.get("dataset") != csv_path or state.get("target_game_mode") != target_game_mode:
+        return 'full', "dataset ou modo de jogo diferente do último treino", None
+    if (state.get("encoding", 'onehot'), state.get("hash_buckets")) != resolve_encoding(encoding):
+        return 'full', "codificação do campeão diferente da do último treino", None
+    if state.get("precision", 'float64') != resolve_precision(precision):
+        return 'full', "precisão diferente da do último treino", None
+
+    consumed = state["consumed_bytes"]
+    if os.path.getsize(csv_path) < consumed or dataset_signature(csv_path, consumed) != state["signature"]:
+        return 'full', "o CSV foi reescrito (não apenas anexado)", None
+
+    df_new, n_bytes = read_appended_rows(csv_path, consumed)
+    if df_new is None:
+        return 'none', "nenhuma partida nova", None
+    if target_game_mode != 'ALL' and 'gameMode' in df_new.columns:
+        df_new = df_new[df_new['gameMode'] == target_game_mode]
+
+    n_new = len(df_new)
+    if n_new < policy["min_new_rows"]:
+        return 'none', f"{n_new} partidas novas (mínimo {policy['min_new_rows']})", None
+    if n_new > policy["max_new_rows_fraction"] * state["n_rows"]:
+        return 'full', f"{n_new} partidas novas passam de {policy['max_new_rows_fraction']:.0%} do modelo", None
+    if state["updates_since_rebuild"] >= policy["max_updates_between_rebuilds"]:
+        return 'full', f"{state['updates_since_rebuild']} atualizações desde o último treino completo", None
+    if df_new['win'].nunique() < 2:
+        return 'none', "as partidas novas ainda não têm vitórias e derrotas", None
+    return 'incremental', f"{n_new} partidas novas", (df_new, n_bytes)
+
+
+class TreeStateError(Exception):
+    """O estado interno das árvores do sklearn não tem o formato esperado (treino completo)."""
+
+
+def _tree_state(estimator):
+    """(n_features, n_classes, n_outputs, estado) do Tree, conferido contra os atributos públicos."""
+    tree = estimator.tree_
+    try:
+        tree_class, (n_features, n_classes, n_outputs), tree_state = tree.__reduce__()
+        nodes = tree_state['nodes']
+        fields = nodes.dtype.names or ()
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        raise TreeStateError(f"estado do Tree do sklearn em formato desconhecido ({e!r})")
+    if (tree_class is not Tree or 'feature' not in fields or 'threshold' not in fields
+            or len(nodes) != tree.node_count
+            or not np.array_equal(nodes['feature'], tree.feature)
+            or not np.array_equal(nodes['threshold'], tree.threshold)):
+        raise TreeStateError("estado do Tree do sklearn não bate com tree_.feature/tree_.threshold")
+    return n_features, n_classes, n_outputs, tree_state
+
+
+def _check_rebuilt(tree, nodes):
+    if tree.node_count != len(nodes) or not np.array_equal(tree.threshold, nodes['threshold']):
+        raise TreeStateError("árvore reconstruída sem os limiares pedidos")
+
+
+def widen_forest(model, n_features):
+    """Faz as árvores já treinadas aceitarem `n_features` colunas (as novas no fim, nunca usadas por elas)."""
+    for estimator in model.estimators_:
+        _, n_classes, n_outputs, tree_state = _tree_state(estimator)
+        tree = Tree(n_features, n_classes, n_outputs)
+        tree.__setstate__(tree_state)
+        _check_rebuilt(tree, tree_state['nodes'])
+        estimator.tree_ = tree
+        estimator.n_features_in_ = n_features
+    model.n_features_in_ = n_features
+
+
+def rescale_thresholds(model, old_mean, old_scale, new_mean, new_scale):
+    """
+    Converte os limiares das árvores para a escala nova do scaler: as
+    mesmas decisões que antes, a menos do arredondamento float32 das
+    features (ver o início do módulo).
+    """
+    for estimator in model.estimators_:
+        _, _, _, tree_state = _tree_state(estimator)
+        nodes = tree_state['nodes'].copy()
+        feature = nodes['feature']
+        split = feature >= 0
+        f = feature[split]
+        nodes['threshold'][split] = (nodes['threshold'][split] * old_scale[f] + old_mean[f] - new_mean[f]) / new_scale[f]
+        tree_state['nodes'] = nodes
+        estimator.tree_.__setstate__(tree_state)
+        _check_rebuilt(estimator.tree_, nodes)
+
+
+def update_scaler(scaler, X_new, n_old_rows):
+    """partial_fit com as linhas novas; colunas novas entram com média/variância 0 nas linhas antigas."""
+    n_added = X_new.shape[1] - scaler.n_features_in_
+    if n_added:
+        scaler.mean_ = np.concatenate([scaler.mean_, np.zeros(n_added)])
+        scaler.var_ = np.concatenate([scaler.var_, np.zeros(n_added)])
+        if np.ndim(scaler.n_samples_seen_):
+            scaler.n_samples_seen_ = np.concatenate([scaler.n_samples_seen_, np.full(n_added, n_old_rows)])
+        scaler.n_features_in_ = X_new.shape[1]
+        if hasattr(scaler, 'feature_names_in_'):
+            scaler.feature_names_in_ = np.asarray(X_new.columns, dtype=object)
+    scaler.partial_fit(X_new)
+
+
+def apply_incremental_update(state, df_new, n_bytes, csv_path, target_game_mode, policy, output_dir=PRODUCTION_OUTPUT_DIR):
+    """Incorpora as linhas novas ao modelo salvo e publica a versão nova. Devolve o resumo (ou None se precisar de treino completo)."""
+    model = joblib.load(os.path.join(output_dir, 'lol_model.joblib'))
+    scaler = joblib.load(os.path.join(output_dir, 'lol_scaler.joblib'))
+    with open(os.path.join(output_dir, 'lol_model_columns.json'), 'r') as f:
+        model_columns = json.load(f)
+
+    hash_buckets = state.get("hash_buckets")
+    precision = state.get("precision", 'float64')
+    X_new, y_new, new_columns, unknown_columns = encode_new_rows(df_new, model_columns, state["reference_category"], hash_buckets)
+    if unknown_columns:
+        return None, f"colunas novas no CSV: {', '.join(unknown_columns)}"
+    if len(new_columns) > policy["max_new_columns"]:
+        return None, f"{len(new_columns)} campeões novos (máximo {policy['max_new_columns']})"
+
+    n_new = len(X_new)
+    n_trees = max(policy["min_trees_per_update"], math.ceil(state["base_n_estimators"] * n_new / state["n_rows"]))
+    if len(model.estimators_) + n_trees > policy["max_trees"]:
+        return None, f"{len(model.estimators_) + n_trees} árvores passariam do limite ({policy['max_trees']})"
+
+    # --- 1. Scaler: estatísticas acumuladas; árvores antigas convertidas para a escala nova ---
+    old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+    if precision != 'float64':
+        X_new = X_new.astype(precision)
+    update_scaler(scaler, X_new, state["n_rows"])
+    if hash_buckets:
+        pin_identity_columns(scaler, np.flatnonzero(np.isin(model_columns, hashed_column_names(hash_buckets))))
+    try:
+        if new_columns:
+            widen_forest(model, X_new.shape[1])
+        rescale_thresholds(model, old_mean, old_scale, scaler.mean_, scaler.scale_)
+    except TreeStateError as e:
+        # Nada foi gravado: o modelo/scaler alterados em memória são descartados
+        return None, f"árvores salvas não podem ser convertidas: {e}"
+
+    # --- 2. Árvores novas, treinadas só com as partidas novas ---
+    model.set_params(warm_start=True, n_estimators=len(model.estimators_) + n_trees)
+    model.fit(scaler.transform(X_new), y_new)
+    model.set_params(warm_start=False)
+
+    # --- 3. Salva tudo + nova versão ---
+    model_columns = list(model_columns) + new_columns
+    consumed = state["consumed_bytes"] + n_bytes
+    training_state = {
+        **state,
+        "consumed_bytes": consumed,
+        "signature": dataset_signature(csv_path, consumed),
+        "n_rows": state["n_rows"] + n_new,
+        "updates_since_rebuild": state["updates_since_rebuild"] + 1,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+    metadata = production_metadata(model, csv_path, target_game_mode, training_state["n_rows"], update="incremental",
+                                   precision=precision)
+    version = save_production_artifacts(model, scaler, model_columns, metadata, training_state, output_dir)
+    return {
+        "version": version,
+        "new_rows": n_new,
+        "new_trees": n_trees,
+        "n_estimators": len(model.estimators_),
+        "new_columns": new_columns,
+        "n_rows": training_state["n_rows"],
+    }, None
+
+
+def update_production_model(csv_path=DEFAULT_DATASET_PATH, target_game_mode='ALL', policy=None, force_full=False,
+                            output_dir=PRODUCTION_OUTPUT_DIR, encoding=None, precision=None):
+    """
+    Atualiza o modelo de produção (incremental ou completo, conforme a
+    política). `encoding`: codificação do campeão (padrão: CHAMPION_ENCODING
+    ou 'onehot'); `precision`: float64/float32 (padrão: FEATURE_PRECISION ou
+    'float64'). Devolve um resumo.
+    """
+    policy = policy or dict(DEFAULT_UPDATE_POLICY)
+    state = load_training_state(output_dir)
+    if force_full:
+        action, reason, pending = 'full', "treino completo pedido (--full)", None
+    else:
+        action, reason, pending = plan_update(state, csv_path, target_game_mode, policy, encoding, precision)
+
+    if action == 'incremental':
+        print(f"🔄 Atualização incremental: {reason}", file=sys.stderr)
+        summary, full_reason = apply_incremental_update(state, *pending, csv_path, target_game_mode, policy, output_dir)
+        if summary is not None:
+            print(f"✅ {summary['new_rows']} partidas e {summary['new_trees']} árvores novas "
+                  f"({summary['n_estimators']} no total); versão '{summary['version']}'.", file=sys.stderr)
+            return {"action": action, "reason": reason, **summary}
+        action, reason = 'full', full_reason
+
+    if action == 'full':
+        print(f"🏗️ Treino completo: {reason}", file=sys.stderr)
+        if not train_and_save_production_model(csv_path, target_game_mode, encoding, precision, output_dir):
+            return {"action": action, "reason": reason, "error": f"Falha ao treinar com '{csv_path}'."}
+        state = load_training_state(output_dir)
+        return {"action": action, "reason": reason, "version": state["version"], "n_rows": state["n_rows"]}
+
+    print(f"⏸️ Nada a atualizar: {reason}", file=sys.stderr)
+    return {"action": action, "reason": reason}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incorpora as partidas novas ao modelo de produção.")
+    parser.add_argument('--dataset', default=DEFAULT_DATASET_PATH, help='CSV do dataset de produção (só recebe linhas anexadas).')
+    parser.add_argument('--mode', default=ALL_MODES, help='Modo de jogo do modelo de produção.')
+    parser.add_argument('--per_mode', action='store_true',
+                        help='Atualiza o modelo próprio do modo (models_saved/modes/<modo>/, treino por modo) '
+                             'em vez do modelo em models_saved/.')
+    parser.add_argument('--policy', type=str, help='Arquivo JSON com a política de reconstrução (chaves de DEFAULT_UPDATE_POLICY).')
+    parser.add_argument('--full', action='store_true', help='Força o treino completo.')
+    parser.add_argument('--encoding', choices=ENCODINGS,
+                        help='Codificação do campeão (padrão: CHAMPION_ENCODING ou onehot).')
+    parser.add_argument('--precision', choices=PRECISIONS,
+                        help='Precisão das features (padrão: FEATURE_PRECISION ou float64).')
+    args = parser.parse_args()
+
+    output_dir = mode_model_dir(PRODUCTION_OUTPUT_DIR, args.mode) if args.per_mode else PRODUCTION_OUTPUT_DIR
+    summary = update_production_model(args.dataset, args.mode, load_policy(args.policy), force_full=args.full,
+                                      output_dir=output_dir, encoding=args.encoding, precision=args.precision)
+    print(json.dumps(summary, indent=2))
+    if "error" in summary:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
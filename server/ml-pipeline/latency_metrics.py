@@ -0,0 +1,245 @@
+# server/latency_metrics.py
+
+"""
+Métricas do caminho de predição: histogramas de latência por etapa (buckets
+fixos), contadores de requisições/linhas e erros por etapa.
+
+Etapas usadas pelo predict_model.py / prediction_server.py:
+    load        carga do modelo (bundle/joblib) e do plano de pré-processamento
+    read        leitura do CSV (modos batch)
+    parse       json.loads da requisição (modo servidor)
+    preprocess  one-hot + ordem das colunas + scaler (fundidos no PreprocessPlan)
+    cache       consulta ao cache de predições (modo servidor)
+    predict     predict_proba (ou espera no micro-batcher)
+    serialize   formatação do resultado + json.dumps / gravação da saída
+    total       requisição inteira (modo servidor) ou execução inteira (batch)
+
+Desligado, o custo é um `if metrics is not None` por etapa; ligado, cada
+observação é um bisect num tuple de ~20 limites mais uma soma sob lock.
+
+Saídas: snapshot em JSON (snapshot() / save_json()) e texto no formato de
+exposição do Prometheus (to_prometheus(), servido por serve_http()).
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+
+# Limites superiores dos buckets, em segundos (50 µs .. 10 s)
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+METRIC_PREFIX = 'lol_predict'
+
+
+class LatencyHistogram:
+    """Contagens por bucket (a última posição é +Inf), soma e total de observações."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimativa (limite superior do bucket) do quantil q; None se vazio."""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for upper, count in zip(self.buckets + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return upper
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_ms": self.sum * 1000,
+            "mean_ms": self.sum / self.count * 1000 if self.count else 0.0,
+            "p50_ms": _ms(self.quantile(0.5)),
+            "p90_ms": _ms(self.quantile(0.9)),
+            "p99_ms": _ms(self.quantile(0.99)),
+            "bucket_counts": list(self.counts),
+        }
+
+    def merge_dict(self, data):
+        """Soma um histograma salvo por to_dict() (mesmos buckets) neste."""
+        if len(data["bucket_counts"]) != len(self.counts):
+            raise ValueError("Histograma salvo tem outros buckets.")
+        self.counts = [a + b for a, b in zip(self.counts, data["bucket_counts"])]
+        self.sum += data["sum_ms"] / 1000
+        self.count += data["count"]
+
+
+def _ms(seconds):
+    if seconds is None:
+        return None
+    return seconds * 1000 if seconds != float('inf') else None
+
+
+class PredictionMetrics:
+    """Histogramas por etapa + contadores, seguros para várias threads."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}
+        self._counters = {"requests": 0, "rows": 0, "errors": 0}
+        self._errors_by_stage = {}
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = LatencyHistogram(self.buckets)
+            histogram.observe(seconds)
+
+    def since(self, stage, started):
+        """Registra o tempo desde `started` (time.perf_counter()) e devolve o instante atual."""
+        now = time.perf_counter()
+        self.observe(stage, now - started)
+        return now
+
+    def count(self, requests=0, rows=0):
+        with self._lock:
+            self._counters["requests"] += requests
+            self._counters["rows"] += rows
+
+    def error(self, stage):
+        with self._lock:
+            self._counters["errors"] += 1
+            self._errors_by_stage[stage] = self._errors_by_stage.get(stage, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.time() - self.started_at
+            return {
+                "uptime_seconds": uptime,
+                "counters": dict(self._counters),
+                "errors_by_stage": dict(self._errors_by_stage),
+                "requests_per_second": self._counters["requests"] / uptime if uptime > 0 else 0.0,
+                "rows_per_second": self._counters["rows"] / uptime if uptime > 0 else 0.0,
+                "buckets_ms": [upper * 1000 for upper in self.buckets],
+                "stages": {name: histogram.to_dict() for name, histogram in self._stages.items()},
+            }
+
+    def merge_snapshot(self, data):
+        """Acumula um snapshot salvo (ex: de execuções anteriores do CLI) nestas métricas."""
+        if [round(b, 9) for b in data.get("buckets_ms", [])] != [round(b * 1000, 9) for b in self.buckets]:
+            raise ValueError("Snapshot salvo tem outros buckets.")
+        with self._lock:
+            self.started_at = min(self.started_at, time.time() - data.get("uptime_seconds", 0.0))
+            for name, value in data.get("counters", {}).items():
+                self._counters[name] = self._counters.get(name, 0) + value
+            for stage, value in data.get("errors_by_stage", {}).items():
+                self._errors_by_stage[stage] = self._errors_by_stage.get(stage, 0) + value
+            for name, histogram in data.get("stages", {}).items():
+                self._stages.setdefault(name, LatencyHistogram(self.buckets)).merge_dict(histogram)
+
+    def save_json(self, path, accumulate=False):
+        """
+        Grava o snapshot em `path` (arquivo temporário + os.replace). Com
+        `accumulate`, soma antes o snapshot que já estiver no arquivo: assim
+        cada chamada do CLI (um processo por predição) entra no mesmo histograma.
+        """
+        lock_file = None
+        if accumulate:
+            lock_file = _lock_path(f"{path}.lock")
+            try:
+                with open(path, 'r') as f:
+                    self.merge_snapshot(json.load(f))
+            except (FileNotFoundError, json.JSONDecodeError, ValueError):
+                pass
+        try:
+            tmp_path = f"{path}.tmp{os.getpid()}"
+            with open(tmp_path, 'w') as f:
+                json.dump(self.snapshot(), f, indent=2)
+            os.replace(tmp_path, path)
+        finally:
+            if lock_file is not None:
+                lock_file.close()
+
+    def to_prometheus(self):
+        """Texto no formato de exposição do Prometheus (histogramas cumulativos)."""
+        snapshot = self.snapshot()
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Latência por etapa do caminho de predição.",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in sorted(snapshot["stages"].items()):
+            cumulative = 0
+            for upper, count in zip(self.buckets, histogram["bucket_counts"]):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{upper:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram["sum_ms"] / 1000:.9g}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram["count"]}')
+
+        for counter in ("requests", "rows"):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{counter}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{counter}_total {snapshot['counters'][counter]}")
+        lines.append(f"# TYPE {METRIC_PREFIX}_errors_total counter")
+        for stage, count in sorted(snapshot["errors_by_stage"].items()):
+            lines.append(f'{METRIC_PREFIX}_errors_total{{stage="{stage}"}} {count}')
+        lines.append(f"# TYPE {METRIC_PREFIX}_uptime_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}_uptime_seconds {snapshot['uptime_seconds']:.3f}")
+        return "\n".join(lines) + "\n"
+
+
+def _lock_path(path):
+    """Trava exclusiva entre processos (fcntl, POSIX); sem fcntl, não trava."""
+    lock_file = open(path, 'a')
+    try:
+        import fcntl
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+    except ImportError:
+        pass
+    return lock_file
+
+
+def serve_http(metrics, address):
+    """
+    Sobe um endpoint HTTP (thread daemon) com /metrics (Prometheus) e
+    /metrics.json (snapshot). `address` é "host:porta" ou só a porta.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class _MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body = metrics.to_prometheus().encode('utf-8')
+                content_type = 'text/plain; version=0.0.4; charset=utf-8'
+            elif self.path == '/metrics.json':
+                body = json.dumps(metrics.snapshot()).encode('utf-8')
+                content_type = 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # o stdout/stderr do servidor é do protocolo de predição
+
+    host, _, port = address.rpartition(':')
+    server = ThreadingHTTPServer((host or '127.0.0.1', int(port)), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
@@ -1,26 +1,87 @@
 import pandas as pd
-from sklearn.model_selection import cross_val_predict, StratifiedKFold, cross_val_score
-from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import StratifiedKFold
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.neural_network import MLPClassifier
 from sklearn.naive_bayes import GaussianNB
-from sklearn.metrics import confusion_matrix, classification_report
 import json
 import warnings
 import sys
 import numpy as np
 import joblib  # <-- ADICIONADO
 import os      # <-- ADICIONADO
+import io
+import hashlib
+from datetime import datetime, timezone
+
+from budgeted_mlp import BudgetedMLPClassifier
+from champion_encoding import densify_for, encode_shared_frame, encode_training_frame, resolve_encoding, subset_encoding
+from cv_engine import describe_fold_fits, run_cv, summarize_cv
+from dataset_cache import load_dataset, load_dataset_with_info
+from feature_precision import downcast_floats, float_dtype, resolve_precision
+from fold_cache import FoldCache
+from game_modes import group_rows_by_mode, mode_model_dir
+from hyperparam_search import TUNED_PARAMS_PATH, load_tuned_params
+from model_bundle import BUNDLE_FORMAT_VERSION, save_model_bundle
+from model_versions import BUNDLE_FILENAME, SKLEARN_MODEL_FILENAME, new_version_name, publish_version
 
 warnings.filterwarnings('ignore')
 
-def run_experiment_on_dataset(csv_path='lol_player_stats.csv', target_game_mode='ALL'):
+# Datasets comparados na avaliação: (nome do sistema, caminho do CSV)
+EXPERIMENT_DATASETS = [
+    ("Cypher's Edge", "data/input/dataset.csv"), # Caminho corrigido
+    ("Literatura 1", "data/literature/dataset_literatura_1.csv") # Caminho corrigido
+]
+
+# Modelo de produção: pasta dos artefatos e estado do último treino (usado
+# pelo incremental_update.py para saber o que já foi incorporado)
+PRODUCTION_OUTPUT_DIR = "models_saved"
+TRAINING_STATE_FILENAME = 'lol_training_state.json'
+SIGNATURE_WINDOW_BYTES = 64 * 1024
+
+# Avaliação do treino por modo (train_and_save_mode_models)
+MODE_RESULTS_PATH = 'results/ml_results_modes.json'
+
+# Orçamento de cada fit do MLP (por fold): até 1000 épocas, early stopping
+# pela validação e no máximo esse tempo (budgeted_mlp.py). Paciência de 50
+# épocas: com o padrão do sklearn (10) o MLP para cedo demais nos datasets
+# pequenos (a acurácia de validação anda em degraus de 1/len(validação))
+MLP_FIT_BUDGET_SECONDS = 30.0
+MLP_PATIENCE_EPOCHS = 50
+
+# Modelos avaliados: nome exibido, classe do sklearn e hiperparâmetros
+MODEL_CLASSES = {
+    'RandomForestClassifier': RandomForestClassifier,
+    'MLPClassifier': MLPClassifier,
+    'BudgetedMLPClassifier': BudgetedMLPClassifier,
+    'GaussianNB': GaussianNB,
+}
+DEFAULT_MODEL_SPECS = [
+    {'name': 'Random Forest', 'class': 'RandomForestClassifier', 'params': {'random_state': 42}},
+    {'name': 'MLP Classifier', 'class': 'BudgetedMLPClassifier',
+     'params': {'max_iter': 1000, 'early_stopping': True, 'n_iter_no_change': MLP_PATIENCE_EPOCHS,
+                'max_fit_seconds': MLP_FIT_BUDGET_SECONDS, 'random_state': 42}},
+    {'name': 'Naive Bayes', 'class': 'GaussianNB', 'params': {}},
+]
+
+def build_model(spec):
+    """Instancia o modelo descrito por um spec {'class': ..., 'params': {...}}."""
+    if spec['class'] not in MODEL_CLASSES:
+        raise ValueError(f"Modelo desconhecido: '{spec['class']}' (opções: {', '.join(MODEL_CLASSES)}).")
+    return MODEL_CLASSES[spec['class']](**spec.get('params', {}))
+
+def prepare_dataset(csv_path, target_game_mode='ALL', encoding=None, precision=None, n_buckets=None):
     """
-    Carrega UM dataset, pré-processa, treina os modelos (RF, MLP, NB)
-    e retorna os resultados detalhados para ESSE dataset.
+    Carrega e pré-processa UM dataset para a avaliação (filtro de modo,
+    get_dummies ou hashing do campeão, scaler) e escolhe os folds. Devolve
+    (X_scaled, y, cv) ou um dicionário {"error": ...}. Com a codificação
+    'hashed' (champion_encoding.py, `n_buckets` colunas), X_scaled é uma
+    matriz esparsa; com precision='float32' (feature_precision.py),
+    X_scaled é float32.
     """
+    encoding, n_buckets = resolve_encoding(encoding, n_buckets)
+    dtype = float_dtype(precision)
     try:
-        df = pd.read_csv(csv_path)
+        df = load_dataset(csv_path, float_dtype=dtype)
     except FileNotFoundError:
         print(f"Erro: Arquivo '{csv_path}' não encontrado.", file=sys.stderr)
         return {"error": f"Arquivo '{csv_path}' não encontrado."}
@@ -41,78 +102,216 @@ def run_experiment_on_dataset(csv_path='lol_player_stats.csv', target_game_mode=
         return {"error": f"Dataset muito pequeno ({len(final_df)} amostras). Mínimo de 10 recomendado."}
 
     # --- Pré-processamento ---
-    df_encoded = pd.get_dummies(final_df, columns=['championName'], drop_first=True)
-    
-    X = df_encoded.drop('win', axis=1)
-    y = df_encoded['win']
-    
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
+    X_scaled, y, _, _, _ = encode_training_frame(final_df, encoding, n_buckets, dtype=dtype)
+    cv = choose_cv(y, target_game_mode)
+    if isinstance(cv, dict):
+        return cv
+    return X_scaled, y, cv
+
+def choose_cv(y, target_game_mode='ALL'):
+    """StratifiedKFold com k=10 (ou k=5 se a menor classe não der), ou {"error": ...}."""
     n_splits = 10
+    min_class = np.unique(np.asarray(y), return_counts=True)[1].min()
     
-    if len(final_df) < n_splits or y.value_counts().min() < n_splits:
+    if len(y) < n_splits or min_class < n_splits:
         n_splits = 5 
         print(f"Aviso: Dados insuficientes para 10 folds. Usando k={n_splits}.", file=sys.stderr)
-        if len(final_df) < n_splits or y.value_counts().min() < n_splits:
+        if len(y) < n_splits or min_class < n_splits:
             print(f"Erro fatal: Dados insuficientes para validação cruzada (k=5).", file=sys.stderr)
             return {"error": f"Dados insuficientes para validação cruzada no modo '{target_game_mode}'."}
 
-    
-    cv = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
-    
-    models = {
-        'Random Forest': RandomForestClassifier(random_state=42),
-        'MLP Classifier': MLPClassifier(max_iter=1000, random_state=42),
-        'Naive Bayes': GaussianNB()
+    return StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=42)
+
+def evaluate_model(name, model, X_scaled, y, cv, cache=None):
+    """Avalia UM modelo (um fit por fold) e devolve a entrada do ml_results.json."""
+    # Um único fit por fold: scores por fold + predições out-of-fold.
+    # Folds que já estão no cache (mesmo dataset/modelo/folds) não são treinados.
+    cv_result = run_cv(model, densify_for(model, X_scaled), y, cv, cache=cache)
+    cached = f", {cv_result['cached_folds']}/{len(cv_result['folds'])} folds do cache" if cv_result['cached_folds'] else ""
+    print(f"-> Modelo '{name}' avaliado ({sum(cv_result['fit_seconds']):.1f}s de treino{cached}"
+          f"{describe_fold_fits(cv_result['fold_fits'])}).", file=sys.stderr)
+    return {
+        'model_name': name,
+        **summarize_cv(cv_result, y, target_names=('Derrota', 'Vitória')),
     }
+
+def run_experiment_on_dataset(csv_path='lol_player_stats.csv', target_game_mode='ALL', model_specs=None, encoding=None,
+                              precision=None):
+    """
+    Carrega UM dataset, pré-processa, treina os modelos (RF, MLP, NB)
+    e retorna os resultados detalhados para ESSE dataset.
+    """
+    prepared = prepare_dataset(csv_path, target_game_mode, encoding, precision)
+    if isinstance(prepared, dict):
+        return prepared
+    X_scaled, y, cv = prepared
     
     results = []
+    cache = FoldCache.from_env()
     
-    print(f"Iniciando AVALIAÇÃO no dataset '{csv_path}' (k={n_splits})...", file=sys.stderr)
+    print(f"Iniciando AVALIAÇÃO no dataset '{csv_path}' (k={cv.get_n_splits()})...", file=sys.stderr)
 
-    for name, model in models.items():
-        cv_scores = cross_val_score(model, X_scaled, y, cv=cv, scoring='accuracy')
-        
-        y_pred = cross_val_predict(model, X_scaled, y, cv=cv)
-        cm = confusion_matrix(y, y_pred)
-        report = classification_report(y, y_pred, target_names=['Derrota', 'Vitória'], output_dict=True, zero_division=0)
-        
-        results.append({
-            'model_name': name,
-            'accuracy': report['accuracy'],
-            'cv_scores': cv_scores.tolist(),
-            'precision': report['macro avg']['precision'],
-            'recall': report['macro avg']['recall'],
-            'f1_score': report['macro avg']['f1-score'],
-            'confusion_matrix': cm.tolist(),
-            'classification_report': {'loss': report['Derrota'], 'win': report['Vitória']}
-        })
-        print(f"-> Modelo '{name}' avaliado.", file=sys.stderr)
+    for spec in model_specs or DEFAULT_MODEL_SPECS:
+        results.append(evaluate_model(spec['name'], build_model(spec), X_scaled, y, cv, cache=cache))
         
     print(f"Avaliação do dataset '{csv_path}' concluída!", file=sys.stderr)
     return {
         "results": results, 
-        "dataset_size": len(final_df), 
+        "dataset_size": len(y), 
         "cv_folds": cv.get_n_splits()
     }
 
 # ---
 # --- NOVA FUNÇÃO PARA SALVAR O MODELO DE PRODUÇÃO ---
 # ---
-def train_and_save_production_model(csv_path, target_game_mode='ALL'):
+def read_dataset_snapshot(csv_path, float_dtype=None):
+    """
+    Lê o CSV até a última linha completa. Devolve (DataFrame, bytes lidos):
+    o número de bytes marca até onde o modelo de produção já "viu" o arquivo
+    (o incremental_update.py só lê o que vier depois dele).
+    """
+    # O cache colunar já sabe o tamanho exato do CSV que ele representa
+    # (e a avaliação, que roda antes, já o deixou pronto)
+    df, source = load_dataset_with_info(csv_path, float_dtype)
+    if source is not None and source["ends_with_newline"]:
+        return df, source["size"]
+
+    with open(csv_path, 'rb') as f:
+        raw = f.read()
+    # Uma linha final sem '\n' pode estar sendo escrita agora: fica para depois
+    n_bytes = raw.rfind(b'\n') + 1 or len(raw)
+    df = pd.read_csv(io.BytesIO(raw[:n_bytes]))
+    return (downcast_floats(df, float_dtype) if float_dtype is not None else df), n_bytes
+
+def dataset_signature(csv_path, n_bytes, window=SIGNATURE_WINDOW_BYTES):
+    """
+    Assinatura barata do trecho [0, n_bytes) do CSV: hash do começo e do
+    fim desse trecho. Se o arquivo só cresceu (linhas anexadas), a
+    assinatura não muda; se foi reescrito, muda.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(n_bytes).encode('utf-8'))
+    with open(csv_path, 'rb') as f:
+        digest.update(f.read(min(window, n_bytes)))
+        f.seek(max(0, n_bytes - window))
+        digest.update(f.read(n_bytes - f.tell()))
+    return digest.hexdigest()
+
+def load_training_state(output_dir=PRODUCTION_OUTPUT_DIR):
+    """Estado do último treino de produção (None se não houver)."""
+    try:
+        with open(os.path.join(output_dir, TRAINING_STATE_FILENAME), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+def save_production_artifacts(model, scaler, model_columns, metadata, training_state, output_dir=PRODUCTION_OUTPUT_DIR):
+    """
+    Grava os arquivos do modelo de produção (scaler, colunas, modelo), publica
+    uma versão nova (bundle + modelo sklearn) com troca atômica do CURRENT e,
+    por último, o estado do treino. Devolve o nome da versão.
+    """
+    os.makedirs(output_dir, exist_ok=True) # Cria a pasta se não existir
+
+    scaler_path = os.path.join(output_dir, 'lol_scaler.joblib')
+    joblib.dump(scaler, scaler_path)
+    print(f"✅ Scaler de produção salvo em: {scaler_path}", file=sys.stderr)
+
+    # Salva as colunas (VITAL para a predição)
+    columns_path = os.path.join(output_dir, 'lol_model_columns.json')
+    with open(columns_path, 'w') as f:
+        json.dump(model_columns, f)
+    print(f"✅ Colunas do modelo salvas em: {columns_path}", file=sys.stderr)
+
+    model_path = os.path.join(output_dir, 'lol_model.joblib')
+    joblib.dump(model, model_path)
+    print(f"✅ Modelo de produção salvo em: {model_path}", file=sys.stderr)
+
+    # O predict_model.py (inclusive o modo servidor, via hot-reload) usa a
+    # versão apontada por models_saved/CURRENT: nunca vê os arquivos pela metade.
+    def write_version(version_dir):
+        save_model_bundle(os.path.join(version_dir, BUNDLE_FILENAME), model, scaler, model_columns, metadata)
+        joblib.dump(model, os.path.join(version_dir, SKLEARN_MODEL_FILENAME))
+
+    version = new_version_name(output_dir)
+    version_dir = publish_version(output_dir, version, write_version)
+    print(f"✅ Versão de produção '{version}' (bundle v{BUNDLE_FORMAT_VERSION}) publicada em: {version_dir}", file=sys.stderr)
+
+    state_path = os.path.join(output_dir, TRAINING_STATE_FILENAME)
+    with open(f"{state_path}.tmp", 'w') as f:
+        json.dump({**training_state, "version": version}, f, indent=2)
+    os.replace(f"{state_path}.tmp", state_path)
+    return version
+
+def production_metadata(model, csv_path, target_game_mode, n_samples, update, precision='float64'):
+    return {
+        "source": "lol_classifier_model",
+        "model_type": type(model).__name__,
+        "model_params": {k: v for k, v in model.get_params().items() if isinstance(v, (int, float, str, bool, type(None)))},
+        "dataset": csv_path,
+        "target_game_mode": target_game_mode,
+        "n_samples": int(n_samples),
+        "update": update,
+        "precision": precision,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def fit_production_model(X_scaled, y, target_game_mode='ALL'):
+    """RandomForest de produção (com os hiperparâmetros ajustados do modo, se houver) treinado em X_scaled."""
+    # (Escolhemos o RandomForest como modelo de produção. Mude aqui se quiser.)
+    # Hiperparâmetros escolhidos pelo hyperparam_search.py, se ele já rodou
+    tuned_params = load_tuned_params('RandomForestClassifier', target_game_mode=target_game_mode)
+    if tuned_params:
+        print(f"Usando hiperparâmetros ajustados ({TUNED_PARAMS_PATH}): {tuned_params}", file=sys.stderr)
+    model = RandomForestClassifier(**{'random_state': 42, **tuned_params})
+    model.fit(X_scaled, y)
+    return model
+
+def production_training_state(model, csv_path, target_game_mode, n_bytes, signature, n_rows, encoding, n_buckets,
+                              precision, reference_category):
+    """
+    Estado de um treino completo: diz ao incremental_update.py até onde o CSV
+    já foi lido, a codificação e qual campeão ficou como referência (o
+    descartado pelo drop_first; None no hashed).
+    """
+    return {
+        "dataset": csv_path,
+        "target_game_mode": target_game_mode,
+        "consumed_bytes": n_bytes,
+        "signature": signature,
+        "n_rows": int(n_rows),
+        "rows_at_rebuild": int(n_rows),
+        "encoding": encoding,
+        "hash_buckets": n_buckets,
+        "precision": precision,
+        "reference_category": reference_category,
+        "base_n_estimators": model.n_estimators,
+        "updates_since_rebuild": 0,
+        "updated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+def train_and_save_production_model(csv_path, target_game_mode='ALL', encoding=None, precision=None,
+                                    output_dir=PRODUCTION_OUTPUT_DIR):
     """
     Carrega o dataset principal, treina o MELHOR modelo (ex: Random Forest)
     em TODOS os dados e salva os arquivos para o predict_model.py.
+    `encoding`: codificação do campeão ('onehot' ou 'hashed'; padrão:
+    CHAMPION_ENCODING ou 'onehot'). `precision`: 'float64' ou 'float32'
+    (padrão: FEATURE_PRECISION ou 'float64'); a predição segue a do treino.
+    `output_dir`: pasta dos artefatos (ex: models_saved/modes/<modo>, ver game_modes.py).
     """
+    encoding, n_buckets = resolve_encoding(encoding)
+    precision = resolve_precision(precision)
     print("\n" + "="*50, file=sys.stderr)
     print("INICIANDO TREINAMENTO DO MODELO DE PRODUÇÃO", file=sys.stderr)
     print(f"Dataset: {csv_path}", file=sys.stderr)
     print(f"Modo: {target_game_mode}", file=sys.stderr)
+    print(f"Codificação do campeão: {encoding}" + (f" ({n_buckets} colunas)" if n_buckets else ""), file=sys.stderr)
+    print(f"Precisão: {precision}", file=sys.stderr)
     print("="*50, file=sys.stderr)
     
     try:
-        df = pd.read_csv(csv_path)
+        df, n_bytes = read_dataset_snapshot(csv_path, float_dtype(precision))
     except FileNotFoundError:
         print(f"❌ ERRO: Arquivo de produção '{csv_path}' não encontrado.", file=sys.stderr)
         return False
@@ -125,54 +324,158 @@ def train_and_save_production_model(csv_path, target_game_mode='ALL'):
 
     final_df = df_processed.drop('gameMode', axis=1) if 'gameMode' in df_processed.columns else df_processed.copy()
 
-    # Aplica o get_dummies
-    df_encoded = pd.get_dummies(final_df, columns=['championName'], drop_first=True)
-    
-    X = df_encoded.drop('win', axis=1)
-    y = df_encoded['win']
-    
-    # Salva a lista de colunas (VITAL para a predição)
-    model_columns = X.columns.tolist()
-    
-    # --- 2. Treina o Scaler e Salva ---
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    
-    # Define os caminhos de saída
-    output_dir = "models_saved"
-    os.makedirs(output_dir, exist_ok=True) # Cria a pasta se não existir
-    
-    scaler_path = os.path.join(output_dir, 'lol_scaler.joblib')
-    joblib.dump(scaler, scaler_path)
-    print(f"✅ Scaler de produção salvo em: {scaler_path}", file=sys.stderr)
-    
-    # Salva as colunas
-    columns_path = os.path.join(output_dir, 'lol_model_columns.json')
-    with open(columns_path, 'w') as f:
-        json.dump(model_columns, f)
-    print(f"✅ Colunas do modelo salvas em: {columns_path}", file=sys.stderr)
+    # Aplica o get_dummies (ou o hashing) e treina o Scaler
+    # (model_columns: a lista de colunas, VITAL para a predição)
+    X_scaled, y, model_columns, scaler, reference_category = encode_training_frame(
+        final_df, encoding, n_buckets, dtype=float_dtype(precision))
 
-    # --- 3. Treina o Modelo e Salva ---
-    # (Escolhemos o RandomForest como modelo de produção. Mude aqui se quiser.)
-    model = RandomForestClassifier(random_state=42)
-    model.fit(X_scaled, y)
-    
-    model_path = os.path.join(output_dir, 'lol_model.joblib')
-    joblib.dump(model, model_path)
-    print(f"✅ Modelo de produção salvo em: {model_path}", file=sys.stderr)
+    # --- 2. Treina o Modelo ---
+    model = fit_production_model(X_scaled, y, target_game_mode)
+
+    # --- 3. Salva tudo + nova versão (troca atômica do CURRENT) ---
+    training_state = production_training_state(model, csv_path, target_game_mode, n_bytes,
+                                               dataset_signature(csv_path, n_bytes), len(y), encoding, n_buckets,
+                                               precision, reference_category)
+    metadata = production_metadata(model, csv_path, target_game_mode, len(y), update="full", precision=precision)
+    save_production_artifacts(model, scaler, model_columns, metadata, training_state, output_dir)
     print("="*50, file=sys.stderr)
     return True
 
+def _train_mode(shared, rows, game_mode, evaluate, model_specs, threads):
+    """
+    Worker do treino por modo: recorta as linhas do modo da codificação
+    compartilhada, avalia os modelos (CV, se `evaluate`) e treina o modelo de
+    produção do modo. Devolve os artefatos (ainda não gravados) ou {"error": ...}.
+    """
+    from threadpoolctl import threadpool_limits
+
+    y_mode = shared["y"][rows]
+    if len(rows) < 10 or len(np.unique(y_mode)) < 2:
+        return {"error": f"Modo '{game_mode}' com {len(rows)} partidas ou sem vitórias e derrotas."}
+
+    # Um worker por modo: BLAS/OpenMP de cada um fica com a sua fatia
+    with threadpool_limits(limits=threads):
+        X_scaled, y, model_columns, scaler, reference_category = subset_encoding(shared, rows)
+        evaluation = None
+        if evaluate:
+            cv = choose_cv(y, game_mode)
+            if isinstance(cv, dict):
+                evaluation = cv
+            else:
+                cache = FoldCache.from_env()
+                evaluation = {
+                    "results": [evaluate_model(spec['name'], build_model(spec), X_scaled, y, cv, cache=cache)
+                                for spec in model_specs],
+                    "dataset_size": len(y),
+                    "cv_folds": cv.get_n_splits(),
+                }
+        model = fit_production_model(X_scaled, y, game_mode)
+    return {
+        "model": model,
+        "scaler": scaler,
+        "model_columns": model_columns,
+        "reference_category": reference_category,
+        "n_rows": len(y),
+        "evaluation": evaluation,
+    }
+
+def train_and_save_mode_models(csv_path, game_modes=None, encoding=None, precision=None, evaluate=True,
+                               model_specs=None, n_jobs=None, output_dir=PRODUCTION_OUTPUT_DIR,
+                               results_path=MODE_RESULTS_PATH):
+    """
+    Treino por modo de jogo em UMA passada pelo CSV: lê o dataset uma vez,
+    agrupa as linhas por gameMode uma vez, codifica (get_dummies/hashing)
+    uma vez e, em paralelo (um processo por modo, lendo a codificação
+    compartilhada por memmap), avalia e treina o modelo de cada modo e o
+    ALL. Os resultados de cada modo saem iguais aos de uma execução
+    separada com o modo (mesmas colunas, scaler e folds).
+
+    Artefatos: ALL em `output_dir` (como o train_and_save_production_model);
+    cada modo em `output_dir`/modes/<modo>/, com versão e estado próprios
+    (game_modes.py). O predict_model.py roteia pelo gameMode da requisição.
+    `game_modes`: modos a treinar (padrão: ALL + todos os do CSV).
+    A avaliação (com `evaluate`) vai para `results_path`. Devolve o resumo por modo.
+    """
+    from joblib import Parallel, delayed
+
+    encoding, n_buckets = resolve_encoding(encoding)
+    precision = resolve_precision(precision)
+    print("\n" + "="*50, file=sys.stderr)
+    print("INICIANDO TREINAMENTO POR MODO DE JOGO", file=sys.stderr)
+    print(f"Dataset: {csv_path}", file=sys.stderr)
+    print(f"Codificação do campeão: {encoding}" + (f" ({n_buckets} colunas)" if n_buckets else ""), file=sys.stderr)
+    print(f"Precisão: {precision}", file=sys.stderr)
+    print("="*50, file=sys.stderr)
+
+    try:
+        df, n_bytes = read_dataset_snapshot(csv_path, float_dtype(precision))
+    except FileNotFoundError:
+        print(f"❌ ERRO: Arquivo de produção '{csv_path}' não encontrado.", file=sys.stderr)
+        return None
+    signature = dataset_signature(csv_path, n_bytes)
+
+    mode_rows = group_rows_by_mode(df, game_modes)
+    for game_mode in list(mode_rows):
+        try:
+            mode_model_dir(output_dir, game_mode)
+        except ValueError as e:
+            print(f"⚠️ Aviso: {e}; modo ignorado.", file=sys.stderr)
+            del mode_rows[game_mode]
+    print("Partidas por modo: " + ", ".join(f"{mode} {len(rows)}" for mode, rows in mode_rows.items()), file=sys.stderr)
+
+    final_df = df.drop('gameMode', axis=1) if 'gameMode' in df.columns else df
+    shared = encode_shared_frame(final_df, encoding, n_buckets, dtype=float_dtype(precision))
+    del df, final_df
+
+    n_jobs = max(1, min(len(mode_rows), n_jobs or os.cpu_count() or 1))
+    threads = max(1, (os.cpu_count() or 1) // n_jobs)
+    outputs = Parallel(n_jobs=n_jobs)(
+        delayed(_train_mode)(shared, rows, game_mode, evaluate, model_specs or DEFAULT_MODEL_SPECS, threads)
+        for game_mode, rows in mode_rows.items()
+    )
+
+    # Gravação em série, no processo principal (cada modo publica a sua versão)
+    summary = {}
+    evaluations = {}
+    for game_mode, output in zip(mode_rows, outputs):
+        if "error" in output:
+            print(f"⚠️ Aviso: {output['error']} Modelo do modo não treinado.", file=sys.stderr)
+            summary[game_mode] = {"error": output["error"]}
+            continue
+        model = output["model"]
+        training_state = production_training_state(model, csv_path, game_mode, n_bytes, signature, output["n_rows"],
+                                                   encoding, n_buckets, precision, output["reference_category"])
+        metadata = production_metadata(model, csv_path, game_mode, output["n_rows"], update="full", precision=precision)
+        version = save_production_artifacts(model, output["scaler"], output["model_columns"], metadata, training_state,
+                                            mode_model_dir(output_dir, game_mode))
+        summary[game_mode] = {"version": version, "n_rows": output["n_rows"]}
+        if output["evaluation"] is not None:
+            evaluations[game_mode] = output["evaluation"]
+
+    if evaluate:
+        os.makedirs(os.path.dirname(results_path) or '.', exist_ok=True)
+        with open(results_path, 'w') as outfile:
+            json.dump({"dataset": csv_path, "modes": evaluations}, outfile, indent=2)
+        print(f"Resultados de avaliação por modo salvos em: {results_path}", file=sys.stderr)
+    print("="*50, file=sys.stderr)
+    return summary
+
 
 # --- __main__ MODIFICADO ---
 if __name__ == "__main__":
+    # Treino por modo em uma passada: python lol_classifier_model.py --per_mode [CSV]
+    if len(sys.argv) > 1 and sys.argv[1] == '--per_mode':
+        summary = train_and_save_mode_models(sys.argv[2] if len(sys.argv) > 2 else "data/input/dataset.csv")
+        if summary is None or not any("version" in mode for mode in summary.values()):
+            print("❌ Falha ao treinar os modelos por modo.", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(summary, indent=2))
+        sys.exit(0)
+
     target_mode = sys.argv[1] if len(sys.argv) > 1 else 'ALL'
     
     # === PARTE 1: AVALIAÇÃO (O que você já tinha) ===
-    experiments = [
-        ("Cypher's Edge", "data/input/dataset.csv"), # Caminho corrigido
-        ("Literatura 1", "data/literature/dataset_literatura_1.csv") # Caminho corrigido
-    ]
+    experiments = EXPERIMENT_DATASETS
     
     all_results = []
     final_dataset_size = 0
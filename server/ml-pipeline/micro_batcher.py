@@ -0,0 +1,142 @@
+# server/micro_batcher.py
+
+"""
+Micro-batching de predições concorrentes (modo servidor com socket).
+
+Cada conexão do servidor roda na sua própria thread e, sem isto, cada
+requisição chamaria o modelo com uma matriz de 1 linha. O MicroBatcher
+junta as linhas JÁ pré-processadas que chegam ao mesmo tempo: ele espera
+até `max_batch_size` linhas ou `max_wait_ms` desde a primeira da fila, o
+que vier antes, pontua tudo numa única matriz e devolve o resultado de
+cada linha para a thread que a enviou.
+
+O pré-processamento continua sendo feito por requisição, na thread do
+chamador; só a chamada ao modelo é agrupada. Assim o resultado de cada
+requisição é o mesmo que ela teria sozinha.
+
+Depois do close() (ex: troca de modelo no hot-reload), as linhas já na fila
+ainda são pontuadas e as que chegarem atrasadas são pontuadas direto na
+thread do chamador: nenhuma requisição fica sem resposta.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+DEFAULT_MAX_BATCH_SIZE = 32
+DEFAULT_MAX_WAIT_MS = 0.5
+
+# Limites superiores dos buckets do histograma de tamanho de lote
+_BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class MicroBatcher:
+    """Agrupa linhas enviadas por várias threads e pontua em lote numa thread própria."""
+
+    def __init__(self, score_fn, max_batch_size=DEFAULT_MAX_BATCH_SIZE, max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._rows = 0
+        self._largest_batch = 0
+        self._batch_size_counts = [0] * (len(_BATCH_SIZE_BUCKETS) + 1)
+        self._queue_delay_total = 0.0
+        self._queue_delay_max = 0.0
+
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, row):
+        """Enfileira uma linha (1-D, já escalada); o Future recebe (classe, confiança)."""
+        future = Future()
+        with self._close_lock:
+            if not self._closed:
+                self._queue.put((row, time.perf_counter(), future))
+                return future
+        codes, confidences = self.score_fn(row[None, :])
+        future.set_result((codes[0], confidences[0]))
+        return future
+
+    def predict(self, row):
+        return self.submit(row).result()
+
+    def close(self):
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self):
+        """Bloqueia até a primeira linha e junta as seguintes até o limite de tamanho/tempo."""
+        first = self._queue.get()
+        if first is None:
+            return None, True
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            try:
+                item = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        closing = False
+        while not closing:
+            batch, closing = self._collect()
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            futures = [future for _, _, future in batch]
+            try:
+                codes, confidences = self.score_fn(np.vstack([row for row, _, _ in batch]))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, code, confidence in zip(futures, codes, confidences):
+                    future.set_result((code, confidence))
+
+            self._record(len(batch), [started - enqueued for _, enqueued, _ in batch])
+
+    def _record(self, batch_size, queue_delays):
+        bucket = next((i for i, upper in enumerate(_BATCH_SIZE_BUCKETS) if batch_size <= upper), len(_BATCH_SIZE_BUCKETS))
+        with self._stats_lock:
+            self._batches += 1
+            self._rows += batch_size
+            self._largest_batch = max(self._largest_batch, batch_size)
+            self._batch_size_counts[bucket] += 1
+            self._queue_delay_total += sum(queue_delays)
+            self._queue_delay_max = max(self._queue_delay_max, max(queue_delays))
+
+    def stats(self):
+        with self._stats_lock:
+            labels = [f"<={upper}" for upper in _BATCH_SIZE_BUCKETS] + [f">{_BATCH_SIZE_BUCKETS[-1]}"]
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "batches": self._batches,
+                "rows": self._rows,
+                "mean_batch_size": self._rows / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "batch_size_histogram": dict(zip(labels, self._batch_size_counts)),
+                "queue_delay_ms_mean": self._queue_delay_total / self._rows * 1000 if self._rows else 0.0,
+                "queue_delay_ms_max": self._queue_delay_max * 1000,
+            }
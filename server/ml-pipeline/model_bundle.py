@@ -0,0 +1,152 @@
+# server/model_bundle.py
+
+"""
+Bundle do modelo de produção: UM arquivo versionado com tudo que a
+predição precisa (arrays do FlatForest, média/escala do scaler, ordem das
+features e metadados), no lugar de lol_model.joblib + lol_scaler.joblib +
+lol_model_columns.json.
+
+Formato (little-endian):
+    8 bytes   magic  b'LOLBUNDL'
+    4 bytes   versão do formato (uint32)
+    8 bytes   tamanho do cabeçalho JSON (uint64)
+    N bytes   cabeçalho JSON: model_version, feature_order, metadata e,
+              para cada array, dtype / shape / offset
+    ...       arrays crus, cada um alinhado em 64 bytes
+
+A leitura faz um único np.memmap (somente leitura) do arquivo e cria views
+dos arrays, sem copiar nada. Vários processos que carregam o mesmo bundle
+compartilham as mesmas páginas físicas (page cache do SO) e o tempo de
+carga praticamente não depende do tamanho do modelo.
+"""
+
+import hashlib
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+from forest_engine import FlatForest
+from preprocess_plan import PreprocessPlan
+
+BUNDLE_MAGIC = b'LOLBUNDL'
+BUNDLE_FORMAT_VERSION = 1
+
+_PREFIX = struct.Struct('<8sIQ')
+_ALIGNMENT = 64
+
+
+def _align(offset):
+    return (offset + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_bundle(path, arrays, feature_order, metadata=None):
+    """Grava o bundle de forma atômica (arquivo temporário + os.replace)."""
+    layout = {}
+    offset = 0
+    contiguous = {}
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        array = np.ascontiguousarray(array).reshape(array.shape)  # mantém escalares 0-d
+        if array.dtype.hasobject:
+            raise ValueError(f"Array '{name}' tem dtype object; o bundle só guarda arrays numéricos/texto.")
+        offset = _align(offset)
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        contiguous[name] = array
+        offset += array.nbytes
+
+    header = {
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "feature_order": list(feature_order),
+        "metadata": metadata or {},
+        "arrays": layout,
+    }
+    # Versão = hash do conteúdo: qualquer modelo novo ganha uma versão nova
+    # (usada, por exemplo, para invalidar o cache de predições).
+    digest = hashlib.blake2b(json.dumps(header, sort_keys=True).encode('utf-8'), digest_size=8)
+    for array in contiguous.values():
+        digest.update(array.tobytes())
+    header["model_version"] = digest.hexdigest()
+    header = json.dumps(header).encode('utf-8')
+    data_start = _align(_PREFIX.size + len(header))
+
+    # Temporário por processo/thread (como no fold_cache.py): duas gravações
+    # simultâneas do mesmo bundle não escrevem no mesmo arquivo
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(_PREFIX.pack(BUNDLE_MAGIC, BUNDLE_FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, array in contiguous.items():
+                f.seek(data_start + layout[name]["offset"])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelBundle:
+    """Bundle aberto via memory map; os arrays são views somente leitura."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            prefix = f.read(_PREFIX.size)
+            if len(prefix) != _PREFIX.size:
+                raise ValueError(f"'{path}' não é um bundle de modelo (arquivo truncado).")
+            magic, version, header_len = _PREFIX.unpack(prefix)
+            if magic != BUNDLE_MAGIC:
+                raise ValueError(f"'{path}' não é um bundle de modelo.")
+            if version > BUNDLE_FORMAT_VERSION:
+                raise ValueError(f"Bundle '{path}' tem versão {version}; este código lê até a {BUNDLE_FORMAT_VERSION}.")
+            header = json.loads(f.read(header_len).decode('utf-8'))
+
+        self.format_version = version
+        self.model_version = header.get("model_version")
+        self.feature_order = header["feature_order"]
+        self.metadata = header["metadata"]
+
+        data_start = _align(_PREFIX.size + header_len)
+        self._mmap = np.memmap(path, dtype=np.uint8, mode='r')
+        data = self._mmap.view(np.ndarray)  # views simples (sem a subclasse memmap)
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            shape = tuple(spec["shape"])
+            start = data_start + spec["offset"]
+            nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+            self.arrays[name] = data[start:start + nbytes].view(dtype).reshape(shape)
+
+    def forest(self):
+        """FlatForest apoiado diretamente nas páginas mapeadas."""
+        prefix = 'forest_'
+        forest = FlatForest.from_arrays({
+            name[len(prefix):]: array for name, array in self.arrays.items() if name.startswith(prefix)
+        })
+        forest.model_version = self.model_version
+        return forest
+
+    def preprocess_plan(self):
+        # Precisão do treino (feature_precision.py); bundles antigos: float64
+        return PreprocessPlan.from_params(self.feature_order, self.arrays['scaler_mean'], self.arrays['scaler_scale'],
+                                          dtype=self.metadata.get("precision", 'float64'))
+
+
+def bundle_arrays(forest, plan):
+    """Arrays do bundle a partir do FlatForest e do plano (média/escala já resolvidas)."""
+    arrays = {f"forest_{name}": value for name, value in forest.to_arrays().items()}
+    arrays['scaler_mean'] = plan.mean
+    arrays['scaler_scale'] = plan.scale
+    return arrays
+
+
+def save_model_bundle(path, model, scaler, feature_order, metadata=None):
+    """Exporta RandomForest + StandardScaler do sklearn para um bundle."""
+    forest = FlatForest.from_sklearn(model)
+    plan = PreprocessPlan(feature_order, scaler)
+    write_bundle(path, bundle_arrays(forest, plan), feature_order, metadata)
@@ -0,0 +1,186 @@
+# server/model_versions.py
+
+"""
+Versões do modelo de produção em diretórios próprios + ponteiro atômico.
+
+    models_saved/
+        versions/
+            20260101T120000Z-1a2b3c4d/
+                lol_model.bundle     (FlatForest + scaler + colunas)
+                lol_model.joblib     (RandomForest do sklearn, p/ o modo batch)
+        CURRENT                      (nome da versão em uso, uma linha)
+
+O treino grava a versão inteira num diretório temporário, renomeia para o
+nome final e só então troca o CURRENT (arquivo temporário + os.replace).
+Quem lê o CURRENT sempre encontra uma versão completa: nunca um modelo
+novo com o scaler/colunas antigos. (shutil só é importado na publicação:
+este módulo também é carregado pela predição única.)
+
+O ModelWatcher é usado pelo modo servidor: observa o CURRENT, carrega a
+versão nova numa thread em segundo plano e só então a entrega para a troca,
+sem parar as requisições em andamento.
+"""
+
+import os
+import sys
+import threading
+import time
+
+VERSIONS_DIRNAME = 'versions'
+CURRENT_POINTER_NAME = 'CURRENT'
+BUNDLE_FILENAME = 'lol_model.bundle'
+SKLEARN_MODEL_FILENAME = 'lol_model.joblib'
+
+DEFAULT_KEEP_VERSIONS = 5
+DEFAULT_RELOAD_INTERVAL = 2.0
+
+
+def versions_dir(model_dir):
+    return os.path.join(model_dir, VERSIONS_DIRNAME)
+
+
+def version_path(model_dir, version):
+    return os.path.join(versions_dir(model_dir), version)
+
+
+def new_version_name(model_dir, now=None):
+    """Nome de versão a partir do horário UTC; ganha um sufixo -2, -3... se já existir no mesmo segundo."""
+    from datetime import datetime, timezone
+
+    base = (now or datetime.now(timezone.utc)).strftime('%Y%m%dT%H%M%SZ')
+    version, suffix = base, 1
+    while os.path.exists(version_path(model_dir, version)):
+        suffix += 1
+        version = f"{base}-{suffix}"
+    return version
+
+
+def read_current_version(model_dir):
+    """Nome da versão apontada pelo CURRENT, ou None se não houver versão publicada."""
+    try:
+        with open(os.path.join(model_dir, CURRENT_POINTER_NAME), 'r') as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    if not version or not os.path.isdir(version_path(model_dir, version)):
+        return None
+    return version
+
+
+def set_current_version(model_dir, version):
+    """Troca o ponteiro CURRENT de forma atômica (leitores veem o antigo ou o novo, nunca meio arquivo)."""
+    if not os.path.isdir(version_path(model_dir, version)):
+        raise FileNotFoundError(f"Versão '{version}' não existe em {versions_dir(model_dir)}")
+    pointer = os.path.join(model_dir, CURRENT_POINTER_NAME)
+    tmp_pointer = f"{pointer}.tmp"
+    with open(tmp_pointer, 'w') as f:
+        f.write(version + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_pointer, pointer)
+
+
+def publish_version(model_dir, version, write_fn, keep=DEFAULT_KEEP_VERSIONS):
+    """
+    Publica uma versão: `write_fn(diretório)` grava os artefatos num diretório
+    temporário, que é renomeado para versions/<version>; depois o CURRENT passa
+    a apontar para ela. Mantém só as `keep` versões mais recentes.
+    """
+    import shutil
+
+    os.makedirs(versions_dir(model_dir), exist_ok=True)
+    final_dir = version_path(model_dir, version)
+    tmp_dir = os.path.join(versions_dir(model_dir), f".tmp-{version}-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        write_fn(tmp_dir)
+        os.rename(tmp_dir, final_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    set_current_version(model_dir, version)
+    prune_versions(model_dir, keep)
+    return final_dir
+
+
+def list_versions(model_dir):
+    """Versões publicadas, da mais antiga para a mais nova (o nome começa pelo timestamp)."""
+    try:
+        names = os.listdir(versions_dir(model_dir))
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if not name.startswith('.') and os.path.isdir(version_path(model_dir, name)))
+
+
+def prune_versions(model_dir, keep=DEFAULT_KEEP_VERSIONS):
+    """Apaga as versões mais antigas além das `keep` últimas (nunca a versão atual)."""
+    import shutil
+
+    if not keep or keep <= 0:
+        return
+    current = read_current_version(model_dir)
+    for version in list_versions(model_dir)[:-keep]:
+        if version != current:
+            shutil.rmtree(version_path(model_dir, version), ignore_errors=True)
+
+
+class ModelWatcher:
+    """
+    Thread que consulta o CURRENT a cada `interval` segundos. Quando a versão
+    muda, chama `load_fn(version)` (ainda na thread do watcher, fora do caminho
+    das requisições) e entrega o resultado para `on_swap(version, loaded)`.
+    Se a carga falhar, a versão atual continua em uso.
+    """
+
+    def __init__(self, model_dir, load_fn, on_swap, current_version=None, interval=DEFAULT_RELOAD_INTERVAL):
+        self.model_dir = model_dir
+        self.load_fn = load_fn
+        self.on_swap = on_swap
+        self.current_version = current_version
+        self.interval = interval
+        self.reloads = 0
+        self.failures = 0
+        self._failed_version = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def check(self):
+        """Uma verificação do ponteiro; devolve True se trocou de versão."""
+        version = read_current_version(self.model_dir)
+        if version is None or version in (self.current_version, self._failed_version):
+            return False
+        started = time.perf_counter()
+        try:
+            loaded = self.load_fn(version)
+        except Exception as e:
+            self.failures += 1
+            print(f"⚠️ Aviso: falha ao carregar a versão '{version}' do modelo ({e}); mantendo '{self.current_version}'.", file=sys.stderr)
+            # Não tenta de novo a cada ciclo: só quando o CURRENT mudar outra vez
+            self._failed_version = version
+            return False
+        self.on_swap(version, loaded)
+        self.current_version = version
+        self.reloads += 1
+        print(f"🔄 Modelo trocado para a versão '{version}' (carregado em {(time.perf_counter() - started) * 1000:.1f} ms).", file=sys.stderr)
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        return {
+            "current_version": self.current_version,
+            "reloads": self.reloads,
+            "failed_reloads": self.failures,
+            "interval_seconds": self.interval,
+        }
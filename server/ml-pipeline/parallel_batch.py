@@ -0,0 +1,227 @@
+# server/parallel_batch.py
+
+"""
+Predição em batch paralela (LoL): divide o CSV de entrada em shards por
+faixa de bytes e pontua cada shard num pool de processos.
+
+  - Os limites dos shards são ajustados para o início da próxima linha, então
+    nenhum processo precisa ler o arquivo inteiro para achar o seu pedaço.
+    (Assume que nenhum campo tem quebra de linha entre aspas, o que vale para
+    os CSVs de partidas.)
+  - Cada worker carrega o modelo UMA vez (initializer do pool) e roda o
+    sklearn com n_jobs=1, para não disputar núcleos com os outros workers.
+  - O campeão descartado pelo get_dummies(drop_first=True) é decidido sobre o
+    arquivo todo (1ª passada, só a coluna championName, também em paralelo),
+    então o resultado é idêntico ao do modo batch em um processo.
+  - Cada shard grava um arquivo parcial; no fim eles são concatenados na
+    ordem do arquivo de entrada, em JSON Lines (um resultado por linha).
+    Nos formatos tipados (--format), os workers devolvem os arrays do shard
+    e o processo principal os grava em ordem no writer do formato.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from predict_model import format_prediction, load_prediction_assets, score_matrix, score_typed
+from prediction_writers import open_prediction_writer, row_ids_for
+from preprocess_plan import CATEGORICAL_COLUMN, dropped_category
+
+# Shards pequenos o bastante para limitar a memória de cada worker e numerosos
+# o bastante para balancear a carga entre eles
+DEFAULT_SHARD_BYTES = 32 * 1024 * 1024
+SHARDS_PER_WORKER = 4
+
+# Estado de cada processo do pool (preenchido pelo initializer)
+_worker_model = None
+_worker_plan = None
+
+
+def plan_byte_shards(input_csv_path, n_shards):
+    """
+    Divide o arquivo em até `n_shards` faixas [início, fim) de bytes, cada uma
+    começando no início de uma linha. Devolve (cabeçalho, lista de faixas).
+    """
+    file_size = os.path.getsize(input_csv_path)
+    with open(input_csv_path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        boundaries = [data_start]
+        step = (file_size - data_start) / max(n_shards, 1)
+        for i in range(1, n_shards):
+            target = int(data_start + i * step)
+            if target <= boundaries[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()  # avança até o fim da linha em que `target` caiu
+            position = f.tell()
+            if boundaries[-1] < position < file_size:
+                boundaries.append(position)
+        boundaries.append(file_size)
+
+    shards = [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+    return header, shards
+
+
+def _read_shard(input_csv_path, header, shard, usecols=None):
+    """Lê uma faixa de bytes do CSV como DataFrame (com o cabeçalho do arquivo)."""
+    import io
+    import pandas as pd
+
+    start, end = shard
+    with open(input_csv_path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(header + data), usecols=usecols)
+
+
+def _init_worker():
+    global _worker_model, _worker_plan
+    _worker_model, _worker_plan = load_prediction_assets(prefer_sklearn=True)
+    if hasattr(_worker_model, 'n_jobs'):
+        _worker_model.n_jobs = 1
+
+
+def _shard_dropped_category(input_csv_path, header, shard):
+    """1ª passada: candidato a campeão descartado e número de linhas do shard."""
+    chunk = _read_shard(input_csv_path, header, shard, usecols=[CATEGORICAL_COLUMN])
+    return dropped_category(chunk[CATEGORICAL_COLUMN].to_numpy()), len(chunk)
+
+
+def _score_shard(input_csv_path, header, shard, dropped, part_path, typed=False, id_column=None, offset=0):
+    """
+    2ª passada: pré-processa e prediz o shard. No formato legado grava o
+    resultado em `part_path` (JSON Lines); com `typed`, devolve os arrays
+    (ids, rótulos, probabilidade de vitória, confiança) para o processo principal.
+    """
+    started = time.perf_counter()
+    chunk = _read_shard(input_csv_path, header, shard)
+    block = None
+    if chunk.empty:
+        if not typed:
+            open(part_path, 'w').close()
+        return os.getpid(), 0, time.perf_counter() - started, block
+
+    columns = {col: chunk[col].to_numpy() for col in chunk.columns}
+    input_scaled = _worker_plan.transform_columns(columns, n_rows=len(chunk), dropped=dropped)
+    if typed:
+        block = (row_ids_for(columns, len(chunk), id_column, offset), *score_typed(_worker_model, input_scaled))
+    else:
+        predictions_codes, confidences = score_matrix(_worker_model, input_scaled)
+        with open(part_path, 'w') as f:
+            f.write("".join(
+                json.dumps(format_prediction(code, confidence)) + "\n"
+                for code, confidence in zip(predictions_codes, confidences)
+            ))
+    return os.getpid(), len(chunk), time.perf_counter() - started, block
+
+
+def predict_batch_parallel(input_csv_path, output_jsonl_path, n_workers=None, output_format=None, id_column=None,
+                           shard_bytes=DEFAULT_SHARD_BYTES):
+    """
+    MODO BATCH PARALELO (LoL): pontua o CSV em `n_workers` processos e grava
+    JSON Lines (ou `output_format`) na mesma ordem das linhas de entrada.
+    Devolve as estatísticas (linhas, tempo, linhas/s no total e por worker).
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+
+    print(f"--- Iniciando Predição em Batch Paralela (League of Legends, {n_workers} workers) ---", file=sys.stderr)
+    if not os.path.exists(input_csv_path):
+        print(f"❌ ERRO: Arquivo de entrada não encontrado em {input_csv_path}", file=sys.stderr)
+        return None
+
+    # Carrega (e, se preciso, gera o bundle) uma vez aqui, antes dos workers
+    load_prediction_assets()
+
+    started = time.perf_counter()
+    file_size = os.path.getsize(input_csv_path)
+    n_shards = max(n_workers * SHARDS_PER_WORKER, -(-file_size // shard_bytes))
+    header, shards = plan_byte_shards(input_csv_path, n_shards)
+    print(f"Arquivo dividido em {len(shards)} shards ({file_size / 1e6:.1f} MB).", file=sys.stderr)
+
+    typed = output_format is not None
+    part_paths = [f"{output_jsonl_path}.part{i:05d}" for i in range(len(shards))]
+    per_worker = {}
+    writer = None
+    # Saída começada e não terminada: é apagada se der erro (nada de arquivo truncado)
+    output_started = completed = False
+    try:
+        if typed:
+            output_started = True
+            writer = open_prediction_writer(output_jsonl_path, output_format, id_column)
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as pool:
+            first_pass = list(pool.map(
+                _shard_dropped_category,
+                [input_csv_path] * len(shards), [header] * len(shards), shards,
+            ))
+            dropped = dropped_category([c for c, _ in first_pass if c is not None])
+            # Índice da 1ª linha de cada shard (ids padrão dos formatos tipados)
+            offsets = [0]
+            for _, n_rows in first_pass[:-1]:
+                offsets.append(offsets[-1] + n_rows)
+
+            results = pool.map(
+                _score_shard,
+                [input_csv_path] * len(shards), [header] * len(shards), shards,
+                [dropped] * len(shards), part_paths,
+                [typed] * len(shards), [id_column] * len(shards), offsets,
+            )
+            total_rows = 0
+            for pid, n_rows, seconds, block in results:
+                worker = per_worker.setdefault(pid, {"shards": 0, "rows": 0, "seconds": 0.0})
+                worker["shards"] += 1
+                worker["rows"] += n_rows
+                worker["seconds"] += seconds
+                total_rows += n_rows
+                if block is not None:
+                    writer.write(*block)
+
+        if writer is not None:
+            finished_writer, writer = writer, None
+            finished_writer.close()
+        else:
+            # Junta os parciais na ordem dos shards (= ordem das linhas de entrada)
+            output_started = True
+            with open(output_jsonl_path, 'wb') as out:
+                for part_path in part_paths:
+                    with open(part_path, 'rb') as part:
+                        shutil.copyfileobj(part, out)
+        completed = True
+    except Exception as e:
+        print(f"❌ ERRO durante a predição paralela: {e}", file=sys.stderr)
+        return None
+    finally:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if output_started and not completed and os.path.exists(output_jsonl_path):
+            os.remove(output_jsonl_path)
+        for part_path in part_paths:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+
+    elapsed = time.perf_counter() - started
+    stats = {
+        "workers": n_workers,
+        "shards": len(shards),
+        "rows": total_rows,
+        "seconds": elapsed,
+        "rows_per_second": total_rows / elapsed if elapsed > 0 else 0.0,
+        "per_worker": [
+            {"pid": pid, **worker, "rows_per_second": worker["rows"] / worker["seconds"] if worker["seconds"] > 0 else 0.0}
+            for pid, worker in sorted(per_worker.items())
+        ],
+    }
+
+    for worker in stats["per_worker"]:
+        print(f"  worker {worker['pid']}: {worker['rows']} linhas em {worker['shards']} shards, "
+              f"{worker['rows_per_second']:.0f} linhas/s", file=sys.stderr)
+    print(f"Salvas {total_rows} predições em: {output_jsonl_path} "
+          f"({elapsed:.2f}s, {stats['rows_per_second']:.0f} linhas/s)", file=sys.stderr)
+    print("--- ✅ Predição em batch paralela (LoL) concluída com sucesso! ---", file=sys.stderr)
+    return stats
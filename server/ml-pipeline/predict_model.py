@@ -1,20 +1,50 @@
-import joblib
-import pandas as pd
 import sys
 import json
-import argparse
 import os
+import time
+
+# pandas, joblib/sklearn e argparse são importados só nos modos que precisam
+# deles: a predição única (usada pela rota /api/predict a cada requisição)
+# roda apenas com NumPy, lendo o bundle do modelo.
+from forest_engine import FlatForest, compile_model
+from game_modes import GAME_MODE_FIELD, is_valid_mode_name, mode_model_dir, published_modes, route_game_mode
+from latency_metrics import PredictionMetrics
+from model_bundle import ModelBundle, bundle_arrays, write_bundle
+from model_versions import (BUNDLE_FILENAME, DEFAULT_RELOAD_INTERVAL, SKLEARN_MODEL_FILENAME, ModelWatcher,
+                            read_current_version, version_path)
+from micro_batcher import DEFAULT_MAX_BATCH_SIZE, DEFAULT_MAX_WAIT_MS, MicroBatcher
+from prediction_cache import DEFAULT_MAX_ENTRIES, DEFAULT_TTL_SECONDS, PredictionCache
+from prediction_writers import OUTPUT_FORMATS, open_prediction_writer, row_ids_for
+from preprocess_plan import CATEGORICAL_COLUMN, PreprocessPlan, category_buckets, dropped_category, hashed_buckets_in
 
 # --- CAMINHOS (AGORA PARA O MODELO DE LOL) ---
 MODEL_DIR = 'models_saved'
+# Modelos por modo de jogo ficam em models_saved/modes/<modo>/ (game_modes.py):
+# requisições com esse gameMode vão para eles; as demais, para o modelo ALL
+# de models_saved/ (caminhos abaixo).
+
+# Ordem de busca do modelo ALL (load_prediction_assets):
+#   1. a versão apontada por models_saved/CURRENT (models_saved/versions/<versão>/,
+#      publicada pelo lol_classifier_model.py);
+#   2. o bundle único (modelo + scaler + colunas) fora das versões;
+#   3. os arquivos legados (ainda gravados pelo treino), convertidos para o bundle.
+BUNDLE_PATH = os.path.join(MODEL_DIR, 'lol_model.bundle')
 MODEL_PATH = os.path.join(MODEL_DIR, 'lol_model.joblib')
 SCALER_PATH = os.path.join(MODEL_DIR, 'lol_scaler.joblib')
 COLUMNS_PATH = os.path.join(MODEL_DIR, 'lol_model_columns.json') # <-- MUITO IMPORTANTE
 
+# Arquivo de métricas por etapa do modo single, se a variável estiver definida
+METRICS_ENV_VAR = 'PREDICT_METRICS_JSON'
+
+# Linhas por bloco no modo batch em streaming (--chunk_size)
+DEFAULT_CHUNK_SIZE = 100_000
+
 def check_model_files_exist():
-    """Verifica se os 3 arquivos do modelo de LoL existem."""
+    """Verifica se existe uma versão publicada, o bundle do modelo ou os 3 arquivos legados de LoL."""
+    if read_current_version(MODEL_DIR) is not None or os.path.exists(BUNDLE_PATH):
+        return True
     if not os.path.exists(MODEL_PATH):
-        print(f"❌ ERRO: Modelo de LoL não encontrado em {MODEL_PATH}", file=sys.stderr)
+        print(f"❌ ERRO: Modelo de LoL não encontrado em {BUNDLE_PATH} nem em {MODEL_PATH}", file=sys.stderr)
         print(f"   -> Você já rodou o script de treino (lol_classifier_model.py)?", file=sys.stderr)
         return False
     if not os.path.exists(SCALER_PATH):
@@ -25,11 +55,10 @@ def check_model_files_exist():
         return False
     return True
 
-def load_prediction_assets():
-    """Carrega todos os 3 arquivos necessários para a predição."""
-    if not check_model_files_exist():
-        sys.exit(1)
-        
+def load_legacy_assets():
+    """Carrega os 3 arquivos legados (.joblib + colunas)."""
+    import joblib
+
     model = joblib.load(MODEL_PATH)
     scaler = joblib.load(SCALER_PATH)
     with open(COLUMNS_PATH, 'r') as f:
@@ -37,12 +66,138 @@ def load_prediction_assets():
         
     return model, scaler, feature_order
 
-def preprocess_data(df, feature_order):
+def compile_preprocess_plan(scaler, feature_order):
+    """
+    Compila o plano de pré-processamento (índices das colunas + média/escala
+    do scaler) uma única vez, logo após carregar os artefatos.
+    """
+    return PreprocessPlan(feature_order, scaler)
+
+def _legacy_signature():
+    """(mtime, tamanho) dos 3 arquivos legados, ou None se algum não existir."""
+    try:
+        stats = [os.stat(path) for path in (MODEL_PATH, SCALER_PATH, COLUMNS_PATH)]
+    except FileNotFoundError:
+        return None
+    return [[st.st_mtime_ns, st.st_size] for st in stats]
+
+def _open_bundle():
+    """
+    Abre o bundle, se existir e estiver em dia. Um bundle convertido a partir
+    dos arquivos legados guarda a assinatura deles e é refeito se eles mudarem.
+    """
+    if not os.path.exists(BUNDLE_PATH):
+        return None
+    try:
+        bundle = ModelBundle(BUNDLE_PATH)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Aviso: bundle inválido em {BUNDLE_PATH} ({e}); usando os arquivos legados.", file=sys.stderr)
+        return None
+
+    source_signature = bundle.metadata.get('source_signature')
+    if source_signature is not None and _legacy_signature() not in (None, source_signature):
+        return None
+    return bundle
+
+def _convert_legacy_assets(model, scaler, feature_order):
+    """Converte os 3 arquivos legados em bundle (uma vez) e devolve o bundle aberto."""
+    forest = compile_model(model)
+    if not isinstance(forest, FlatForest):
+        return None
+    try:
+        write_bundle(
+            BUNDLE_PATH,
+            bundle_arrays(forest, compile_preprocess_plan(scaler, feature_order)),
+            feature_order,
+            metadata={"source": "legacy_joblib", "source_signature": _legacy_signature()},
+        )
+        return ModelBundle(BUNDLE_PATH)
+    except OSError as e:
+        print(f"⚠️ Aviso: não foi possível gravar o bundle em {BUNDLE_PATH}: {e}", file=sys.stderr)
+        return None
+
+def load_version_assets(version, prefer_sklearn=False, model_dir=MODEL_DIR):
+    """(modelo, plano) de uma versão publicada em <model_dir>/versions/<version>/."""
+    directory = version_path(model_dir, version)
+    bundle = ModelBundle(os.path.join(directory, BUNDLE_FILENAME))
+    plan = bundle.preprocess_plan()
+    sklearn_path = os.path.join(directory, SKLEARN_MODEL_FILENAME)
+    if prefer_sklearn and os.path.exists(sklearn_path):
+        import joblib
+        model = joblib.load(sklearn_path)
+        model.model_version = bundle.model_version
+        return model, plan
+    return bundle.forest(), plan
+
+def load_prediction_assets(prefer_sklearn=False):
+    """
+    Carrega (modelo, plano de pré-processamento) para a predição.
+
+    Usa a versão apontada por models_saved/CURRENT, se houver. Senão lê o
+    bundle (um arquivo, via memory map): nada de joblib/sklearn é
+    importado. Sem bundle, converte os 3 arquivos legados e grava o bundle
+    para as próximas chamadas.
+
+    prefer_sklearn=True devolve o RandomForest do sklearn (lol_model.joblib)
+    no lugar do FlatForest, quando ele existe: as probabilidades são as
+    mesmas, e o laço em Cython do sklearn é mais rápido em lotes grandes.
+    """
+    if not check_model_files_exist():
+        sys.exit(1)
+
+    version = read_current_version(MODEL_DIR)
+    if version is not None:
+        return load_version_assets(version, prefer_sklearn)
+
+    bundle = _open_bundle()
+    if bundle is None:
+        model, scaler, feature_order = load_legacy_assets()
+        plan = compile_preprocess_plan(scaler, feature_order)
+        bundle = _convert_legacy_assets(model, scaler, feature_order)
+        if bundle is None or prefer_sklearn:
+            return model, plan
+        return bundle.forest(), plan
+
+    plan = bundle.preprocess_plan()
+    if prefer_sklearn and os.path.exists(MODEL_PATH):
+        import joblib
+        return joblib.load(MODEL_PATH), plan
+    return bundle.forest(), plan
+
+def load_mode_assets(game_mode, prefer_sklearn=False):
+    """
+    (modelo, plano) do modelo próprio do modo de jogo (models_saved/modes/<modo>/),
+    ou None se o modo não tiver um (a predição usa então o modelo ALL).
+    """
+    if not is_valid_mode_name(game_mode):
+        return None
+    model_dir = mode_model_dir(MODEL_DIR, game_mode)
+    version = read_current_version(model_dir)
+    if version is None:
+        return None
+    return load_version_assets(version, prefer_sklearn, model_dir)
+
+def preprocess_data(df, feature_order, dtype=None):
     """
     Prepara os dados de entrada para o modelo, aplicando get_dummies
-    e reindexando para bater com as colunas do treino.
+    e reindexando para bater com as colunas do treino. Com `dtype` (ex:
+    np.float32, para modelos treinados em float32), todas as colunas saem
+    nesse tipo.
+    (Caminho de referência; a inferência usa o PreprocessPlan, que gera
+    exatamente a mesma matriz já escalada.)
+    Modelos com a codificação 'hashed' (colunas championName#i) recebem o
+    campeão no balde crc32(nome) % N, sem drop_first.
     """
+    import pandas as pd
     
+    n_buckets = hashed_buckets_in(feature_order)
+    if n_buckets:
+        buckets = category_buckets(df['championName'].to_numpy(), n_buckets)
+        df = df.assign(championName=pd.Series(buckets.astype(str), index=df.index).where(buckets >= 0))
+        df_encoded = pd.get_dummies(df, columns=['championName'], prefix_sep='#')
+        df_reindexed = df_encoded.reindex(columns=feature_order, fill_value=0)
+        return df_reindexed if dtype is None else df_reindexed.astype(dtype)
+
     # 1. Aplica get_dummies nos dados de entrada
     # (drop_first=True, igual ao treino)
     df_encoded = pd.get_dummies(df, columns=['championName'], drop_first=True)
@@ -54,125 +209,533 @@ def preprocess_data(df, feature_order):
     #  c) Colunas (campeões) que estão no treino, mas não na entrada, sejam adicionadas com valor 0.
     df_reindexed = df_encoded.reindex(columns=feature_order, fill_value=0)
     
-    return df_reindexed
+    return df_reindexed if dtype is None else df_reindexed.astype(dtype)
+
+def score_matrix(model, input_scaled):
+    """
+    Calcula classe e confiança numa ÚNICA passada pelo modelo.
+    (predict() do RandomForest já é o argmax de predict_proba(), então
+    chamar os dois percorria cada árvore duas vezes.) Aceita tanto o
+    modelo do sklearn quanto o FlatForest.
+    """
+    probabilities = model.predict_proba(input_scaled)
+    prediction_codes = model.classes_.take(probabilities.argmax(axis=1))
+    confidences = probabilities.max(axis=1)
+    return prediction_codes, confidences
 
-def predict_batch(input_csv_path, output_json_path):
+def score_typed(model, input_scaled):
+    """
+    Versão numérica do score_matrix para os formatos tipados (--format):
+    rótulo int8 (1 = Vitória), probabilidade de vitória e confiança.
+    """
+    probabilities = model.predict_proba(input_scaled)
+    labels = model.classes_.take(probabilities.argmax(axis=1)).astype('int8')
+    win_probability = probabilities[:, list(model.classes_).index(1)]
+    return labels, win_probability, probabilities.max(axis=1)
+
+def write_typed_block(writer, model, input_scaled, columns, n_rows, id_column=None, offset=0, metrics=None):
+    """Pontua um bloco já pré-processado e grava as colunas tipadas no writer."""
+    started = time.perf_counter()
+    row_ids = row_ids_for(columns, n_rows, id_column, offset)
+    scored = score_typed(model, input_scaled)
+    if metrics is not None:
+        started = metrics.since('predict', started)
+    writer.write(row_ids, *scored)
+    if metrics is not None:
+        metrics.since('serialize', started)
+
+def format_prediction(prediction_code, confidence):
+    """Monta o dicionário de saída esperado pelo Node.js."""
+    prediction_text = "Vitória" if prediction_code == 1 else "Derrota"
+    return {
+        "prediction": prediction_text,
+        "confidence": f"{confidence * 100:.2f}%"
+    }
+
+def finish_batch_metrics(metrics, started, n_rows, metrics_path):
+    """Fecha as métricas de uma execução batch e grava o snapshot, se pedido."""
+    metrics.since('total', started)
+    metrics.count(requests=1, rows=n_rows)
+    if metrics_path:
+        metrics.save_json(metrics_path, accumulate=True)
+        print(f"Métricas por etapa salvas em: {metrics_path}", file=sys.stderr)
+
+def predict_batch(input_csv_path, output_json_path, output_format=None, id_column=None, metrics_path=None):
     """
     MODO BATCH (LoL): Lê um CSV, faz predição em todas as linhas
-    e salva um JSON com os resultados.
+    e salva um JSON com os resultados. Com `output_format` (jsonl, csv,
+    npz, parquet), grava as colunas tipadas de prediction_writers.
+    Com `metrics_path`, grava os tempos por etapa (latency_metrics).
     """
+    from dataset_cache import load_dataset
+
     print(f"--- Iniciando Predição em Batch (League of Legends) ---", file=sys.stderr)
     
-    model, scaler, feature_order = load_prediction_assets()
+    metrics = PredictionMetrics()
+    started = stage_started = time.perf_counter()
+    model, plan = load_prediction_assets(prefer_sklearn=True)
+    stage_started = metrics.since('load', stage_started)
     
     print(f"Carregando dados de entrada: {input_csv_path}", file=sys.stderr)
     try:
-        input_df = pd.read_csv(input_csv_path)
+        # Colunas float já na precisão do modelo (float32: sem a cópia float64)
+        input_df = load_dataset(input_csv_path, float_dtype=plan.dtype)
     except FileNotFoundError:
         print(f"❌ ERRO: Arquivo de entrada não encontrado em {input_csv_path}", file=sys.stderr)
         return
+    stage_started = metrics.since('read', stage_started)
 
     # --- PREPARAÇÃO DOS DADOS (LoL) ---
-    print("Preparando features para o modelo (dummies e reindex)...", file=sys.stderr)
+    print("Preparando features para o modelo (plano compilado + scaler)...", file=sys.stderr)
     
+    columns = {col: input_df[col].to_numpy() for col in input_df.columns}
     try:
-        # Passa o DataFrame para a nova função de pré-processamento
-        input_df_processed = preprocess_data(input_df, feature_order)
+        input_scaled = plan.transform_columns(columns, n_rows=len(input_df))
     except Exception as e:
         print(f"❌ ERRO durante o pré-processamento: {e}", file=sys.stderr)
-        print(f"   Colunas esperadas (início): {feature_order[:5]}...", file=sys.stderr)
+        print(f"   Colunas esperadas (início): {plan.feature_order[:5]}...", file=sys.stderr)
         print(f"   Colunas encontradas no CSV: {list(input_df.columns)}", file=sys.stderr)
+        metrics.error('preprocess')
+        finish_batch_metrics(metrics, started, 0, metrics_path)
         return
-        
-    # Escala os dados (em batch)
-    print("Aplicando scaler...", file=sys.stderr)
-    input_scaled = scaler.transform(input_df_processed)
+    stage_started = metrics.since('preprocess', stage_started)
     
+    if output_format is not None:
+        print(f"Fazendo predições e salvando ({output_format}) em: {output_json_path}", file=sys.stderr)
+        writer = None
+        try:
+            writer = open_prediction_writer(output_json_path, output_format, id_column)
+            try:
+                write_typed_block(writer, model, input_scaled, columns, len(input_df), id_column, metrics=metrics)
+            finally:
+                writer.close()
+        except (KeyError, ValueError) as e:
+            print(f"❌ ERRO ao gravar a saída: {e}", file=sys.stderr)
+            # Arquivo já aberto (erro na gravação): a saída parcial é apagada
+            if writer is not None and os.path.exists(output_json_path):
+                os.remove(output_json_path)
+            return
+        finish_batch_metrics(metrics, started, len(input_df), metrics_path)
+        print("--- ✅ Predição em batch (LoL) concluída com sucesso! ---", file=sys.stderr)
+        return
+
     # --- PREDIÇÃO (EM BATCH) ---
     print("Fazendo predições...", file=sys.stderr)
-    predictions_codes = model.predict(input_scaled)
-    predictions_probs = model.predict_proba(input_scaled)
+    predictions_codes, confidences = score_matrix(model, input_scaled)
+    stage_started = metrics.since('predict', stage_started)
     
     # --- FORMATANDO A SAÍDA ---
     print("Formatando resultados...", file=sys.stderr)
-    results = []
-    for i in range(len(predictions_codes)):
-        prediction_text = "Vitória" if predictions_codes[i] == 1 else "Derrota"
-        confidence = predictions_probs[i].max() * 100
-        
-        result = {
-            "prediction": prediction_text,
-            "confidence": f"{confidence:.2f}%"
-        }
-        results.append(result)
+    results = [
+        format_prediction(code, confidence)
+        for code, confidence in zip(predictions_codes, confidences)
+    ]
         
     # --- SALVANDO A SAÍDA ---
     print(f"Salvando {len(results)} predições em: {output_json_path}", file=sys.stderr)
     with open(output_json_path, 'w') as f:
         json.dump(results, f, indent=4)
+    metrics.since('serialize', stage_started)
+    finish_batch_metrics(metrics, started, len(results), metrics_path)
         
     print("--- ✅ Predição em batch (LoL) concluída com sucesso! ---", file=sys.stderr)
 
 
-def predict_single(data_dict):
+def find_dropped_category(input_csv_path, chunk_size):
     """
-    MODO SINGLE (LoL): Recebe um dicionário (JSON) e imprime 
-    a predição no console (para o Node.js).
+    Passada leve (só a coluna championName) pelo CSV inteiro para descobrir
+    qual campeão o get_dummies(drop_first=True) descartaria no arquivo todo.
+    Assim o modo em streaming gera exatamente as mesmas predições do batch.
     """
-    model, scaler, feature_order = load_prediction_assets()
-    
-    try:
-        input_df = pd.DataFrame([data_dict])
-        input_df_processed = preprocess_data(input_df, feature_order)
-    except Exception as e:
-        print(json.dumps({"error": f"Erro no pré-processamento: {e}"}))
-        sys.exit(1)
+    import pandas as pd
+
+    candidates = []
+    for chunk in pd.read_csv(input_csv_path, usecols=[CATEGORICAL_COLUMN], chunksize=chunk_size):
+        candidate = dropped_category(chunk[CATEGORICAL_COLUMN].to_numpy())
+        if candidate is not None:
+            candidates.append(candidate)
+    return dropped_category(candidates)
+
+def predict_batch_streaming(input_csv_path, output_jsonl_path, chunk_size=DEFAULT_CHUNK_SIZE,
+                            output_format=None, id_column=None, metrics_path=None):
+    """
+    MODO BATCH EM STREAMING (LoL): lê o CSV em blocos de `chunk_size` linhas,
+    pré-processa, prediz e anexa cada bloco ao arquivo de saída em JSON Lines
+    (um resultado por linha). A memória fica limitada pelo tamanho do bloco,
+    não pelo tamanho do arquivo. Com `output_format`, os blocos vão para o
+    writer tipado do formato pedido. Com `metrics_path`, grava os tempos
+    por etapa (cada bloco é uma observação de read/preprocess/predict/serialize).
+    """
+    from contextlib import closing
+    import pandas as pd
+
+    print(f"--- Iniciando Predição em Batch/Streaming (League of Legends, blocos de {chunk_size}) ---", file=sys.stderr)
     
-    input_scaled = scaler.transform(input_df_processed)
+    metrics = PredictionMetrics()
+    started = time.perf_counter()
+    model, plan = load_prediction_assets(prefer_sklearn=True)
+    metrics.since('load', started)
     
-    prediction_code = model.predict(input_scaled)[0]
-    prediction_text = "Vitória" if prediction_code == 1 else "Derrota"
+    print(f"Lendo campeões de: {input_csv_path}", file=sys.stderr)
+    try:
+        dropped = find_dropped_category(input_csv_path, chunk_size)
+    except FileNotFoundError:
+        print(f"❌ ERRO: Arquivo de entrada não encontrado em {input_csv_path}", file=sys.stderr)
+        return
+    except ValueError as e:
+        print(f"❌ ERRO durante o pré-processamento: {e}", file=sys.stderr)
+        return
     
-    probabilities = model.predict_proba(input_scaled)[0]
-    confidence = probabilities.max() * 100
+    try:
+        writer = open_prediction_writer(output_jsonl_path, output_format, id_column) if output_format else None
+    except ValueError as e:
+        print(f"❌ ERRO: {e}", file=sys.stderr)
+        return
+
+    total_rows = 0
+    completed = False
+    try:
+        output = closing(writer) if writer is not None else open(output_jsonl_path, 'w')
+        with output as f:
+            stage_started = time.perf_counter()
+            for chunk in pd.read_csv(input_csv_path, chunksize=chunk_size):
+                stage_started = metrics.since('read', stage_started)
+                columns = {col: chunk[col].to_numpy() for col in chunk.columns}
+                try:
+                    input_scaled = plan.transform_columns(columns, n_rows=len(chunk), dropped=dropped)
+                except Exception as e:
+                    print(f"❌ ERRO durante o pré-processamento (linhas {total_rows}+): {e}", file=sys.stderr)
+                    print(f"   Colunas encontradas no CSV: {list(chunk.columns)}", file=sys.stderr)
+                    metrics.error('preprocess')
+                    finish_batch_metrics(metrics, started, total_rows, metrics_path)
+                    return
+                stage_started = metrics.since('preprocess', stage_started)
+            
+                if writer is not None:
+                    try:
+                        write_typed_block(writer, model, input_scaled, columns, len(chunk), id_column, total_rows, metrics)
+                    except KeyError as e:
+                        print(f"❌ ERRO ao gravar a saída: {e}", file=sys.stderr)
+                        return
+                else:
+                    predictions_codes, confidences = score_matrix(model, input_scaled)
+                    stage_started = metrics.since('predict', stage_started)
+                    f.write("".join(
+                        json.dumps(format_prediction(code, confidence)) + "\n"
+                        for code, confidence in zip(predictions_codes, confidences)
+                    ))
+                    metrics.since('serialize', stage_started)
+                total_rows += len(chunk)
+                print(f"  -> {total_rows} linhas processadas...", file=sys.stderr)
+                stage_started = time.perf_counter()
+
+        completed = True
+    finally:
+        # Erro no meio (pré-processamento de um bloco, gravação): a saída parcial é apagada,
+        # para ninguém ler um arquivo incompleto como se fosse o resultado
+        if not completed and os.path.exists(output_jsonl_path):
+            os.remove(output_jsonl_path)
     
-    result = {
-        "prediction": prediction_text,
-        "confidence": f"{confidence:.2f}%"
-    }
-    # Imprime o JSON final para o Node.js capturar
-    print(json.dumps(result))
+    finish_batch_metrics(metrics, started, total_rows, metrics_path)
+    print(f"Salvas {total_rows} predições em: {output_jsonl_path}", file=sys.stderr)
+    print("--- ✅ Predição em batch/streaming (LoL) concluída com sucesso! ---", file=sys.stderr)
 
 
-if __name__ == "__main__":
+def predict_record(model, plan, data_dict, cache=None, batcher=None, metrics=None):
+    """
+    Faz a predição de UMA partida (dicionário de features) e devolve o
+    dicionário de resultado, sem imprimir nada. Usado pelo modo single e
+    pelo modo servidor (--serve). Com `cache`, vetores já vistos não
+    passam de novo pelo modelo; com `batcher`, a chamada ao modelo é
+    agrupada com as de outras requisições simultâneas. Com `metrics`,
+    registra o tempo de cada etapa (e em qual delas houve erro).
+    """
+    if metrics is not None:
+        started = time.perf_counter()
+    try:
+        input_scaled = plan.transform_record(data_dict)
+    except Exception:
+        if metrics is not None:
+            metrics.error('preprocess')
+        raise
+    if metrics is not None:
+        started = metrics.since('preprocess', started)
+
+    if cache is not None:
+        key = cache.key_for(input_scaled)
+        cached = cache.get(key)
+        if metrics is not None:
+            started = metrics.since('cache', started)
+        if cached is not None:
+            return dict(cached)
+
+    try:
+        if batcher is not None:
+            prediction_code, confidence = batcher.predict(input_scaled[0])
+        else:
+            prediction_codes, confidences = score_matrix(model, input_scaled)
+            prediction_code, confidence = prediction_codes[0], confidences[0]
+    except Exception:
+        if metrics is not None:
+            metrics.error('predict')
+        raise
+    if metrics is not None:
+        metrics.since('predict', started)
+
+    result = format_prediction(prediction_code, confidence)
+    if cache is not None:
+        cache.put(key, result)
+        return dict(result)
+    return result
+
+
+def predict_single(data_dict, metrics_path=None):
+    """
+    MODO SINGLE (LoL): Recebe um dicionário (JSON) e imprime 
+    a predição no console (para o Node.js). Com `metrics_path`, os tempos
+    por etapa desta chamada são somados ao snapshot JSON desse arquivo.
+    Com o campo gameMode, usa o modelo do modo (se houver um); só esse
+    modelo é carregado.
+    """
+    metrics = PredictionMetrics() if metrics_path else None
+    started = time.perf_counter()
+    try:
+        game_mode = data_dict.get(GAME_MODE_FIELD) if isinstance(data_dict, dict) else None
+        model, plan = load_mode_assets(game_mode) or load_prediction_assets()
+        if metrics is not None:
+            metrics.since('load', started)
+        
+        try:
+            result = predict_record(model, plan, data_dict, metrics=metrics)
+        except Exception as e:
+            print(json.dumps({"error": f"Erro no pré-processamento: {e}"}))
+            sys.exit(1)
+        
+        # Imprime o JSON final para o Node.js capturar
+        serialize_started = time.perf_counter()
+        print(json.dumps(result))
+        if metrics is not None:
+            metrics.since('serialize', serialize_started)
+            metrics.since('total', started)
+            metrics.count(requests=1, rows=1)
+    finally:
+        if metrics is not None:
+            metrics.save_json(metrics_path, accumulate=True)
+
+
+def warm_up_sample_for(plan):
+    """Uma predição "vazia" (features numéricas zeradas) para aquecer o caminho de predição."""
+    sample = {col: 0 for col in plan.feature_order if not col.startswith(CATEGORICAL_COLUMN)}
+    sample['championName'] = ''
+    return sample
+
+
+def serve(socket_address=None, cache_size=DEFAULT_MAX_ENTRIES, cache_ttl=DEFAULT_TTL_SECONDS,
+          batch_max_size=DEFAULT_MAX_BATCH_SIZE, batch_max_wait_ms=DEFAULT_MAX_WAIT_MS,
+          reload_interval=DEFAULT_RELOAD_INTERVAL, metrics_enabled=False, metrics_port=None, metrics_path=None):
+    """
+    MODO SERVIDOR (LoL): Carrega os artefatos UMA vez e responde
+    predições em JSON delimitado por linha (stdin/stdout ou socket local).
+    cache_size=0 desliga o cache de predições. No socket, requisições
+    simultâneas são pontuadas juntas (até batch_max_size linhas ou
+    batch_max_wait_ms); batch_max_size=1 desliga o micro-batching.
+
+    A cada reload_interval segundos o models_saved/CURRENT é consultado: uma
+    versão nova é carregada e aquecida em segundo plano e trocada com uma
+    única atribuição. Requisições em andamento terminam com o modelo que
+    pegaram; reload_interval=0 desliga o hot-reload.
+
+    Os modelos por modo de jogo publicados na partida (models_saved/modes/,
+    game_modes.py) também são carregados, cada um com o seu cache, batcher
+    e hot-reload: a requisição vai para o modelo do seu gameMode, ou para o
+    modelo ALL se o modo não tiver um. (Um modo publicado depois da
+    partida só entra reiniciando o servidor.)
+
+    Com metrics_enabled (ou metrics_port/metrics_path), cada etapa da
+    requisição entra num histograma de latência: consultável pelos comandos
+    "metrics"/"metrics_prometheus", por HTTP em metrics_port (/metrics) e
+    gravado em metrics_path ao encerrar.
+    """
+    from prediction_server import PredictionServer
+
+    # Rotas: None = modelo ALL (models_saved/), senão o modo de jogo (models_saved/modes/<modo>/)
+    route_dirs = {None: MODEL_DIR, **{mode: mode_model_dir(MODEL_DIR, mode) for mode in published_modes(MODEL_DIR)}}
+    initial_versions = {route: read_current_version(model_dir) for route, model_dir in route_dirs.items()}
+
+    # Para poucas linhas por chamada, o FlatForest é bem mais rápido que o
+    # despacho árvore a árvore do sklearn (ver benchmarks/bench_forest_engine.py)
+    load_started = time.perf_counter()
+    model, plan = load_prediction_assets()
+    load_seconds = time.perf_counter() - load_started
+    # Cache e batcher são criados depois do aquecimento, para não contar essas predições
+    caches = {}
+    metrics = None
+    watchers = {}
+    # Em stdin/stdout só há um chamador (sequencial): agrupar só adicionaria espera
+    use_batching = bool(socket_address) and batch_max_size > 1
+
+    def make_batcher(model):
+        if not use_batching:
+            return None
+        return MicroBatcher(lambda X: score_matrix(model, X), batch_max_size, batch_max_wait_ms)
+
+    def predict_fn(data_dict):
+        route = route_game_mode(data_dict, routes)
+        model, plan, batcher = routes[route]
+        return predict_record(model, plan, data_dict, caches.get(route), batcher, metrics)
+
+    def load_version(version, model_dir=MODEL_DIR):
+        started = time.perf_counter()
+        model, plan = load_version_assets(version, model_dir=model_dir)
+        if metrics is not None:
+            metrics.since('load', started)
+        for _ in range(3):
+            score_matrix(model, plan.transform_record(warm_up_sample_for(plan)))
+        return model, plan
+
+    def swapper(route):
+        def swap(version, loaded):
+            model, plan = loaded
+            previous_batcher = routes[route][2]
+            routes[route] = (model, plan, make_batcher(model))
+            if route in caches:
+                caches[route].set_model_version(getattr(model, 'model_version', None))
+            if previous_batcher is not None:
+                previous_batcher.close()  # pontua o que já estava na fila antes de parar
+        return swap
+
+    def route_stats(route):
+        _, _, batcher = routes[route]
+        watcher = watchers.get(route)
+        return {
+            "model": watcher.stats() if watcher is not None else {"current_version": initial_versions[route]},
+            "cache": caches[route].stats() if route in caches else None,
+            "batching": batcher.stats() if batcher is not None else None,
+        }
+
+    def stats_fn():
+        stats = route_stats(None)
+        if len(routes) > 1:
+            stats["modes"] = {route: route_stats(route) for route in routes if route is not None}
+        return stats
+
+    # Modelo em uso por rota: (modelo, plano, batcher), sempre substituído por inteiro
+    routes = {None: (model, plan, None)}
+    for route, model_dir in route_dirs.items():
+        if route is not None:
+            routes[route] = (*load_version(initial_versions[route], model_dir), None)
+    if len(routes) > 1:
+        print(f"Modelos por modo de jogo: {', '.join(route for route in routes if route is not None)}.", file=sys.stderr)
+
+    server = PredictionServer(predict_fn, stats_fn)
+    server.warm_up(warm_up_sample_for(plan))
+    if metrics_enabled or metrics_port or metrics_path:
+        metrics = PredictionMetrics()
+        metrics.observe('load', load_seconds)
+        server.metrics = metrics
+        if metrics_port:
+            from latency_metrics import serve_http
+            host, port = serve_http(metrics, str(metrics_port)).server_address[:2]
+            print(f"Métricas (Prometheus) em http://{host}:{port}/metrics", file=sys.stderr)
+    for route, (route_model, route_plan, _) in list(routes.items()):
+        if cache_size > 0:
+            caches[route] = PredictionCache(cache_size, cache_ttl, model_version=getattr(route_model, 'model_version', None))
+        routes[route] = (route_model, route_plan, make_batcher(route_model))
+    if reload_interval > 0:
+        for route, model_dir in route_dirs.items():
+            load_fn = lambda version, model_dir=model_dir: load_version(version, model_dir)
+            watchers[route] = ModelWatcher(model_dir, load_fn, swapper(route), initial_versions[route],
+                                           reload_interval).start()
+
+    try:
+        if socket_address:
+            server.serve_socket(socket_address)
+        else:
+            server.serve_stdio(sys.stdin, sys.stdout)
+    finally:
+        if metrics is not None and metrics_path:
+            metrics.save_json(metrics_path)
+
+
+def predict_single_from_json(json_text, error_message, metrics_path=None):
+    """
+    Decodifica o JSON da linha de comando e roda o modo single. Sem
+    `metrics_path`, usa a variável de ambiente PREDICT_METRICS_JSON (assim
+    a rota /api/predict pode ser medida sem mudar a chamada do Node).
+    """
+    try:
+        input_data = json.loads(json_text)
+    except json.JSONDecodeError:
+        print(json.dumps({"error": error_message}))
+        sys.exit(1)
+    predict_single(input_data, metrics_path or os.environ.get(METRICS_ENV_VAR))
+
+
+def main(argv):
+    # --- CAMINHO RÁPIDO: predição única (rota /api/predict), sem argparse ---
+    if len(argv) == 3 and argv[1] == '--json_data':
+        predict_single_from_json(argv[2], "O argumento --json_data não é um JSON válido.")
+        return
+
+    if len(argv) == 2 and not argv[1].startswith('-'):
+        print("Aviso: Executando em modo de compatibilidade (lendo JSON de sys.argv[1])...", file=sys.stderr)
+        predict_single_from_json(argv[1], f"Argumento '{argv[1]}' não é um JSON válido.")
+        return
+
+    import argparse
+
     parser = argparse.ArgumentParser(description="Faz predições (LoL) em batch (CSV) ou predição única (JSON).")
     
     parser.add_argument('--input', type=str, help='Caminho para o arquivo CSV de entrada (batch).')
     parser.add_argument('--output', type=str, help='Caminho para o arquivo JSON de saída (batch).')
+    parser.add_argument('--chunk_size', type=int, help=f'Modo batch em streaming: lê o CSV em blocos dessa quantidade de linhas e grava JSON Lines (ex: {DEFAULT_CHUNK_SIZE}).')
+    parser.add_argument('--workers', type=int, help='Modo batch paralelo: divide o CSV em shards e pontua em N processos, gravando JSON Lines (0 = todos os núcleos).')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='Modo batch: saída tipada (id, label int8, win_probability, confidence) em vez do JSON legado.')
+    parser.add_argument('--id_column', type=str, help='Modo batch tipado: coluna do CSV repassada como id da linha (padrão: índice da linha).')
     parser.add_argument('--json_data', type=str, help='String JSON com os dados de entrada (single).')
+    parser.add_argument('--serve', action='store_true', help='Modo servidor: carrega o modelo uma vez e responde JSON por linha.')
+    parser.add_argument('--socket', type=str, help='Endereço do modo servidor (host:porta ou caminho de socket Unix). Padrão: stdin/stdout.')
+    parser.add_argument('--cache_size', type=int, default=DEFAULT_MAX_ENTRIES, help='Modo servidor: máximo de predições em cache (0 desliga o cache).')
+    parser.add_argument('--cache_ttl', type=float, default=DEFAULT_TTL_SECONDS, help='Modo servidor: validade de cada predição em cache, em segundos (0 = sem expiração).')
+    parser.add_argument('--batch_max_size', type=int, default=DEFAULT_MAX_BATCH_SIZE, help='Modo servidor (socket): máximo de requisições simultâneas pontuadas juntas (1 desliga).')
+    parser.add_argument('--batch_max_wait_ms', type=float, default=DEFAULT_MAX_WAIT_MS, help='Modo servidor (socket): espera máxima para completar um lote, em ms.')
+    parser.add_argument('--reload_interval', type=float, default=DEFAULT_RELOAD_INTERVAL, help='Modo servidor: intervalo (s) para checar uma nova versão em models_saved/CURRENT (0 desliga o hot-reload).')
+    parser.add_argument('--metrics', action='store_true', help='Modo servidor: liga os histogramas de latência por etapa (comandos "metrics" e "metrics_prometheus").')
+    parser.add_argument('--metrics_port', type=str, help='Modo servidor: expõe as métricas em HTTP (/metrics no formato Prometheus, /metrics.json) em host:porta ou porta.')
+    parser.add_argument('--metrics_json', type=str, help='Grava o snapshot JSON das métricas por etapa nesse arquivo (single/batch: acumula entre execuções; servidor: ao encerrar).')
+
+    args = parser.parse_args(argv[1:])
+
+    if args.chunk_size is not None and args.chunk_size <= 0:
+        parser.error("--chunk_size deve ser um inteiro positivo.")
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers deve ser um inteiro não negativo.")
+    if args.id_column and not args.format:
+        parser.error("--id_column só vale com --format.")
+
+    if args.serve:
+        serve(args.socket, args.cache_size, args.cache_ttl, args.batch_max_size, args.batch_max_wait_ms, args.reload_interval,
+              args.metrics, args.metrics_port, args.metrics_json)
+
+    elif args.input and args.output and args.workers is not None:
+        from parallel_batch import predict_batch_parallel
+        if predict_batch_parallel(args.input, args.output, args.workers or None, args.format, args.id_column) is None:
+            sys.exit(1)
 
-    args = parser.parse_args()
+    elif args.input and args.output and args.chunk_size:
+        predict_batch_streaming(args.input, args.output, args.chunk_size, args.format, args.id_column, args.metrics_json)
 
-    if args.input and args.output:
-        predict_batch(args.input, args.output)
+    elif args.input and args.output:
+        predict_batch(args.input, args.output, args.format, args.id_column, args.metrics_json)
         
     elif args.json_data:
-        try:
-            input_data = json.loads(args.json_data)
-            predict_single(input_data)
-        except json.JSONDecodeError:
-            print(json.dumps({"error": "O argumento --json_data não é um JSON válido."}))
-            sys.exit(1)
+        predict_single_from_json(args.json_data, "O argumento --json_data não é um JSON válido.", args.metrics_json)
             
-    elif len(sys.argv) > 1 and sys.argv[1] not in ['--input', '--output', '--json_data', '-h', '--help']:
-        print("Aviso: Executando em modo de compatibilidade (lendo JSON de sys.argv[1])...", file=sys.stderr)
-        try:
-            input_data = json.loads(sys.argv[1])
-            predict_single(input_data)
-        except json.JSONDecodeError:
-            print(json.dumps({"error": f"Argumento '{sys.argv[1]}' não é um JSON válido."}))
-            sys.exit(1)
     else:
         print("❌ ERRO: Argumentos inválidos.", file=sys.stderr)
         parser.print_help(file=sys.stderr)
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,98 @@
+# server/prediction_cache.py
+
+"""
+Cache de resultados de predição (LRU + TTL) para o modo servidor.
+
+O PredictionSimulator e os recarregamentos do dashboard mandam os mesmos
+(ou quase os mesmos) dicionários de features várias vezes. A chave do
+cache é o hash do vetor JÁ pré-processado (a linha que entra no modelo)
+mais a versão do modelo. Assim ordem das chaves, campos que o modelo
+ignora, 5 vs 5.0 e campeões desconhecidos caem na mesma entrada.
+
+Trocar a versão do modelo (novo bundle) esvazia o cache.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL_SECONDS = 300.0
+
+
+class PredictionCache:
+    """LRU limitado por número de entradas, com expiração por tempo (thread-safe)."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl_seconds=DEFAULT_TTL_SECONDS, model_version=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.model_version = model_version
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key_for(self, vector):
+        """Hash canônico do vetor pré-processado + versão do modelo."""
+        vector = np.ascontiguousarray(vector, dtype=np.float64) + 0.0  # -0.0 -> 0.0
+        vector[np.isnan(vector)] = np.nan  # um único padrão de bits para NaN
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str(self.model_version).encode('utf-8'))
+        digest.update(vector.tobytes())
+        return digest.digest()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, stored_at = entry
+            if self.ttl_seconds and now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def set_model_version(self, model_version):
+        """Chamado quando um novo modelo é carregado: descarta tudo se a versão mudou."""
+        with self._lock:
+            if model_version != self.model_version:
+                self.model_version = model_version
+                self._entries.clear()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "model_version": self.model_version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
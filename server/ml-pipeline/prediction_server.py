@@ -0,0 +1,178 @@
+# server/prediction_server.py
+
+"""
+Modo servidor do preditor de LoL (python predict_model.py --serve).
+
+O modelo, o scaler e as colunas são carregados UMA vez e cada requisição
+custa só o pré-processamento + predição, em vez de um processo Python novo
+(com import de pandas/sklearn e joblib.load) por chamada.
+
+Protocolo: JSON delimitado por linha (NDJSON). Cada linha de entrada é o
+mesmo dicionário de features aceito por predict_single; a resposta é uma
+linha com {"prediction", "confidence"} ou {"error"}. Um campo opcional
+"id" na requisição é devolvido intacto, para o chamador casar as respostas.
+Uma linha {"command": "stats"} devolve as estatísticas do servidor (ex:
+acertos/erros do cache de predições) em vez de uma predição, e
+{"command": "metrics"} / {"command": "metrics_prometheus"} devolvem os
+histogramas de latência por etapa (latency_metrics.py), se ligados.
+
+Transportes:
+  - stdin/stdout (padrão): um único chamador, ex. um processo filho do Node.
+  - socket local: "host:porta" (TCP) ou um caminho (socket Unix). Cada
+    conexão é atendida em sua própria thread, então vários chamadores
+    podem ser servidos ao mesmo tempo.
+"""
+
+import json
+import os
+import socketserver
+import stat
+import sys
+import time
+
+
+class _ThreadingTCPServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _ThreadingUnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def _is_socket(path):
+    try:
+        return stat.S_ISSOCK(os.stat(path).st_mode)
+    except FileNotFoundError:
+        return False
+
+
+class PredictionServer:
+    """Atende requisições NDJSON usando uma função de predição já carregada."""
+
+    def __init__(self, predict_fn, stats_fn=None, metrics=None):
+        self.predict_fn = predict_fn
+        self.stats_fn = stats_fn
+        self.metrics = metrics
+
+    def warm_up(self, sample, rounds=3):
+        """Roda algumas predições descartáveis para aquecer caches e imports tardios."""
+        start = time.perf_counter()
+        for _ in range(rounds):
+            try:
+                self.predict_fn(dict(sample))
+            except Exception as e:
+                print(f"⚠️ Aviso: falha no aquecimento do servidor: {e}", file=sys.stderr)
+                return
+        elapsed_ms = (time.perf_counter() - start) * 1000 / rounds
+        print(f"Servidor aquecido ({elapsed_ms:.2f} ms por predição).", file=sys.stderr)
+
+    def handle_line(self, line):
+        """
+        Processa UMA linha de requisição (str, ou bytes vindos do socket) e
+        devolve a linha de resposta (sem '\\n').
+        """
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter()
+        try:
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+            data_dict = json.loads(line)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            if metrics is not None:
+                metrics.error('parse')
+            return json.dumps({"error": "Requisição não é um JSON válido."})
+
+        if not isinstance(data_dict, dict):
+            if metrics is not None:
+                metrics.error('parse')
+            return json.dumps({"error": "Requisição deve ser um objeto JSON."})
+
+        request_id = data_dict.pop('id', None)
+        if 'command' in data_dict:
+            result = self._run_command(data_dict['command'])
+            if request_id is not None:
+                result = {"id": request_id, **result}
+            return json.dumps(result)
+
+        if metrics is not None:
+            metrics.since('parse', started)
+        try:
+            result = self.predict_fn(data_dict)
+        except Exception as e:
+            result = {"error": f"Erro no pré-processamento: {e}"}
+
+        if metrics is not None:
+            serialize_started = time.perf_counter()
+        if request_id is not None:
+            result = {"id": request_id, **result}
+        response = json.dumps(result)
+        if metrics is not None:
+            metrics.since('serialize', serialize_started)
+            metrics.since('total', started)
+            metrics.count(requests=1, rows=1)
+        return response
+
+    def _run_command(self, command):
+        if command == 'stats':
+            return {"stats": self.stats_fn() if self.stats_fn else {}}
+        if command in ('metrics', 'metrics_prometheus'):
+            if self.metrics is None:
+                return {"error": "Métricas desligadas (inicie o servidor com --metrics)."}
+            if command == 'metrics':
+                return {"metrics": self.metrics.snapshot()}
+            return {"metrics": self.metrics.to_prometheus()}
+        return {"error": f"Comando desconhecido: {command}"}
+
+    def serve_stdio(self, stdin, stdout):
+        """Lê requisições de stdin até EOF e escreve cada resposta em stdout."""
+        print("--- Servidor de predição (LoL) pronto em stdin/stdout ---", file=sys.stderr)
+        for line in stdin:
+            line = line.strip()
+            if not line:
+                continue
+            stdout.write(self.handle_line(line) + "\n")
+            stdout.flush()
+
+    def serve_socket(self, address):
+        """Atende requisições em um socket local, uma thread por conexão."""
+        server = self._make_socket_server(address)
+        print(f"--- Servidor de predição (LoL) pronto em {address} ---", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            if isinstance(server, socketserver.UnixStreamServer) and _is_socket(address):
+                os.remove(address)
+
+    def _make_socket_server(self, address):
+        prediction_server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    # Decodificado no handle_line: bytes inválidos viram resposta de erro, não derrubam a conexão
+                    line = raw_line.strip()
+                    if not line:
+                        continue
+                    response = prediction_server.handle_line(line) + "\n"
+                    self.wfile.write(response.encode('utf-8'))
+                    self.wfile.flush()
+
+        host, sep, port = address.rpartition(':')
+        if sep and port.isdigit():
+            server_class = _ThreadingTCPServer
+            server_address = (host or '127.0.0.1', int(port))
+        else:
+            server_class = _ThreadingUnixServer
+            server_address = address
+            if os.path.exists(address):
+                # Só um socket antigo é apagado: um caminho errado (ex: o dataset) não
+                if not _is_socket(address):
+                    raise FileExistsError(f"'{address}' já existe e não é um socket Unix; escolha outro caminho.")
+                os.remove(address)
+
+        return server_class(server_address, Handler)
@@ -0,0 +1,152 @@
+# server/prediction_writers.py
+
+"""
+Formatos tipados de saída para a predição em batch (--format).
+
+O formato legado (lista JSON indentada de {"prediction": "Vitória",
+"confidence": "73.00%"}) é grande, lento de ler de volta e perde precisão.
+Os formatos daqui gravam, para cada linha de entrada, as colunas:
+
+    <id>             id da linha (coluna --id_column do CSV, ou o índice
+                     0-based da linha no arquivo)
+    label            int8: 1 = Vitória, 0 = Derrota
+    win_probability  float64: probabilidade de vitória (classe 1)
+    confidence       float64: probabilidade da classe prevista
+
+Formatos: jsonl, csv, npz (NumPy) e parquet (só se o pyarrow estiver
+instalado). Todos os writers recebem os resultados em blocos, na ordem do
+arquivo de entrada (write(...) várias vezes e close() no fim).
+"""
+
+import json
+
+import numpy as np
+
+OUTPUT_FORMATS = ('jsonl', 'csv', 'npz', 'parquet')
+DEFAULT_ID_COLUMN = 'row_id'
+
+
+def _row_id_array(row_ids):
+    """Ids como array numérico ou de texto (nunca object, que o npz/parquet não guardam bem)."""
+    row_ids = np.asarray(row_ids)
+    if row_ids.dtype.hasobject:
+        row_ids = row_ids.astype(str)
+    return row_ids
+
+
+class _JsonLinesWriter:
+    def __init__(self, path, id_column):
+        self.id_column = id_column
+        self._file = open(path, 'w')
+
+    def write(self, row_ids, labels, win_probability, confidence):
+        self._file.write("".join(
+            json.dumps({self.id_column: row_id, "label": label, "win_probability": win, "confidence": conf}) + "\n"
+            for row_id, label, win, conf in zip(
+                _row_id_array(row_ids).tolist(), labels.tolist(), win_probability.tolist(), confidence.tolist(),
+            )
+        ))
+
+    def close(self):
+        self._file.close()
+
+
+class _CsvWriter:
+    def __init__(self, path, id_column):
+        self.id_column = id_column
+        self._file = open(path, 'w', newline='')
+        self._header = True
+
+    def write(self, row_ids, labels, win_probability, confidence):
+        import pandas as pd
+
+        pd.DataFrame({
+            self.id_column: row_ids,
+            "label": labels,
+            "win_probability": win_probability,
+            "confidence": confidence,
+        }).to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._file.close()
+
+
+class _NpzWriter:
+    """O .npz não aceita anexar: os blocos ficam em memória (~25 bytes/linha) até o close()."""
+
+    def __init__(self, path, id_column):
+        self.path = path
+        self.id_column = id_column
+        self._blocks = {id_column: [], "label": [], "win_probability": [], "confidence": []}
+
+    def write(self, row_ids, labels, win_probability, confidence):
+        self._blocks[self.id_column].append(_row_id_array(row_ids))
+        self._blocks["label"].append(labels)
+        self._blocks["win_probability"].append(win_probability)
+        self._blocks["confidence"].append(confidence)
+
+    def close(self):
+        arrays = {name: np.concatenate(blocks) if blocks else np.empty(0) for name, blocks in self._blocks.items()}
+        arrays["label"] = arrays["label"].astype(np.int8)
+        # np.savez acrescenta '.npz' ao nome se faltar; um arquivo aberto mantém o caminho pedido
+        with open(self.path, 'wb') as f:
+            np.savez(f, **arrays)
+
+
+class _ParquetWriter:
+    """Um row group por bloco, via pyarrow.parquet.ParquetWriter."""
+
+    def __init__(self, path, id_column):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("O formato parquet precisa do pacote pyarrow (pip install pyarrow); use npz, csv ou jsonl.")
+        self._pa = pa
+        self._pq = pq
+        self.path = path
+        self.id_column = id_column
+        self._writer = None
+
+    def write(self, row_ids, labels, win_probability, confidence):
+        table = self._pa.table({
+            self.id_column: _row_id_array(row_ids),
+            "label": labels.astype(np.int8),
+            "win_probability": win_probability,
+            "confidence": confidence,
+        })
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+_WRITERS = {
+    'jsonl': _JsonLinesWriter,
+    'csv': _CsvWriter,
+    'npz': _NpzWriter,
+    'parquet': _ParquetWriter,
+}
+
+
+def open_prediction_writer(path, output_format, id_column=None):
+    """Abre o writer do formato pedido (ValueError se o formato não existir/estiver indisponível)."""
+    if output_format not in _WRITERS:
+        raise ValueError(f"Formato de saída desconhecido: '{output_format}' (opções: {', '.join(OUTPUT_FORMATS)}).")
+    return _WRITERS[output_format](path, id_column or DEFAULT_ID_COLUMN)
+
+
+def row_ids_for(columns, n_rows, id_column=None, offset=0):
+    """
+    Ids das linhas de um bloco: a coluna `id_column` do CSV, se pedida, ou o
+    índice 0-based da linha no arquivo (`offset` = linhas antes do bloco).
+    """
+    if id_column is None:
+        return np.arange(offset, offset + n_rows, dtype=np.int64)
+    if id_column not in columns:
+        raise KeyError(f"Coluna de id '{id_column}' não existe no CSV de entrada.")
+    return np.asarray(columns[id_column])
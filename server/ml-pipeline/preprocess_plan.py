@@ -0,0 +1,220 @@
+# server/preprocess_plan.py
+
+"""
+Plano de pré-processamento "compilado" para a predição de LoL.
+
+Substitui, na inferência, o caminho pd.get_dummies(...) + reindex(...) +
+scaler.transform(...) de predict_model.preprocess_data. O plano é montado
+UMA vez a partir de lol_model_columns.json (e do scaler) e contém:
+  - o índice de cada coluna numérica na matriz final;
+  - o índice de cada dummy championName_* (por nome de campeão);
+  - a média/escala do StandardScaler.
+
+Cada chamada escreve os valores direto numa matriz NumPy pré-alocada e
+aplica a escala no lugar, sem pandas e sem o DataFrame largo intermediário.
+
+Equivalência com o caminho antigo (bit a bit):
+  - colunas que não existem na entrada viram 0 (fill_value=0 do reindex);
+  - colunas da entrada que o modelo não conhece são ignoradas;
+  - campeões desconhecidos não ligam nenhuma dummy;
+  - drop_first=True no get_dummies da INFERÊNCIA descarta o primeiro
+    campeão (em ordem alfabética) presente NO LOTE de entrada. Numa
+    predição única isso zera todas as dummies. O plano reproduz esse
+    comportamento por padrão (drop_first=True) para manter as predições
+    idênticas às de hoje;
+  - a escala é aplicada como no sklearn (x -= mean; x /= scale). Com
+    dtype=np.float32 (modelos treinados em float32, ver
+    feature_precision.py), a matriz e a média/escala ficam em float32,
+    como no StandardScaler.transform de uma entrada float32.
+
+Modelos treinados com a codificação "hashed" (champion_encoding.py) têm,
+no lugar das dummies por campeão, colunas championName#0..championName#N-1:
+o campeão liga a coluna crc32(nome) % N. O plano reconhece essas colunas
+pelo nome; nesse caso não há drop_first (nenhum campeão é descartado).
+"""
+
+import zlib
+
+import numpy as np
+
+CATEGORICAL_COLUMN = 'championName'
+
+HASHED_COLUMN_SEPARATOR = '#'
+
+# Sentinela: "descobrir a categoria descartada a partir do próprio lote"
+_AUTO = object()
+
+
+def _is_missing(value):
+    """None ou NaN (NaN é o único valor diferente de si mesmo)."""
+    return value is None or value != value
+
+
+def dropped_category(values):
+    """Categoria que o get_dummies(drop_first=True) descartaria para esses valores."""
+    uniques = {v for v in values if not _is_missing(v)}
+    if not uniques:
+        return None
+    try:
+        return min(uniques)
+    except TypeError:
+        # Tipos misturados: o pandas cai na ordem de aparição
+        for v in values:
+            if not _is_missing(v):
+                return v
+
+
+def hashed_column_names(n_buckets, categorical_column=CATEGORICAL_COLUMN):
+    """Nomes das colunas do espaço hashed: championName#0 ... championName#(N-1)."""
+    return [f"{categorical_column}{HASHED_COLUMN_SEPARATOR}{i}" for i in range(n_buckets)]
+
+
+def category_buckets(values, n_buckets):
+    """
+    Coluna hashed de cada valor (-1 = ausente). crc32 é estável entre
+    processos e versões do Python (o hash() de str não é).
+    """
+    return np.fromiter(
+        (-1 if _is_missing(v) else zlib.crc32(str(v).encode('utf-8')) % n_buckets for v in values),
+        dtype=np.intp,
+        count=len(values),
+    )
+
+
+def hashed_buckets_in(feature_order, categorical_column=CATEGORICAL_COLUMN):
+    """Número de colunas hashed em feature_order (0 = codificação one-hot)."""
+    prefix = f"{categorical_column}{HASHED_COLUMN_SEPARATOR}"
+    return sum(1 for name in feature_order if name.startswith(prefix))
+
+
+class PreprocessPlan:
+    """Mapeia registros de entrada para a matriz escalada que o modelo espera."""
+
+    def __init__(self, feature_order, scaler=None, categorical_column=CATEGORICAL_COLUMN, drop_first=True,
+                 dtype=np.float64):
+        self.feature_order = list(feature_order)
+        self.dtype = np.dtype(dtype)
+        self.n_features = len(self.feature_order)
+        self.categorical_column = categorical_column
+        self.drop_first = drop_first
+
+        prefix = f"{categorical_column}_"
+        self.column_index = {name: i for i, name in enumerate(self.feature_order)}
+        self.category_index = {
+            name[len(prefix):]: i
+            for i, name in enumerate(self.feature_order)
+            if name.startswith(prefix)
+        }
+
+        # Codificação hashed: índice (em feature_order) de cada coluna championName#i
+        self.n_buckets = hashed_buckets_in(self.feature_order, categorical_column)
+        if self.n_buckets:
+            self.bucket_index = np.array([self.column_index[name] for name in
+                                          hashed_column_names(self.n_buckets, categorical_column)], dtype=np.intp)
+            self.drop_first = False
+
+        self.mean = np.zeros(self.n_features, dtype=self.dtype)
+        self.scale = np.ones(self.n_features, dtype=self.dtype)
+        if scaler is not None:
+            if getattr(scaler, 'with_mean', True) and scaler.mean_ is not None:
+                self.mean = np.asarray(scaler.mean_, dtype=self.dtype)
+            if getattr(scaler, 'with_std', True) and scaler.scale_ is not None:
+                self.scale = np.asarray(scaler.scale_, dtype=self.dtype)
+
+    @classmethod
+    def from_params(cls, feature_order, mean, scale, **kwargs):
+        """Monta o plano a partir de média/escala já extraídas (sem o objeto do sklearn)."""
+        plan = cls(feature_order, **kwargs)
+        plan.mean = np.asarray(mean, dtype=plan.dtype)
+        plan.scale = np.asarray(scale, dtype=plan.dtype)
+        return plan
+
+    def _category_columns(self, values, dropped=_AUTO):
+        """Índice da dummy de cada valor da coluna categórica (-1 = nenhuma)."""
+        if self.n_buckets:
+            buckets = category_buckets(values, self.n_buckets)
+            return np.where(buckets >= 0, self.bucket_index[buckets], -1)
+        lookup = dict(self.category_index)
+        if self.drop_first:
+            if dropped is _AUTO:
+                dropped = dropped_category(values)
+            if dropped is not None:
+                lookup.pop(str(dropped), None)
+        return np.fromiter(
+            (-1 if _is_missing(v) else lookup.get(str(v), -1) for v in values),
+            dtype=np.intp,
+            count=len(values),
+        )
+
+    def _finish(self, X):
+        X -= self.mean
+        X /= self.scale
+        return X
+
+    def transform_records(self, records):
+        """
+        Converte uma lista de dicionários (ex: o JSON do Node) na matriz
+        escalada (n_registros x n_features), pronta para o modelo.
+        """
+        n_rows = len(records)
+        X = np.zeros((n_rows, self.n_features), dtype=self.dtype)
+        # Como no pd.DataFrame(records): uma chave presente em só alguns
+        # registros vira NaN (e não 0) nos demais.
+        filled = np.zeros((n_rows, self.n_features), dtype=bool) if n_rows > 1 else None
+        categories = []
+        has_category = False
+
+        for row, record in enumerate(records):
+            category = None
+            for key, value in record.items():
+                if key == self.categorical_column:
+                    category = value
+                    has_category = True
+                    continue
+                idx = self.column_index.get(key)
+                if idx is not None:
+                    X[row, idx] = np.nan if value is None else value
+                    if filled is not None:
+                        filled[row, idx] = True
+            categories.append(category)
+
+        if not has_category:
+            raise KeyError(f"['{self.categorical_column}'] not in index")
+        if filled is not None:
+            X[~filled & filled.any(axis=0)] = np.nan
+
+        cat_columns = self._category_columns(categories)
+        rows = np.flatnonzero(cat_columns >= 0)
+        X[rows, cat_columns[rows]] = 1.0
+        return self._finish(X)
+
+    def transform_record(self, record):
+        """Atalho para uma única predição: devolve a matriz 1 x n_features."""
+        return self.transform_records([record])
+
+    def transform_columns(self, columns, n_rows=None, dropped=_AUTO):
+        """
+        Versão colunar (para o modo batch): `columns` mapeia nome da coluna
+        -> sequência de valores (ex: {c: df[c].to_numpy() for c in df}).
+
+        `dropped` fixa a categoria do drop_first (ex: a do arquivo inteiro,
+        quando o CSV é lido em blocos); por padrão ela vem do próprio lote.
+        """
+        if self.categorical_column not in columns:
+            raise KeyError(f"['{self.categorical_column}'] not in index")
+
+        if n_rows is None:
+            n_rows = len(columns[self.categorical_column])
+        X = np.zeros((n_rows, self.n_features), dtype=self.dtype)
+
+        for name, values in columns.items():
+            if name == self.categorical_column:
+                continue
+            idx = self.column_index.get(name)
+            if idx is not None:
+                X[:, idx] = np.asarray(values, dtype=self.dtype)
+
+        cat_columns = self._category_columns(columns[self.categorical_column], dropped)
+        rows = np.flatnonzero(cat_columns >= 0)
+        X[rows, cat_columns[rows]] = 1.0
+        return self._finish(X)
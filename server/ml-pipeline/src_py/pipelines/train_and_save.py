@@ -1,40 +1,24 @@
 # server/train_and_save_model.py
 
-import pandas as pd
+import os
+import sys
 from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier
 import joblib # Biblioteca para salvar o modelo
-from pymongo import MongoClient
 from dotenv import load_dotenv
-import os
+
+# valorant_matches.py fica na raiz do ml-pipeline
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from valorant_matches import matches_collection, read_match_features  # noqa: E402
 
 def train_and_save():
     print("Iniciando o processo de treinamento final...")
 
-    # Carrega os dados do MongoDB
+    # Carrega os dados do MongoDB (projeção + cursor em lotes, ver valorant_matches.py)
     load_dotenv()
-    uri = os.getenv("MONGODB_URI")
-    client = MongoClient(uri)
-    db = client["valorant-stats"]
-    matches_data = list(db["matches"].find({}))
-    print(f"Encontrados {len(matches_data)} registros no banco de dados.")
-
-    # Prepara os dados (exatamente como antes)
-    player_stats_list = []
-    for match in matches_data:
-        stats = match['playerStats']
-        kills = stats.get('kills', 0)
-        deaths = stats.get('deaths', 1)
-        assists = stats.get('assists', 0)
-        effective_deaths = deaths if deaths > 0 else 1
-        stats['kda_ratio'] = (kills + assists) / effective_deaths
-        player_stats_list.append(stats)
-
-    df = pd.DataFrame(player_stats_list)
-    df['result'] = [m['result'] for m in matches_data]
-
-    features = df[['score', 'kills', 'deaths', 'assists', 'headshotPercentage', 'firstKills', 'kda_ratio']]
-    target = df['result'].apply(lambda x: 1 if x == 'Vitória' else 0)
+    # DataFrame com os nomes das colunas: o scaler salvo guarda feature_names_in_, como antes
+    features, target = read_match_features(matches_collection(), min_matches=0)
+    print(f"Encontrados {len(target)} registros no banco de dados.")
 
     # --- Treinamento Final ---
     # 1. Prepara o Scaler com TODOS os dados
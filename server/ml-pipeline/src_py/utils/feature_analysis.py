@@ -8,6 +8,9 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.ensemble import RandomForestClassifier
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from dataset_cache import load_dataset  # noqa: E402
+
 plt.switch_backend("Agg")  # garante compatibilidade em ambientes sem interface gráfica
 
 
@@ -17,7 +20,7 @@ def analyze_features(csv_path='lol_player_stats.csv', output_dir='feature_analys
     """
 
     try:
-        df = pd.read_csv(csv_path)
+        df = load_dataset(csv_path)
     except Exception as e:
         msg = f"❌ Erro ao carregar CSV: {e}"
         print(msg, file=sys.stderr)
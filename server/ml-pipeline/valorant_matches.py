@@ -0,0 +1,132 @@
+# server/valorant_matches.py
+
+"""
+Leitura das partidas de Valorant (MongoDB, valorant-stats.matches) direto
+para colunas NumPy — usada pelo classifier_model.py e pelo
+src_py/pipelines/train_and_save.py.
+
+Antes: list(matches.find({})) trazia os documentos inteiros (mapa, data,
+ids, ...) para dicts Python, montava um DataFrame de todos os playerStats
+e só então escolhia as 7 features. Agora:
+    - a projeção (MATCH_PROJECTION) vai para o servidor: só
+      playerStats.<campo> das 6 estatísticas e o result trafegam;
+    - o cursor é lido em lotes de `batch_size` documentos;
+    - cada lote vira um bloco de uma matriz pré-alocada (tamanho estimado
+      pelo estimated_document_count, dobrando se faltar espaço); nada de
+      lista de documentos nem DataFrame intermediário. O pymongo ainda
+      decodifica cada documento (já projetado, pequeno), mas ele é
+      descartado logo depois de copiado para o lote.
+
+Mesmo resultado do código antigo: campos ausentes viram 0 (o fillna(0)),
+kda_ratio = (kills + assists) / deaths, com deaths ausente ou <= 0 contando
+como 1, e o alvo é 1 para 'Vitória'. As features saem todas em float64.
+
+A coleção é um parâmetro: qualquer objeto com find(filtro, projeção,
+batch_size=...) serve — pymongo (mongod local) ou mongomock nos testes.
+"""
+
+import os
+from operator import itemgetter
+
+import numpy as np
+
+DATABASE_NAME = 'valorant-stats'
+COLLECTION_NAME = 'matches'
+
+STAT_FIELDS = ('score', 'kills', 'deaths', 'assists', 'headshotPercentage', 'firstKills')
+FEATURE_COLUMNS = [*STAT_FIELDS, 'kda_ratio']
+RESULT_FIELD = 'result'
+WIN_LABEL = 'Vitória'
+
+# Só o que vira feature/alvo sai do servidor
+MATCH_PROJECTION = {'_id': 0, RESULT_FIELD: 1, **{f'playerStats.{field}': 1 for field in STAT_FIELDS}}
+
+DEFAULT_BATCH_SIZE = 10_000
+MIN_MATCHES = 50
+
+_KILLS, _DEATHS, _ASSISTS = (STAT_FIELDS.index(field) for field in ('kills', 'deaths', 'assists'))
+_stat_values = itemgetter(*STAT_FIELDS)
+_MISSING = float('nan')
+
+
+def matches_collection(uri=None):
+    """Coleção valorant-stats.matches do MONGODB_URI (ou do `uri` dado)."""
+    from pymongo import MongoClient
+
+    client = MongoClient(uri or os.getenv("MONGODB_URI"))
+    return client[DATABASE_NAME][COLLECTION_NAME]
+
+
+def _estimated_count(collection):
+    try:
+        return max(int(collection.estimated_document_count()), 0)
+    except (AttributeError, NotImplementedError):
+        return 0
+
+
+def _row(match):
+    stats = match.get('playerStats') or {}
+    try:
+        return _stat_values(stats)
+    except KeyError:
+        return tuple(stats.get(field, _MISSING) for field in STAT_FIELDS)
+
+
+def read_match_columns(collection, batch_size=DEFAULT_BATCH_SIZE, query=None):
+    """
+    Lê as partidas (projeção + cursor em lotes) e devolve (X, y): X é uma
+    matriz float64 (n x 7, colunas FEATURE_COLUMNS) e y o alvo (int64).
+    """
+    capacity = max(_estimated_count(collection), 1)
+    values = np.empty((capacity, len(FEATURE_COLUMNS)), dtype=np.float64)
+    wins = np.empty(capacity, dtype=np.int64)
+    n = 0
+
+    def flush(rows, results):
+        nonlocal values, wins
+        end = n + len(rows)
+        if end > len(values):
+            # A estimativa ficou curta (partidas novas durante a leitura): dobra
+            capacity = max(end, 2 * len(values))
+            values = np.resize(values, (capacity, len(FEATURE_COLUMNS)))
+            wins = np.resize(wins, capacity)
+        # None (campo nulo) também vira NaN aqui
+        values[n:end, :len(STAT_FIELDS)] = np.array(rows, dtype=np.float64).reshape(-1, len(STAT_FIELDS))
+        wins[n:end] = [result == WIN_LABEL for result in results]
+        return end
+
+    cursor = collection.find(query or {}, MATCH_PROJECTION, batch_size=batch_size)
+    try:
+        rows, results = [], []
+        for match in cursor:
+            rows.append(_row(match))
+            results.append(match.get(RESULT_FIELD))
+            if len(rows) >= batch_size:
+                n = flush(rows, results)
+                rows, results = [], []
+        if rows:
+            n = flush(rows, results)
+    finally:
+        close = getattr(cursor, 'close', None)
+        if close is not None:
+            close()
+
+    X, y = values[:n], wins[:n]
+    stats = X[:, :len(STAT_FIELDS)]
+    kills = np.nan_to_num(stats[:, _KILLS], nan=0.0)
+    assists = np.nan_to_num(stats[:, _ASSISTS], nan=0.0)
+    deaths = stats[:, _DEATHS]
+    effective_deaths = np.where(deaths > 0, deaths, 1.0)  # NaN > 0 é False: ausente conta como 1
+    X[:, len(STAT_FIELDS)] = (kills + assists) / effective_deaths
+    stats[np.isnan(stats)] = 0.0
+    return X, y
+
+
+def read_match_features(collection, batch_size=DEFAULT_BATCH_SIZE, min_matches=MIN_MATCHES):
+    """(features, target) como DataFrame/Series, ou None se houver menos de `min_matches` partidas."""
+    import pandas as pd
+
+    X, y = read_match_columns(collection, batch_size)
+    if len(y) < min_matches:
+        return None
+    return pd.DataFrame(X, columns=FEATURE_COLUMNS, copy=False), pd.Series(y, name=RESULT_FIELD)